@@ -0,0 +1,85 @@
+"""
+auto_scrape: generación de scrapers con IA, crawling con Playwright y exportación.
+
+La API pública se carga de forma perezosa: `import auto_scrape` no importa
+ningún submódulo, y `auto_scrape.JSONExporter` solo carga los exportadores
+(sin asyncio, Playwright ni openai). Las dependencias pesadas se importan
+la primera vez que se usan.
+"""
+
+from importlib import import_module as _import_module
+
+# Equivalente a typing.TYPE_CHECKING sin importar typing (~20 ms). Los
+# analizadores de tipos reconocen el nombre; se borra tras usarlo para que
+# no forme parte de la API del paquete.
+TYPE_CHECKING = False
+
+# Nombre público -> submódulo que lo define
+_LAZY = {
+    # Exportadores
+    "BaseExporter": "exporters",
+    "JSONExporter": "exporters",
+    "CSVExporter": "exporters",
+    "ParquetExporter": "exporters",
+    "ArrowExporter": "exporters",
+    # Generación con IA
+    "AIAssistant": "ai_assistant",
+    "TemplateExtractors": "fingerprint",
+    "minimize_html": "minimizer",
+    # Crawling
+    "Crawler": "scraper",
+    "crawl": "scraper",
+    "PageResult": "scraper",
+    "CrawlStats": "scraper",
+    "URLFrontier": "scraper",
+    "BrowserPool": "browser",
+    "SyncBrowserPool": "browser",
+    "Fetcher": "fetcher",
+    "RenderPolicy": "fetcher",
+    "ResponseCache": "cache",
+    "CompletionCache": "cache",
+    "CrawlCheckpoint": "checkpoint",
+    "BlockingRules": "blocking",
+    "paginate": "pagination",
+    "ExtractionSpec": "extraction",
+    "RecordValidator": "validation",
+    "ValidatingExporter": "validation",
+    # Métricas
+    "METRICS": "metrics",
+    "span": "metrics",
+}
+
+__all__ = sorted(_LAZY)
+
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(_import_module(f".{module}", __name__), name)
+    # Cachear en el paquete: los siguientes accesos no pasan por __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
+if TYPE_CHECKING:  # pragma: no cover - solo para los analizadores de tipos
+    from .ai_assistant import AIAssistant
+    from .blocking import BlockingRules
+    from .browser import BrowserPool, SyncBrowserPool
+    from .cache import CompletionCache, ResponseCache
+    from .checkpoint import CrawlCheckpoint
+    from .exporters import ArrowExporter, BaseExporter, CSVExporter, JSONExporter, ParquetExporter
+    from .extraction import ExtractionSpec
+    from .fetcher import Fetcher, RenderPolicy
+    from .fingerprint import TemplateExtractors
+    from .metrics import METRICS, span
+    from .minimizer import minimize_html
+    from .pagination import paginate
+    from .scraper import CrawlStats, Crawler, PageResult, URLFrontier, crawl
+    from .validation import RecordValidator, ValidatingExporter
+
+del TYPE_CHECKING
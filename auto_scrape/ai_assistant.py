@@ -2,45 +2,290 @@
 Asistente de IA para generar código de scraping.
 """
 
-import openai
-from typing import Optional
+import asyncio
+import functools
+import random
+from typing import List, Optional, Sequence, Union
+
+from .cache import CompletionCache
+from .metrics import METRICS, span
+from .minimizer import minimize_html
+from .utils import TokenBucket
+
+
+SYSTEM_PROMPT = """Eres un experto en web scraping con Python. 
+                        Genera código limpio, eficiente y que siga las mejores prácticas.
+                        Incluye siempre manejo de errores y respeta los robots.txt y rate limits."""
+
+
+def _openai():
+    """Importar `openai` solo al hacer la primera petición (tarda cientos de ms)."""
+    import openai
+
+    return openai
+
+
+@functools.lru_cache(maxsize=None)
+def retryable_errors() -> tuple:
+    """Errores de la API que merece la pena reintentar."""
+    openai = _openai()
+    return tuple(
+        getattr(openai, name) for name in (
+            "RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError",
+        ) if hasattr(openai, name)
+    ) + (asyncio.TimeoutError,)
+
+
+def __getattr__(name: str):
+    # Compatibilidad: RETRYABLE_ERRORS era una constante del módulo
+    if name == "RETRYABLE_ERRORS":
+        return retryable_errors()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class AIAssistant:
     """Asistente de IA para generar código de scraping."""
+
+    def __init__(self, model: str = "gpt-4", temperature: float = 0.3,
+                 max_tokens: int = 2000, system_prompt: str = SYSTEM_PROMPT,
+                 cache: Union[CompletionCache, bool, None] = True,
+                 base_url: Optional[str] = None, api_key: Optional[str] = None,
+                 timeout: float = 120.0, html_token_budget: int = 6000):
+        """
+        Args:
+            model: Modelo de OpenAI
+            temperature: Temperatura de muestreo
+            max_tokens: Tokens máximos de la respuesta
+            system_prompt: Mensaje de sistema
+            cache: Caché de respuestas; True (por defecto) usa la caché
+                persistente en `default_cache_dir("llm")`, que se abre con la
+                primera petición, también se puede pasar una `CompletionCache`
+                y False la desactiva
+            base_url: URL de una API compatible con OpenAI (para el modo batch)
+            api_key: Clave de la API (por defecto, la del entorno)
+            timeout: Tiempo máximo por petición en el modo batch (segundos)
+            html_token_budget: Tokens máximos del HTML incluido en el prompt
+        """
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.system_prompt = system_prompt
+        self._cache = cache
+        self.base_url = base_url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.html_token_budget = html_token_budget
+        self.stats = {"html_tokens": 0, "html_tokens_saved": 0}
+        self._async_client = None
+
+    @property
+    def cache(self) -> Optional[CompletionCache]:
+        """Caché de respuestas (la persistente se abre al usarla por primera vez)."""
+        if self._cache is True:
+            self._cache = CompletionCache()
+        return self._cache or None
+
+    @cache.setter
+    def cache(self, cache: Union[CompletionCache, bool, None]) -> None:
+        self._cache = cache
+
+    def build_prompt(self, prompt: str, html: Optional[str] = None) -> str:
+        """
+        Añadir al prompt el HTML de la página, reducido con `minimize_html`
+        para que quepa en `html_token_budget`.
+        """
+        if not html:
+            return prompt
+        reduced = minimize_html(html, self.html_token_budget)
+        self.stats["html_tokens"] += reduced.tokens
+        self.stats["html_tokens_saved"] += reduced.saved_tokens
+        return f"{prompt}\n\nHTML de la página (reducido):\n{reduced.html}"
+
+    def _messages(self, prompt: str) -> List[dict]:
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": prompt},
+        ]
+
+    def _record_usage(self, response) -> None:
+        """Contabilizar los tokens de una respuesta en las métricas."""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        METRICS.inc("llm_tokens_total", getattr(usage, "prompt_tokens", 0) or 0,
+                    model=self.model, kind="prompt")
+        METRICS.inc("llm_tokens_total", getattr(usage, "completion_tokens", 0) or 0,
+                    model=self.model, kind="completion")
+
+    def _cache_key(self, prompt: str) -> str:
+        return CompletionCache.key(
+            model=self.model,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            system=self.system_prompt,
+            prompt=prompt,
+        )
     
-    def generate_scraping_code(self, prompt: str) -> str:
+    def generate_scraping_code(self, prompt: str, refresh: bool = False,
+                               use_cache: bool = True, html: Optional[str] = None) -> str:
         """
         Generar código de scraping usando IA.
         
         Args:
             prompt: Descripción de lo que se quiere hacer
+            refresh: Ignorar la respuesta cacheada y sustituirla por una nueva
+            use_cache: Consultar y actualizar la caché
+            html: HTML de la página de ejemplo; se reduce antes de enviarlo
             
         Returns:
             Código Python generado
         """
+        prompt = self.build_prompt(prompt, html)
+        cache = self.cache if use_cache else None
+        key = self._cache_key(prompt) if cache is not None else None
+        if cache is not None and not refresh:
+            cached = cache.get(key)
+            if cached is not None:
+                METRICS.inc("llm_cache_hits_total", model=self.model)
+                return cached
+
         try:
-            response = openai.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """Eres un experto en web scraping con Python. 
-                        Genera código limpio, eficiente y que siga las mejores prácticas.
-                        Incluye siempre manejo de errores y respeta los robots.txt y rate limits."""
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.3,
-                max_tokens=2000
-            )
+            with span("llm", model=self.model, mode="sync"):
+                response = _openai().chat.completions.create(
+                    model=self.model,
+                    messages=self._messages(prompt),
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens
+                )
+            self._record_usage(response)
             
-            return response.choices[0].message.content.strip()
+            code = response.choices[0].message.content.strip()
+            if cache is not None:
+                cache.set(key, code, self.model)
+            return code
         
         except Exception as e:
             # Fallback: generar código básico si falla la IA
             print(f"Error generando código con IA: {e}")
-    
\ No newline at end of file
+
+    def _client(self):
+        if self._async_client is None:
+            # Los reintentos los gestiona generate_batch
+            self._async_client = _openai().AsyncOpenAI(
+                base_url=self.base_url, api_key=self.api_key,
+                timeout=self.timeout, max_retries=0,
+            )
+        return self._async_client
+
+    def estimate_tokens(self, prompt: str) -> int:
+        """Tokens aproximados de una petición (≈4 caracteres por token más la respuesta)."""
+        return (len(self.system_prompt) + len(prompt)) // 4 + self.max_tokens
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        try:
+            return float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            return None
+
+    async def generate_batch(self, prompts: Sequence[str], concurrency: int = 8,
+                             requests_per_minute: Optional[float] = None,
+                             tokens_per_minute: Optional[float] = None,
+                             max_retries: int = 5, backoff: float = 1.0,
+                             max_backoff: float = 60.0,
+                             refresh: bool = False,
+                             htmls: Optional[Sequence[Optional[str]]] = None) -> List[Optional[str]]:
+        """
+        Generar código para muchos prompts en paralelo.
+
+        Las peticiones se limitan con un semáforo de `concurrency` y con
+        token buckets de peticiones y tokens por minuto. Los 429, timeouts y
+        errores de conexión o 5xx se reintentan con backoff exponencial con
+        jitter (respetando `Retry-After` si viene en la respuesta).
+
+        Args:
+            prompts: Prompts a enviar
+            concurrency: Peticiones simultáneas
+            requests_per_minute: Límite de peticiones por minuto (None = sin límite)
+            tokens_per_minute: Límite de tokens por minuto (None = sin límite)
+            max_retries: Reintentos por prompt
+            backoff: Espera base del backoff (segundos)
+            max_backoff: Espera máxima entre reintentos (segundos)
+            refresh: Ignorar las respuestas cacheadas
+            htmls: HTML de ejemplo de cada prompt (se reduce antes de enviarlo)
+
+        Returns:
+            Código generado para cada prompt, en el mismo orden (None si falla)
+
+        Raises:
+            ValueError: Si `htmls` no tiene un elemento por prompt
+        """
+        if htmls is not None and len(htmls) != len(prompts):
+            raise ValueError(
+                f"htmls debe tener un elemento por prompt ({len(htmls)} != {len(prompts)}); "
+                "usa None para los prompts sin HTML"
+            )
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        client = self._client()
+        retryable = retryable_errors()
+
+        async def generate(prompt: str) -> Optional[str]:
+            key = self._cache_key(prompt) if self.cache is not None else None
+            if key is not None and not refresh:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    METRICS.inc("llm_cache_hits_total", model=self.model)
+                    return cached
+
+            for attempt in range(max_retries + 1):
+                async with semaphore:
+                    if request_bucket is not None or token_bucket is not None:
+                        # Tiempo perdido esperando a los límites de la API
+                        with span("llm_throttle", model=self.model):
+                            if request_bucket is not None:
+                                await request_bucket.acquire()
+                            if token_bucket is not None:
+                                await token_bucket.acquire(self.estimate_tokens(prompt))
+                    try:
+                        with span("llm", model=self.model, mode="batch"):
+                            response = await client.chat.completions.create(
+                                model=self.model,
+                                messages=self._messages(prompt),
+                                temperature=self.temperature,
+                                max_tokens=self.max_tokens,
+                            )
+                    except retryable as e:
+                        error = e
+                    except Exception as e:
+                        print(f"Error generando código con IA: {e}")
+                        return None
+                    else:
+                        self._record_usage(response)
+                        code = response.choices[0].message.content.strip()
+                        if key is not None:
+                            self.cache.set(key, code, self.model)
+                        return code
+
+                if attempt == max_retries:
+                    break
+                METRICS.inc("llm_retries_total", model=self.model, error=type(error).__name__)
+                # Full jitter fuera del semáforo para no bloquear otras peticiones
+                delay = self._retry_after(error)
+                if delay is None:
+                    delay = random.uniform(0, min(max_backoff, backoff * 2 ** attempt))
+                await asyncio.sleep(delay)
+
+            print(f"Error generando código con IA tras {max_retries + 1} intentos: {error}")
+            return None
+
+        if htmls is not None:
+            prompts = [self.build_prompt(p, h) for p, h in zip(prompts, htmls)]
+        return list(await asyncio.gather(*(generate(p) for p in prompts)))
+
+    def generate_many(self, prompts: Sequence[str], **kwargs) -> List[Optional[str]]:
+        """Versión síncrona de `generate_batch`."""
+        return asyncio.run(self.generate_batch(prompts, **kwargs))
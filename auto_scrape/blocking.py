@@ -0,0 +1,178 @@
+"""
+Perfiles de bloqueo de recursos para las páginas de Playwright.
+
+Interceptan las peticiones de un contexto o una página y abortan las de
+los tipos de recurso (imágenes, fuentes, hojas de estilo...) y dominios
+(analítica, publicidad) que no hacen falta para extraer datos.
+"""
+
+import fnmatch
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Tuple, Union
+from urllib.parse import urlsplit
+
+
+TRACKER_DOMAINS = (
+    "google-analytics.com", "googletagmanager.com", "googlesyndication.com",
+    "doubleclick.net", "googleadservices.com", "facebook.net", "connect.facebook.net",
+    "analytics.twitter.com", "ads-twitter.com", "hotjar.com", "segment.io", "segment.com",
+    "mixpanel.com", "amplitude.com", "newrelic.com", "nr-data.net", "optimizely.com",
+    "scorecardresearch.com", "quantserve.com", "criteo.com", "criteo.net", "taboola.com",
+    "outbrain.com", "adnxs.com", "clarity.ms", "bat.bing.com", "tiktok.com/analytics",
+    "cookielaw.org", "onetrust.com", "cookiebot.com", "sentry.io",
+)
+
+
+@dataclass(frozen=True)
+class BlockProfile:
+    """Tipos de recurso y dominios que se bloquean."""
+
+    types: FrozenSet[str] = frozenset()
+    domains: Tuple[str, ...] = ()
+
+    def blocks(self, resource_type: str, url: str) -> bool:
+        """Indicar si una petición se debe abortar (los documentos nunca se bloquean)."""
+        if resource_type == "document":
+            return False
+        if resource_type in self.types:
+            return True
+        if not self.domains:
+            return False
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+        for domain in self.domains:
+            name, _, path = domain.partition("/")
+            if (host == name or host.endswith("." + name)) and (not path or parts.path.startswith("/" + path)):
+                return True
+        return False
+
+
+_MEDIA = frozenset({"image", "media", "font"})
+
+PROFILES: Dict[str, BlockProfile] = {
+    # Sin bloqueo (p. ej. para depurar o sitios que fallan sin recursos)
+    "off": BlockProfile(),
+    # Solo rastreadores y publicidad
+    "trackers": BlockProfile(domains=TRACKER_DOMAINS),
+    # Imágenes, vídeo, fuentes y rastreadores: la página se sigue viendo igual de estructurada
+    "light": BlockProfile(types=_MEDIA, domains=TRACKER_DOMAINS),
+    # Además hojas de estilo, websockets, manifiestos y peticiones sin tipo (beacons)
+    "strict": BlockProfile(
+        types=_MEDIA | {"stylesheet", "texttrack", "eventsource", "websocket", "manifest", "other"},
+        domains=TRACKER_DOMAINS,
+    ),
+}
+
+ProfileSpec = Union[str, BlockProfile, Dict, None]
+
+
+def block_profile(spec: ProfileSpec) -> BlockProfile:
+    """
+    Resolver un perfil a partir de su nombre, un `BlockProfile` o un
+    diccionario `{'extends': 'light', 'types': [...], 'domains': [...]}`
+    (los tipos y dominios se añaden a los del perfil base).
+    """
+    if spec is None:
+        return PROFILES["off"]
+    if isinstance(spec, BlockProfile):
+        return spec
+    if isinstance(spec, str):
+        try:
+            return PROFILES[spec]
+        except KeyError:
+            raise ValueError(f"Perfil de bloqueo desconocido: {spec!r} "
+                             f"(disponibles: {', '.join(PROFILES)})") from None
+    base = block_profile(spec.get("extends", "off"))
+    return BlockProfile(
+        types=base.types | frozenset(spec.get("types", ())),
+        domains=base.domains + tuple(spec.get("domains", ())),
+    )
+
+
+class BlockingRules:
+    """
+    Perfil de bloqueo por sitio.
+
+    `rules` puede ser el nombre de un perfil para todos los sitios o un
+    diccionario de patrones `fnmatch` contra el host (o contra la URL
+    completa si contienen '/') con su perfil, como las reglas de
+    `RenderPolicy`; el perfil de cada petición lo decide la página que la
+    hace, no el dominio del recurso. Los sitios sin regla usan `default`.
+    """
+
+    def __init__(self, rules: Union[ProfileSpec, Dict[str, ProfileSpec]] = "light",
+                 default: ProfileSpec = "light"):
+        if isinstance(rules, dict) and not ({"extends", "types", "domains"} & rules.keys()):
+            self.rules = {pattern: block_profile(spec) for pattern, spec in rules.items()}
+            self.default = block_profile(default)
+        else:
+            self.rules = {}
+            self.default = block_profile(rules)
+        self.blocked = 0
+        self.allowed = 0
+
+    def profile_for(self, url: str) -> BlockProfile:
+        """Perfil que se aplica a las peticiones de una página."""
+        host = (urlsplit(url).hostname or "").lower()
+        for pattern, profile in self.rules.items():
+            if fnmatch.fnmatch(url if "/" in pattern else host, pattern):
+                return profile
+        return self.default
+
+    def blocks(self, request) -> bool:
+        """Decidir si se aborta una petición de Playwright y contabilizarlo."""
+        try:
+            site = request.frame.url
+        except Exception:
+            site = ""
+        if not site or site == "about:blank":
+            site = request.url
+        blocked = self.profile_for(site).blocks(request.resource_type, request.url)
+        if blocked:
+            self.blocked += 1
+        else:
+            self.allowed += 1
+        return blocked
+
+    def stats(self) -> Dict[str, int]:
+        return {"blocked": self.blocked, "allowed": self.allowed}
+
+
+def _rules(rules) -> BlockingRules:
+    return rules if isinstance(rules, BlockingRules) else BlockingRules(rules)
+
+
+async def route_blocking(target, rules: Union[BlockingRules, ProfileSpec, Dict] = "light") -> BlockingRules:
+    """
+    Bloquear recursos en una página o un contexto de Playwright (API asíncrona).
+
+    Las peticiones permitidas pasan al siguiente manejador registrado
+    (`route.fallback`), así que se puede combinar con `route_with_cache`.
+
+    Returns:
+        Las reglas aplicadas (con los contadores de peticiones bloqueadas)
+    """
+    rules = _rules(rules)
+
+    async def handle(route):
+        if rules.blocks(route.request):
+            await route.abort("blockedbyclient")
+        else:
+            await route.fallback()
+
+    await target.route("**/*", handle)
+    return rules
+
+
+def route_blocking_sync(target, rules: Union[BlockingRules, ProfileSpec, Dict] = "light") -> BlockingRules:
+    """Versión de `route_blocking` para la API síncrona de Playwright."""
+    rules = _rules(rules)
+
+    def handle(route):
+        if rules.blocks(route.request):
+            route.abort("blockedbyclient")
+        else:
+            route.fallback()
+
+    target.route("**/*", handle)
+    return rules
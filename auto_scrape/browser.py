@@ -0,0 +1,344 @@
+"""
+Pool de navegadores Playwright reutilizable.
+
+Mantiene un único navegador y N contextos calientes de los que se prestan
+páginas, con un límite de páginas abiertas. Un contexto se recicla tras un
+número configurable de navegaciones o cuando su heap JS supera un umbral.
+"""
+
+import asyncio
+import inspect
+import os
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .metrics import span
+
+
+MEMORY_PROBE = "() => (performance.memory ? performance.memory.usedJSHeapSize : 0)"
+
+# Endpoint CDP de un Chromium ya lanzado (lo define el worker del sandbox)
+CDP_ENDPOINT_ENV = "AUTO_SCRAPE_CDP_ENDPOINT"
+
+
+class _PooledContext:
+    """Contexto del navegador con su contabilidad de uso."""
+
+    def __init__(self, context):
+        self.context = context
+        self.navigations = 0
+        self.open = 0
+        self.idle: List[Any] = []
+        self.retiring = False
+
+
+class _PoolState:
+    """Lógica común de selección y reciclado de contextos."""
+
+    def __init__(self, contexts: int = 2, max_pages: int = 8,
+                 max_navigations: int = 100, max_memory_mb: Optional[float] = None,
+                 headless: bool = True, browser_type: str = "chromium",
+                 launch_options: Optional[Dict[str, Any]] = None,
+                 on_context: Optional[Callable[[Any], Any]] = None,
+                 cdp_endpoint: Optional[str] = None,
+                 **context_options):
+        """
+        Args:
+            contexts: Contextos que se mantienen calientes
+            max_pages: Máximo de páginas prestadas a la vez
+            max_navigations: Préstamos de un contexto antes de reciclarlo
+            max_memory_mb: Heap JS de una página (MB) a partir del cual se
+                recicla su contexto; None lo desactiva
+            headless: Lanzar el navegador sin interfaz
+            browser_type: 'chromium', 'firefox' o 'webkit'
+            launch_options: Opciones extra para `launch`
+            on_context: Función llamada con cada contexto nuevo (p. ej. para
+                registrar rutas con `route_with_cache`)
+            cdp_endpoint: Conectarse a un Chromium ya lanzado en vez de lanzar
+                uno (por defecto, `AUTO_SCRAPE_CDP_ENDPOINT` si está definido)
+            **context_options: Opciones para `new_context` (user_agent,
+                viewport, extra_http_headers...)
+        """
+        self.contexts = max(1, contexts)
+        self.max_pages = max(1, max_pages)
+        self.max_navigations = max(1, max_navigations)
+        self.max_memory_mb = max_memory_mb
+        self.headless = headless
+        self.browser_type = browser_type
+        self.launch_options = launch_options or {}
+        self.on_context = on_context
+        self.cdp_endpoint = cdp_endpoint or os.environ.get(CDP_ENDPOINT_ENV)
+        self.context_options = context_options
+        self.browser = None
+        self.recycled = 0
+        self._playwright = None
+        self._pool: List[_PooledContext] = []
+        self._leases: Dict[int, _PooledContext] = {}
+
+    def _pick(self) -> Optional[_PooledContext]:
+        """Contexto activo con menos páginas abiertas."""
+        active = [c for c in self._pool if not c.retiring]
+        if len(active) < self.contexts:
+            return None
+        return min(active, key=lambda c: c.open)
+
+    def _lease(self, ctx: _PooledContext) -> None:
+        ctx.open += 1
+        ctx.navigations += 1
+        if ctx.navigations >= self.max_navigations:
+            ctx.retiring = True
+
+    def _over_memory(self, heap_bytes: float) -> bool:
+        return (self.max_memory_mb is not None
+                and heap_bytes > self.max_memory_mb * 1024 * 1024)
+
+    @property
+    def open_pages(self) -> int:
+        return sum(c.open for c in self._pool)
+
+
+class BrowserPool(_PoolState):
+    """
+    Pool asíncrono de contextos y páginas.
+
+    Uso:
+        async with BrowserPool(contexts=2, max_pages=8) as pool:
+            async with pool.page() as page:
+                await page.goto(url)
+    """
+
+    async def start(self) -> "BrowserPool":
+        """Lanzar el navegador y calentar los contextos."""
+        if self.browser is not None:
+            return self
+        from playwright.async_api import async_playwright
+
+        self._slots = asyncio.Semaphore(self.max_pages)
+        self._creating = asyncio.Lock()
+        self._playwright = await async_playwright().start()
+        launcher = getattr(self._playwright, self.browser_type)
+        if self.cdp_endpoint:
+            self.browser = await launcher.connect_over_cdp(self.cdp_endpoint)
+        else:
+            self.browser = await launcher.launch(headless=self.headless, **self.launch_options)
+        for _ in range(self.contexts):
+            self._pool.append(await self._new_context())
+        return self
+
+    async def _new_context(self) -> _PooledContext:
+        context = await self.browser.new_context(**self.context_options)
+        if self.on_context is not None:
+            result = self.on_context(context)
+            if inspect.isawaitable(result):
+                await result
+        return _PooledContext(context)
+
+    async def acquire(self):
+        """Prestar una página; espera si ya hay `max_pages` abiertas."""
+        await self._slots.acquire()
+        try:
+            ctx = self._pick()
+            if ctx is None:
+                # Un solo contexto nuevo a la vez: quien espera vuelve a elegir
+                # cuando el anterior ya cuenta en el pool
+                async with self._creating:
+                    ctx = self._pick()
+                    if ctx is None:
+                        ctx = await self._new_context()
+                        self._pool.append(ctx)
+            page = ctx.idle.pop() if ctx.idle else None
+            # Contabilizar el préstamo antes de esperar a new_page para que
+            # otras corrutinas vean la ocupación real del contexto
+            self._lease(ctx)
+            if page is None:
+                try:
+                    page = await ctx.context.new_page()
+                except BaseException:
+                    ctx.open -= 1
+                    raise
+            self._leases[id(page)] = ctx
+            return page
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, page) -> None:
+        """Devolver una página al pool."""
+        ctx = self._leases.pop(id(page))
+        ctx.open -= 1
+        try:
+            if not ctx.retiring and self.max_memory_mb is not None and not page.is_closed():
+                try:
+                    ctx.retiring = self._over_memory(await page.evaluate(MEMORY_PROBE))
+                except Exception:
+                    ctx.retiring = True
+
+            if ctx.retiring or page.is_closed():
+                if not page.is_closed():
+                    await page.close()
+            else:
+                ctx.idle.append(page)
+
+            if ctx.retiring and ctx.open == 0:
+                await self._recycle(ctx)
+        finally:
+            self._slots.release()
+
+    async def _recycle(self, ctx: _PooledContext) -> None:
+        self._pool.remove(ctx)
+        self.recycled += 1
+        await ctx.context.close()
+
+    @asynccontextmanager
+    async def page(self):
+        """Context manager que presta una página y la devuelve al salir."""
+        page = await self.acquire()
+        try:
+            yield page
+        finally:
+            await self.release(page)
+
+    async def close(self) -> None:
+        """Cerrar todos los contextos, el navegador y Playwright."""
+        for ctx in self._pool:
+            await ctx.context.close()
+        self._pool.clear()
+        if self.browser is not None:
+            await self.browser.close()
+            self.browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class SyncBrowserPool(_PoolState):
+    """
+    Versión síncrona del pool para scripts basados en `sync_playwright`.
+
+    Uso:
+        with SyncBrowserPool() as pool:
+            with pool.page() as page:
+                page.goto(url)
+    """
+
+    def start(self) -> "SyncBrowserPool":
+        """Lanzar el navegador y calentar los contextos."""
+        if self.browser is not None:
+            return self
+        from playwright.sync_api import sync_playwright
+
+        self._playwright = sync_playwright().start()
+        launcher = getattr(self._playwright, self.browser_type)
+        if self.cdp_endpoint:
+            self.browser = launcher.connect_over_cdp(self.cdp_endpoint)
+        else:
+            self.browser = launcher.launch(headless=self.headless, **self.launch_options)
+        for _ in range(self.contexts):
+            self._pool.append(self._new_context())
+        return self
+
+    def _new_context(self) -> _PooledContext:
+        context = self.browser.new_context(**self.context_options)
+        if self.on_context is not None:
+            self.on_context(context)
+        return _PooledContext(context)
+
+    def acquire(self):
+        """Prestar una página."""
+        if self.open_pages >= self.max_pages:
+            raise RuntimeError(f"Se ha alcanzado el máximo de páginas abiertas ({self.max_pages})")
+        ctx = self._pick()
+        if ctx is None:
+            ctx = self._new_context()
+            self._pool.append(ctx)
+        page = ctx.idle.pop() if ctx.idle else ctx.context.new_page()
+        self._lease(ctx)
+        self._leases[id(page)] = ctx
+        return page
+
+    def release(self, page) -> None:
+        """Devolver una página al pool."""
+        ctx = self._leases.pop(id(page))
+        ctx.open -= 1
+        if not ctx.retiring and self.max_memory_mb is not None and not page.is_closed():
+            try:
+                ctx.retiring = self._over_memory(page.evaluate(MEMORY_PROBE))
+            except Exception:
+                ctx.retiring = True
+
+        if ctx.retiring or page.is_closed():
+            if not page.is_closed():
+                page.close()
+        else:
+            ctx.idle.append(page)
+
+        if ctx.retiring and ctx.open == 0:
+            self._pool.remove(ctx)
+            self.recycled += 1
+            ctx.context.close()
+
+    @contextmanager
+    def page(self):
+        """Context manager que presta una página y la devuelve al salir."""
+        page = self.acquire()
+        try:
+            yield page
+        finally:
+            self.release(page)
+
+    def close(self) -> None:
+        """Cerrar todos los contextos, el navegador y Playwright."""
+        for ctx in self._pool:
+            ctx.context.close()
+        self._pool.clear()
+        if self.browser is not None:
+            self.browser.close()
+            self.browser = None
+        if self._playwright is not None:
+            self._playwright.stop()
+            self._playwright = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+async def wait_ready(page, selectors: Sequence[str], timeout: int = 30000) -> bool:
+    """
+    Esperar a que aparezca alguno de los selectores de los datos.
+
+    Sustituye a `networkidle` más una espera fija: la página se da por lista
+    en cuanto el contenido que interesa está en el DOM.
+
+    Returns:
+        True si ha aparecido algún selector (o no se han indicado), False
+        si se agota `timeout` (ms)
+    """
+    if not selectors:
+        return True
+    try:
+        with span("wait"):
+            await page.wait_for_selector(", ".join(selectors), state="attached", timeout=timeout)
+        return True
+    except Exception:
+        return False
+
+
+def wait_ready_sync(page, selectors: Sequence[str], timeout: int = 30000) -> bool:
+    """Versión de `wait_ready` para la API síncrona de Playwright."""
+    if not selectors:
+        return True
+    try:
+        with span("wait"):
+            page.wait_for_selector(", ".join(selectors), state="attached", timeout=timeout)
+        return True
+    except Exception:
+        return False
@@ -0,0 +1,469 @@
+"""
+Caché en disco de respuestas HTTP con revalidación condicional.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+from .utils import normalize_url
+
+
+DEFAULT_VARY = ("accept", "accept-language", "cookie")
+ACCESS_BATCH = 256
+
+_CHARSET_RE = re.compile(r"charset=[\"']?([\w.:-]+)", re.I)
+
+# Cabeceras que no describen el cuerpo almacenado (ya descomprimido)
+_UNSTORED_HEADERS = {
+    "content-encoding", "content-length", "transfer-encoding", "connection",
+    "keep-alive", "set-cookie", "date",
+}
+
+
+def persistent_dir() -> Path:
+    """Directorio persistente del sandbox (`/app/persistent` en el contenedor o `persistent_data` fuera de él)."""
+    persistent = Path("/app/persistent")
+    return persistent if persistent.is_dir() else Path("persistent_data")
+
+
+def default_cache_dir(name: str = "http") -> Path:
+    """
+    Directorio de caché por defecto.
+
+    `AUTO_SCRAPE_CACHE_DIR` si está definido; si no, dentro del directorio
+    persistente del sandbox.
+    """
+    base = os.environ.get("AUTO_SCRAPE_CACHE_DIR")
+    if base:
+        return Path(base) / name
+    return persistent_dir() / ".cache" / name
+
+
+def storable_headers(headers: Dict[str, str]) -> Dict[str, str]:
+    """Cabeceras de respuesta que se guardan junto al cuerpo."""
+    return {k: v for k, v in dict(headers).items() if k.lower() not in _UNSTORED_HEADERS}
+
+
+def header_charset(headers: Dict[str, str]) -> Optional[str]:
+    """Charset declarado en el `Content-Type` de una respuesta, si lo hay."""
+    for name, value in dict(headers).items():
+        if name.lower() == "content-type":
+            match = _CHARSET_RE.search(value)
+            return match.group(1) if match else None
+    return None
+
+
+@dataclass
+class CachedResponse:
+    """Respuesta almacenada en la caché."""
+
+    key: str
+    url: str
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    stored_at: float
+    fresh: bool
+    encoding: str = "utf-8"
+
+    @property
+    def text(self) -> str:
+        """Cuerpo decodificado con el charset con el que se guardó."""
+        try:
+            return self.body.decode(self.encoding, errors="replace")
+        except LookupError:
+            return self.body.decode("utf-8", errors="replace")
+
+    def validators(self) -> Dict[str, str]:
+        """Cabeceras para una petición condicional (If-None-Match / If-Modified-Since)."""
+        lower = {k.lower(): v for k, v in self.headers.items()}
+        conditional = {}
+        if "etag" in lower:
+            conditional["If-None-Match"] = lower["etag"]
+        if "last-modified" in lower:
+            conditional["If-Modified-Since"] = lower["last-modified"]
+        return conditional
+
+
+class ResponseCache:
+    """
+    Caché de respuestas direccionada por contenido.
+
+    Los cuerpos se guardan una sola vez en `bodies/<sha256>` aunque varias
+    URLs devuelvan lo mismo, y un índice SQLite asocia cada clave (URL
+    normalizada más las cabeceras de `vary`) a su cuerpo y sus validadores.
+    Una entrada es fresca durante `ttl` segundos; pasado ese tiempo se
+    revalida con ETag / Last-Modified. Las entradas con más de `max_age`
+    segundos o que superan `max_bytes` en total (las menos usadas primero)
+    se eliminan.
+
+    Los accesos no escriben en el índice en cada acierto: se acumulan y se
+    guardan por lotes de `ACCESS_BATCH` (y antes de expulsar entradas o al
+    cerrar), para que `get` no haga un commit síncrono en el event loop.
+    """
+
+    def __init__(self, path: Union[str, Path, None] = None, ttl: float = 3600,
+                 max_age: float = 7 * 86400, max_bytes: int = 1024 ** 3,
+                 vary: Iterable[str] = DEFAULT_VARY):
+        """
+        Args:
+            path: Directorio de la caché (por defecto `default_cache_dir()`)
+            ttl: Segundos durante los que una entrada se sirve sin revalidar
+            max_age: Segundos tras los que una entrada se elimina
+            max_bytes: Tamaño máximo de los cuerpos almacenados
+            vary: Cabeceras de la petición que forman parte de la clave
+        """
+        self.path = Path(path) if path is not None else default_cache_dir()
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.vary = tuple(h.lower() for h in vary)
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+        (self.path / "bodies").mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path / "index.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body_hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                encoding TEXT
+            )
+        """)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(entries)")}
+        if "encoding" not in columns:
+            # Índices creados antes de guardar el charset
+            self._db.execute("ALTER TABLE entries ADD COLUMN encoding TEXT")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_stored ON entries (stored_at)")
+        self._db.commit()
+        self._total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        self._last_sweep = 0.0
+        self._accessed: Dict[str, float] = {}
+
+    def key(self, url: str, headers: Optional[Dict[str, str]] = None) -> str:
+        """Clave de caché: URL normalizada más las cabeceras relevantes."""
+        lower = {k.lower(): v for k, v in (headers or {}).items()}
+        parts = [normalize_url(url) or url] + [f"{h}:{lower.get(h, '')}" for h in self.vary]
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def _body_path(self, body_hash: str) -> Path:
+        return self.path / "bodies" / body_hash[:2] / body_hash
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[CachedResponse]:
+        """
+        Buscar una respuesta en la caché.
+
+        Returns:
+            La respuesta (fresca o pendiente de revalidar) o None
+        """
+        key = self.key(url, headers)
+        row = self._db.execute(
+            "SELECT url, status, headers, body_hash, stored_at, encoding FROM entries WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        stored_url, status, raw_headers, body_hash, stored_at, encoding = row
+        try:
+            body = self._body_path(body_hash).read_bytes()
+        except FileNotFoundError:
+            self._delete(key)
+            self.misses += 1
+            return None
+
+        now = time.time()
+        self._accessed[key] = now
+        if len(self._accessed) >= ACCESS_BATCH:
+            self.flush()
+        fresh = now - stored_at < self.ttl
+        if fresh:
+            self.hits += 1
+        headers = json.loads(raw_headers)
+        return CachedResponse(key, stored_url, status, headers, body, stored_at, fresh,
+                              encoding or header_charset(headers) or "utf-8")
+
+    def flush(self) -> None:
+        """Guardar en el índice los accesos pendientes."""
+        if not self._accessed:
+            return
+        accessed, self._accessed = self._accessed, {}
+        self._db.executemany("UPDATE entries SET accessed_at = ? WHERE key = ?",
+                             [(at, key) for key, at in accessed.items()])
+        self._db.commit()
+
+    def store(self, url: str, status: int, headers: Dict[str, str], body: bytes,
+              request_headers: Optional[Dict[str, str]] = None,
+              encoding: Optional[str] = None) -> str:
+        """
+        Guardar una respuesta y devolver su clave.
+
+        Args:
+            url: URL pedida
+            status: Código de estado
+            headers: Cabeceras de la respuesta
+            body: Cuerpo (ya descomprimido)
+            request_headers: Cabeceras de la petición (para `vary`)
+            encoding: Charset del cuerpo (por defecto, el del `Content-Type`)
+        """
+        key = self.key(url, request_headers)
+        body_hash = hashlib.sha256(body).hexdigest()
+        body_path = self._body_path(body_hash)
+        if not body_path.exists():
+            body_path.parent.mkdir(exist_ok=True)
+            # Temporal propio: otros procesos pueden estar guardando el mismo cuerpo
+            fd, tmp_path = tempfile.mkstemp(prefix=".body-", dir=body_path.parent)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(body)
+                os.replace(tmp_path, body_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+        old = self._db.execute("SELECT body_hash, size FROM entries WHERE key = ?",
+                               (key,)).fetchone()
+        now = time.time()
+        self._db.execute(
+            "INSERT OR REPLACE INTO entries (key, url, status, headers, body_hash, size, "
+            "stored_at, accessed_at, encoding) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, url, status, json.dumps(storable_headers(headers)), body_hash, len(body),
+             now, now, encoding or header_charset(headers)),
+        )
+        self._accessed.pop(key, None)
+        self._db.commit()
+        self._total += len(body) - (old[1] if old is not None else 0)
+        if old is not None and old[0] != body_hash:
+            self._drop_body_if_unused(old[0])
+        if self._total > self.max_bytes or now - self._last_sweep > 60:
+            self.evict()
+        return key
+
+    def touch(self, key: str) -> None:
+        """Marcar como fresca una entrada revalidada con un 304."""
+        now = time.time()
+        self._db.execute("UPDATE entries SET stored_at = ?, accessed_at = ? WHERE key = ?",
+                         (now, now, key))
+        self._db.commit()
+        self.revalidated += 1
+
+    def _drop_body_if_unused(self, body_hash: str) -> None:
+        used = self._db.execute("SELECT 1 FROM entries WHERE body_hash = ? LIMIT 1",
+                                (body_hash,)).fetchone()
+        if used is None:
+            try:
+                self._body_path(body_hash).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _delete(self, key: str) -> None:
+        row = self._db.execute("SELECT body_hash, size FROM entries WHERE key = ?",
+                               (key,)).fetchone()
+        self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        self._db.commit()
+        if row is not None:
+            self._total -= row[1]
+            self._drop_body_if_unused(row[0])
+
+    def evict(self) -> int:
+        """
+        Eliminar entradas caducadas y, si se supera `max_bytes`, las menos usadas.
+
+        Returns:
+            Número de entradas eliminadas
+        """
+        removed = 0
+        self.flush()
+        self._last_sweep = time.time()
+        cutoff = self._last_sweep - self.max_age
+        for (key,) in self._db.execute("SELECT key FROM entries WHERE stored_at < ?",
+                                       (cutoff,)).fetchall():
+            self._delete(key)
+            removed += 1
+
+        # Tamaño aproximado: los cuerpos compartidos se cuentan una vez por entrada
+        if self._total > self.max_bytes:
+            for (key,) in self._db.execute(
+                    "SELECT key FROM entries ORDER BY accessed_at").fetchall():
+                if self._total <= self.max_bytes:
+                    break
+                self._delete(key)
+                removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de uso y tamaño de la caché."""
+        entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {"entries": entries, "bytes": self._total, "hits": self.hits,
+                "misses": self.misses, "revalidated": self.revalidated}
+
+    def close(self) -> None:
+        self.flush()
+        self._db.close()
+
+
+async def route_with_cache(target, cache: ResponseCache) -> None:
+    """
+    Servir los documentos de una página o un contexto de Playwright (API
+    asíncrona) desde la caché, revalidando con peticiones condicionales.
+    """
+    async def handle(route):
+        request = route.request
+        if request.method != "GET" or request.resource_type != "document":
+            await route.fallback()
+            return
+        headers = request.headers
+        cached = cache.get(request.url, headers)
+        if cached is not None and cached.fresh:
+            await route.fulfill(status=cached.status, headers=cached.headers, body=cached.body)
+            return
+
+        conditional = dict(headers, **cached.validators()) if cached is not None else headers
+        response = await route.fetch(headers=conditional)
+        if response.status == 304 and cached is not None:
+            cache.touch(cached.key)
+            await route.fulfill(status=cached.status, headers=cached.headers, body=cached.body)
+            return
+        body = await response.body()
+        if response.status == 200:
+            cache.store(request.url, response.status, response.headers, body, headers)
+        await route.fulfill(response=response, body=body)
+
+    await target.route("**/*", handle)
+
+
+def route_with_cache_sync(target, cache: ResponseCache) -> None:
+    """Versión de `route_with_cache` para la API síncrona de Playwright."""
+    def handle(route):
+        request = route.request
+        if request.method != "GET" or request.resource_type != "document":
+            route.fallback()
+            return
+        headers = request.headers
+        cached = cache.get(request.url, headers)
+        if cached is not None and cached.fresh:
+            route.fulfill(status=cached.status, headers=cached.headers, body=cached.body)
+            return
+
+        conditional = dict(headers, **cached.validators()) if cached is not None else headers
+        response = route.fetch(headers=conditional)
+        if response.status == 304 and cached is not None:
+            cache.touch(cached.key)
+            route.fulfill(status=cached.status, headers=cached.headers, body=cached.body)
+            return
+        body = response.body()
+        if response.status == 200:
+            cache.store(request.url, response.status, response.headers, body, headers)
+        route.fulfill(response=response, body=body)
+
+    target.route("**/*", handle)
+
+
+class CompletionCache:
+    """
+    Caché persistente de respuestas del modelo de lenguaje.
+
+    La clave es un hash del modelo, la temperatura, el mensaje de sistema,
+    el prompt y el resto de parámetros de la petición. Se guardan como
+    máximo `max_entries` respuestas, eliminando las menos usadas; como en
+    `ResponseCache`, los accesos se guardan por lotes.
+    """
+
+    def __init__(self, path: Union[str, Path, None] = None, max_entries: int = 10000):
+        """
+        Args:
+            path: Directorio de la caché (por defecto `default_cache_dir("llm")`)
+            max_entries: Número máximo de respuestas almacenadas
+        """
+        self.path = Path(path) if path is not None else default_cache_dir("llm")
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._accessed: Dict[str, float] = {}
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path / "completions.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                content TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS completions_accessed ON completions (accessed_at)")
+        self._db.commit()
+
+    @staticmethod
+    def key(**params) -> str:
+        """Hash estable de los parámetros de la petición."""
+        raw = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Devolver la respuesta almacenada o None."""
+        row = self._db.execute("SELECT content FROM completions WHERE key = ?",
+                               (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._accessed[key] = time.time()
+        if len(self._accessed) >= ACCESS_BATCH:
+            self.flush()
+        return row[0]
+
+    def flush(self) -> None:
+        """Guardar en el índice los accesos pendientes."""
+        if not self._accessed:
+            return
+        accessed, self._accessed = self._accessed, {}
+        self._db.executemany("UPDATE completions SET accessed_at = ? WHERE key = ?",
+                             [(at, key) for key, at in accessed.items()])
+        self._db.commit()
+
+    def set(self, key: str, content: str, model: str = "") -> None:
+        """Guardar una respuesta y aplicar el límite de entradas."""
+        # Los accesos pendientes deciden qué entradas son las menos usadas
+        self.flush()
+        now = time.time()
+        self._db.execute(
+            "INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?, ?)",
+            (key, model, content, now, now),
+        )
+        self._db.execute("""
+            DELETE FROM completions WHERE key IN (
+                SELECT key FROM completions ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+        self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de aciertos, fallos y entradas."""
+        entries = self._db.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        return {"entries": entries, "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        self.flush()
+        self._db.close()
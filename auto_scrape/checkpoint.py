@@ -0,0 +1,232 @@
+"""
+Puntos de control de un crawl para poder reanudarlo tras una caída.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from .cache import persistent_dir
+
+
+# Estados de una URL en el punto de control
+PENDING, DONE, FAILED = 0, 1, 2
+
+
+# Opciones de la configuración que cambian qué se recorre o qué se extrae
+CHECKPOINT_KEYS = ("start_urls", "allowed_domains", "max_depth", "max_pages", "fetch", "render",
+                   "snapshot", "selectors", "block", "description", "schema", "schema_drop_invalid")
+
+
+def _stable(value: Any) -> Any:
+    """Forma serializable y estable entre ejecuciones de un valor de la configuración."""
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    spec = getattr(value, "spec", None) or getattr(getattr(value, "__self__", None), "spec", None)
+    if spec is not None:
+        return spec  # Funciones de una ExtractionSpec
+    if callable(value):
+        return f"{getattr(value, '__module__', '')}.{getattr(value, '__qualname__', type(value).__qualname__)}"
+    return type(value).__qualname__
+
+
+def default_checkpoint_dir(config: Dict[str, Any], extraction: Any = None) -> Path:
+    """
+    Directorio por defecto de un crawl, derivado de su configuración.
+
+    La clave resume las URLs iniciales, las opciones de `CHECKPOINT_KEYS` y
+    la extracción (`parse`/`parse_html`, o su `ExtractionSpec`), de modo
+    que un crawl con otra profundidad, otros dominios u otra extracción no
+    reanuda el punto de control de otro.
+    """
+    relevant = {key: config.get(key) for key in CHECKPOINT_KEYS}
+    relevant["start_urls"] = sorted(relevant["start_urls"] or [])
+    relevant["extraction"] = extraction
+    key = json.dumps(relevant, sort_keys=True, default=_stable)
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+    return persistent_dir() / "checkpoints" / digest
+
+
+@dataclass
+class CrawlState:
+    """
+    Resumen de un crawl recuperado de un punto de control.
+
+    Las URLs no se cargan aquí (pueden ser millones): se recorren con
+    `CrawlCheckpoint.iter_seen` e `iter_pending`.
+    """
+
+    seen: int = 0
+    pending: int = 0
+    attempts: Dict[str, int] = field(default_factory=dict)
+    output_file: Optional[str] = None
+    output_offset: int = 0
+    records: int = 0
+
+    @property
+    def done(self) -> int:
+        return self.seen - self.pending
+
+
+class CrawlCheckpoint:
+    """
+    Punto de control incremental de un crawl en SQLite.
+
+    Guarda cada URL vista con su profundidad y su estado (pendiente, hecha
+    o fallida), los reintentos en curso y, para la salida, cuántos registros
+    y bytes se habían exportado. Los cambios se acumulan en memoria y
+    `commit` los escribe en una sola transacción, de modo que el coste de
+    cada punto de control es proporcional a lo que ha cambiado desde el
+    anterior y no al tamaño del crawl.
+
+    El desplazamiento de la salida se guarda en la misma transacción que
+    las páginas hechas: al reanudar, la salida se trunca a ese punto y las
+    páginas terminadas después se vuelven a procesar, así que ningún
+    registro se pierde ni se duplica.
+    """
+
+    def __init__(self, path: Union[str, Path], interval: float = 5.0):
+        """
+        Args:
+            path: Directorio del punto de control
+            interval: Segundos entre puntos de control durante el crawl
+        """
+        self.path = Path(path)
+        self.interval = interval
+        self._seen: List[Tuple[str, int]] = []
+        self._done: List[Tuple[int, str]] = []
+        self._attempts: List[Tuple[str, int]] = []
+        # Un solo hilo de escritura: los puntos de control se aplican en orden
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path / "state.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                depth INTEGER NOT NULL,
+                state INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._db.commit()
+
+    def _meta(self) -> Dict[str, str]:
+        return dict(self._db.execute("SELECT key, value FROM meta").fetchall())
+
+    def load(self) -> Optional[CrawlState]:
+        """
+        Recuperar el estado de un crawl interrumpido.
+
+        Returns:
+            El estado guardado, o None si no hay nada que reanudar (no hay
+            punto de control o el crawl anterior terminó)
+        """
+        meta = self._meta()
+        if not meta or meta.get("finished") == "1":
+            return None
+        state = CrawlState(
+            output_file=meta.get("output_file"),
+            output_offset=int(meta.get("output_offset", 0)),
+            records=int(meta.get("records", 0)),
+        )
+        state.seen = self._db.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+        state.pending = self._db.execute("SELECT COUNT(*) FROM urls WHERE state = ?",
+                                         (PENDING,)).fetchone()[0]
+        state.attempts = dict(self._db.execute(
+            "SELECT url, attempts FROM urls WHERE state = ? AND attempts > 0", (PENDING,)))
+        return state
+
+    def iter_seen(self) -> Iterator[str]:
+        """Recorrer todas las URLs vistas."""
+        for (url,) in self._db.execute("SELECT url FROM urls"):
+            yield url
+
+    def iter_pending(self) -> Iterator[Tuple[str, int]]:
+        """Recorrer las URLs pendientes con su profundidad."""
+        yield from self._db.execute("SELECT url, depth FROM urls WHERE state = ?", (PENDING,))
+
+    def reset(self, output_file: str) -> None:
+        """Empezar un crawl nuevo descartando el estado anterior."""
+        self._seen.clear()
+        self._done.clear()
+        self._attempts.clear()
+        self._db.execute("DELETE FROM urls")
+        self._db.execute("DELETE FROM meta")
+        self._db.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("output_file", output_file), ("output_offset", "0"), ("records", "0"),
+            ("started_at", json.dumps(time.time())),
+        ])
+        self._db.commit()
+
+    def seen(self, url: str, depth: int) -> None:
+        """Registrar una URL nueva en la frontera."""
+        self._seen.append((url, depth))
+
+    def attempt(self, url: str, attempts: int) -> None:
+        """Registrar un reintento pendiente de una URL."""
+        self._attempts.append((url, attempts))
+
+    def page_done(self, url: str, failed: bool = False) -> None:
+        """Registrar una URL terminada (con éxito o tras agotar los reintentos)."""
+        self._done.append((FAILED if failed else DONE, url))
+
+    def _take(self) -> Tuple[list, list, list]:
+        changes = self._seen, self._attempts, self._done
+        self._seen, self._attempts, self._done = [], [], []
+        return changes
+
+    def _write(self, changes: Tuple[list, list, list], meta: Dict[str, str]) -> None:
+        seen, attempts, done = changes
+        with self._db:
+            self._db.executemany("INSERT OR IGNORE INTO urls (url, depth) VALUES (?, ?)", seen)
+            self._db.executemany("UPDATE urls SET attempts = ? WHERE url = ?",
+                                 [(n, url) for url, n in attempts])
+            self._db.executemany("UPDATE urls SET state = ?, attempts = 0 WHERE url = ?", done)
+            self._db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", list(meta.items()))
+
+    @staticmethod
+    def _output_meta(writer, records: int) -> Dict[str, str]:
+        # Volcar antes de medir: el desplazamiento debe cubrir los registros escritos
+        writer.flush()
+        size = os.path.getsize(writer.output_file) if os.path.exists(writer.output_file) else 0
+        return {"output_offset": str(size), "records": str(records)}
+
+    def commit(self, writer, records: int, finished: bool = False) -> None:
+        """
+        Escribir los cambios pendientes y la posición de la salida.
+
+        Args:
+            writer: Escritor de la salida (JSON Lines) del crawl
+            records: Registros exportados en total
+            finished: Marcar el crawl como terminado
+        """
+        meta = self._output_meta(writer, records)
+        if finished:
+            meta["finished"] = "1"
+        self._executor.submit(self._write, self._take(), meta).result()
+
+    async def commit_async(self, writer, records: int) -> None:
+        """
+        Versión de `commit` que escribe en SQLite fuera del bucle de eventos.
+
+        Los cambios y la posición de la salida se toman de forma atómica
+        respecto a los workers antes de ceder el control.
+        """
+        changes = self._take()
+        meta = self._output_meta(writer, records)
+        await asyncio.wrap_future(self._executor.submit(self._write, changes, meta))
+
+    def close(self) -> None:
+        self._executor.shutdown()
+        self._db.close()
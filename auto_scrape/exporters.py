@@ -2,85 +2,1032 @@
 Exportadores para diferentes formatos de datos.
 """
 
+import os
 import json
 import csv
-from typing import List, Dict, Any, Protocol
+import time
+import tempfile
+from typing import List, Dict, Any, Protocol, Iterable, AsyncIterable, Optional
 from abc import ABC, abstractmethod
 
+from .metrics import METRICS, span
+from .output import COMPRESSIONS, OutputStream, ShardedWriter, open_input, resolve_output, split_output
+
 
 class Exporter(Protocol):
     """Protocolo para exportadores de datos."""
     
-    def export(self, data: List[Dict[str, Any]], output_file: str) -> str:
+    def export(self, data: Iterable[Dict[str, Any]], output_file: str) -> str:
         """Exportar datos a un archivo."""
         ...
 
 
+class RecordWriter(Protocol):
+    """Protocolo para escritores incrementales de registros."""
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Añadir un registro a la salida."""
+        ...
+
+    def close(self) -> str:
+        """Cerrar la salida y devolver la ruta del archivo."""
+        ...
+
+    def abort(self) -> None:
+        """Descartar la salida tras un error, sin darla por terminada."""
+        ...
+
+
+def _discard(*paths: str) -> None:
+    """Eliminar la salida parcial de una exportación fallida."""
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
 class BaseExporter(ABC):
     """Clase base para exportadores."""
     
     @abstractmethod
-    def export(self, data: List[Dict[str, Any]], output_file: str) -> str:
+    def export(self, data: Iterable[Dict[str, Any]], output_file: str) -> str:
         """Exportar datos a un archivo."""
         pass
 
+    def open(self, output_file: str) -> RecordWriter:
+        """
+        Abrir un escritor incremental sobre el archivo de salida.
+
+        Los exportadores que no escriben en streaming acumulan los registros
+        y llaman a `export` al cerrar; los que sí lo hacen sobrescriben
+        este método.
+        """
+        return _BufferedWriter(self, output_file)
+
+    async def export_async(self, data: AsyncIterable[Dict[str, Any]],
+                           output_file: str) -> str:
+        """
+        Exportar registros a medida que los produce un iterador asíncrono.
+
+        Args:
+            data: Iterador asíncrono de registros
+            output_file: Archivo de salida
+
+        Returns:
+            Ruta del archivo generado
+        """
+        writer = self.open(output_file)
+        try:
+            async for record in data:
+                writer.write(record)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.close()
+
+
+class _BufferedWriter:
+    """Escritor por defecto: acumula en memoria y exporta al cerrar."""
+
+    def __init__(self, exporter: BaseExporter, output_file: str):
+        self.exporter = exporter
+        self.output_file = output_file
+        self.records: List[Dict[str, Any]] = []
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self.records.append(record)
+
+    def close(self) -> str:
+        return self.exporter.export(self.records, self.output_file)
+
+    def abort(self) -> None:
+        self.records = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
 
 class JSONExporter(BaseExporter):
-    """Exportador para formato JSON."""
-    
-    def export(self, data: List[Dict[str, Any]], output_file: str) -> str:
+    """
+    Exportador para formato JSON.
+
+    Escribe los registros a medida que llegan, sin materializar la lista
+    completa, como array JSON (por defecto) o como JSON Lines. Con
+    `compression` la salida se comprime en un hilo aparte, y con
+    `max_records`/`max_bytes` se reparte en fragmentos numerados con un
+    manifiesto (ver `auto_scrape.output`).
+    """
+
+    def __init__(self, lines: bool = False, indent: Optional[int] = 2,
+                 flush_every: int = 1000, flush_interval: Optional[float] = None,
+                 append: bool = False, compression: Optional[str] = None,
+                 compression_level: Optional[int] = None,
+                 max_records: Optional[int] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            lines: Escribir JSON Lines (un registro por línea) en vez de un array
+            indent: Sangría del array JSON (ignorada en modo JSON Lines)
+            flush_every: Registros acumulados antes de volcar al disco
+            flush_interval: Segundos máximos entre volcados (None = sin límite)
+            append: Añadir a un archivo JSON Lines existente (requiere `lines`)
+            compression: 'gzip' o 'zstd' (por defecto, según la extensión
+                de la salida: `.gz`, `.zst`)
+            compression_level: Nivel de compresión
+            max_records: Registros por fragmento de salida
+            max_bytes: Tamaño aproximado (sin comprimir) por fragmento
+        """
+        if append and not lines:
+            raise ValueError("El modo append solo está soportado con lines=True")
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(f"Compresión no soportada: {compression}")
+        if append and (compression or max_records or max_bytes):
+            raise ValueError("El modo append no está soportado con compresión ni fragmentos")
+        self.lines = lines
+        self.indent = indent
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        self.append = append
+        self.compression = compression
+        self.compression_level = compression_level
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+
+    @property
+    def sharded(self) -> bool:
+        return bool(self.max_records or self.max_bytes)
+
+    def open(self, output_file: str) -> RecordWriter:
+        """Abrir un escritor incremental JSON / JSON Lines (o de fragmentos)."""
+        if self.sharded:
+            output_file, compression = resolve_output(output_file, self.compression)
+            return ShardedWriter(self._open_file, output_file, self.max_records, self.max_bytes,
+                                 info={'format': 'jsonl' if self.lines else 'json',
+                                       'compression': compression})
+        return self._open_file(output_file)
+
+    def _open_file(self, output_file: str) -> "JSONStreamWriter":
+        return JSONStreamWriter(
+            output_file,
+            lines=self.lines,
+            indent=self.indent,
+            flush_every=self.flush_every,
+            flush_interval=self.flush_interval,
+            append=self.append,
+            compression=self.compression,
+            compression_level=self.compression_level,
+        )
+
+    def export(self, data: Iterable[Dict[str, Any]], output_file: str) -> str:
         """
         Exportar datos a formato JSON.
         
         Args:
-            data: Datos a exportar
+            data: Datos a exportar (lista o cualquier iterable de registros)
             output_file: Archivo de salida
             
         Returns:
-            Ruta del archivo generado
+            Ruta del archivo generado (o del manifiesto si se fragmenta)
         """
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        with span("export", exporter=type(self).__name__), self.open(output_file) as writer:
+            for record in data:
+                writer.write(record)
         
-        return output_file
+        return writer.close()
+
+
+class JSONStreamWriter:
+    """
+    Escritor incremental de JSON / JSON Lines.
+
+    Los registros se serializan al llegar y se vuelcan en bloques cada
+    `flush_every` registros o `flush_interval` segundos, así que la memoria
+    usada no depende del tamaño total de la salida. En modo append cada
+    bloque se escribe con una sola llamada bajo `O_APPEND` y, si está
+    disponible, con un `flock` exclusivo, de modo que los lectores de la
+    salida nunca ven registros a medias. `size` cuenta los caracteres
+    escritos, sin comprimir.
+    """
+
+    def __init__(self, output_file: str, lines: bool = False,
+                 indent: Optional[int] = 2, flush_every: int = 1000,
+                 flush_interval: Optional[float] = None, append: bool = False,
+                 compression: Optional[str] = None, compression_level: Optional[int] = None):
+        self.output_file, self.compression = resolve_output(output_file, compression)
+        if append and self.compression:
+            raise ValueError("El modo append no está soportado con compresión")
+        self.lines = lines
+        self.indent = None if lines else indent
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        self.append = append
+        self.count = 0
+        self.size = 0
+        self._buffer: List[str] = []
+        self._last_flush = time.monotonic()
+        self._closed = False
+
+        if append:
+            self._repair_tail(self.output_file)
+        self._file = OutputStream(self.output_file, self.compression, compression_level, append=append)
+        if not append and not lines:
+            self._file.write('[')
+
+    @staticmethod
+    def _repair_tail(path: str) -> None:
+        """Eliminar una última línea incompleta (p. ej. tras una caída)."""
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return
+            # Retroceder hasta el último salto de línea completo
+            pos = size
+            while pos > 0:
+                step = min(65536, pos)
+                pos -= step
+                f.seek(pos)
+                chunk = f.read(step)
+                idx = chunk.rfind(b'\n')
+                if idx != -1:
+                    f.truncate(pos + idx + 1)
+                    return
+            f.truncate(0)
+
+    def _serialize(self, record: Dict[str, Any]) -> str:
+        if self.lines:
+            return json.dumps(record, ensure_ascii=False) + '\n'
+
+        text = json.dumps(record, indent=self.indent, ensure_ascii=False)
+        sep = ',' if self.count else ''
+        if self.indent is None:
+            return sep + text
+        pad = ' ' * self.indent
+        return sep + '\n' + pad + text.replace('\n', '\n' + pad)
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Añadir un registro a la salida."""
+        text = self._serialize(record)
+        self._buffer.append(text)
+        self.size += len(text)
+        self.count += 1
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+        elif (self.flush_interval is not None
+              and time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self) -> None:
+        """Volcar al disco los registros pendientes."""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        chunk = ''.join(self._buffer)
+        METRICS.inc("export_records_total", len(self._buffer), format='jsonl' if self.lines else 'json')
+        self._buffer.clear()
+        if self.append:
+            _locked_write(self._file, chunk)
+        else:
+            self._file.write(chunk)
+            self._file.flush()
+
+    def close(self) -> str:
+        """Cerrar la salida y devolver la ruta del archivo."""
+        if self._closed:
+            return self.output_file
+        self.flush()
+        if not self.lines:
+            self._file.write('\n]' if self.count and self.indent is not None else ']')
+        self._file.close()
+        self._closed = True
+        return self.output_file
+
+    def abort(self) -> None:
+        """
+        Cerrar tras un error sin escribir el `]` final ni dar la salida por
+        buena: se elimina el archivo, salvo en modo append, donde se
+        conservan los registros completos ya escritos.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self.append:
+            self.flush()
+            self._file.close()
+            return
+        self._buffer.clear()
+        try:
+            self._file.close()
+        finally:
+            _discard(self.output_file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+def _locked_write(f, chunk: str) -> None:
+    """Escribir un bloque completo bajo un bloqueo exclusivo del archivo."""
+    try:
+        import fcntl
+    except ImportError:  # pragma: no cover - Windows
+        fcntl = None
+
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    try:
+        f.write(chunk)
+        f.flush()
+    finally:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class FieldSchema:
+    """Tipos observados para un campo, con su estructura anidada."""
+
+    def __init__(self):
+        self.types: set = set()
+        self.children: Optional["RecordSchema"] = None
+        self.items: Optional["FieldSchema"] = None
+
+    def observe(self, value: Any) -> bool:
+        """Registrar un valor; devuelve True si la estructura ha crecido."""
+        kind = _type_name(value)
+        grown = kind not in self.types
+        self.types.add(kind)
+
+        if kind == 'dict':
+            if self.children is None:
+                self.children = RecordSchema()
+            grown = self.children.observe(value) or grown
+        elif kind == 'list':
+            if self.items is None:
+                self.items = FieldSchema()
+            for item in value:
+                grown = self.items.observe(item) or grown
+        return grown
+
+    def is_child_table(self) -> bool:
+        """Indica si el campo es siempre una lista de objetos."""
+        # Con al menos un objeto: una lista siempre vacía se queda en su columna
+        return (self.types == {'list'} and self.items is not None
+                and bool(self.items.types) and self.items.types <= {'dict'})
+
+
+class RecordSchema:
+    """
+    Estructura de campos descubierta a partir de registros.
+
+    Es la misma estructura que usan el exportador CSV (para derivar las
+    columnas aplanadas) y los exportadores columnares (para derivar tipos).
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, FieldSchema] = {}
+
+    def observe(self, record: Dict[str, Any]) -> bool:
+        """Registrar un registro; devuelve True si aparecen campos o tipos nuevos."""
+        grown = False
+        for key, value in record.items():
+            field = self.fields.get(key)
+            if field is None:
+                field = self.fields[key] = FieldSchema()
+                grown = True
+            grown = field.observe(value) or grown
+        return grown
+
+    def columns(self, sep: str = '.', lists: str = 'json') -> List[str]:
+        """
+        Columnas planas que produce `flatten_record` para esta estructura.
+
+        Args:
+            sep: Separador de las columnas anidadas
+            lists: 'json' o 'child' (las listas de objetos van a tablas hijas)
+        """
+        columns: List[str] = []
+        for key, field in self.fields.items():
+            if lists == 'child' and field.is_child_table():
+                continue
+            if field.types - {'dict'}:
+                columns.append(key)
+            if field.children is not None:
+                columns.extend(
+                    key + sep + sub for sub in field.children.columns(sep, lists)
+                )
+        return columns
+
+    def child_tables(self, sep: str = '.') -> Dict[str, "RecordSchema"]:
+        """Tablas hijas (listas de objetos) por ruta aplanada."""
+        tables: Dict[str, RecordSchema] = {}
+        for key, field in self.fields.items():
+            if field.is_child_table():
+                tables[key] = (field.items.children if field.items is not None
+                               and field.items.children is not None
+                               else RecordSchema())
+            elif field.children is not None:
+                for sub, table in field.children.child_tables(sep).items():
+                    tables[key + sep + sub] = table
+        return tables
+
+
+def _type_name(value: Any) -> str:
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, int):
+        return 'int'
+    if isinstance(value, float):
+        return 'float'
+    if isinstance(value, dict):
+        return 'dict'
+    if isinstance(value, (list, tuple)):
+        return 'list'
+    return 'str'
+
+
+def flatten_record(record: Dict[str, Any], sep: str = '.', lists: str = 'json',
+                   children: Optional[Dict[str, list]] = None,
+                   prefix: str = '') -> Dict[str, Any]:
+    """
+    Aplanar un registro anidado en columnas con nombres punteados.
+
+    Args:
+        record: Registro a aplanar
+        sep: Separador de las columnas anidadas
+        lists: 'json' serializa las listas como JSON en la celda; 'child'
+            separa las listas de objetos en `children` (tablas hijas)
+        children: Diccionario donde recoger las listas de objetos
+        prefix: Prefijo de las columnas (uso interno)
+
+    Returns:
+        Diccionario columna -> valor escalar
+    """
+    row: Dict[str, Any] = {}
+    for key, value in record.items():
+        column = prefix + str(key)
+        if isinstance(value, dict):
+            row.update(flatten_record(value, sep, lists, children, column + sep))
+        elif isinstance(value, (list, tuple)):
+            if (lists == 'child' and children is not None and value
+                    and all(isinstance(item, dict) for item in value)):
+                children[column] = value
+            else:
+                row[column] = json.dumps(value, ensure_ascii=False)
+        else:
+            row[column] = value
+    return row
 
 
 class CSVExporter(BaseExporter):
-    """Exportador para formato CSV."""
-    
-    def export(self, data: List[Dict[str, Any]], output_file: str) -> str:
+    """
+    Exportador para formato CSV.
+
+    Escribe en una sola pasada y con memoria acotada: las columnas se
+    declaran o se descubren a partir de una muestra de `sample_size`
+    registros, los objetos anidados se aplanan en columnas punteadas
+    (`meta.author`) y las listas se guardan como JSON o en tablas hijas.
+    Como `JSONExporter`, admite `compression` y fragmentos por
+    `max_records`/`max_bytes`; cada fragmento lleva su propia cabecera y
+    sus propias tablas hijas.
+    """
+
+    def __init__(self, fieldnames: Optional[List[str]] = None,
+                 sample_size: int = 1000, sep: str = '.', lists: str = 'json',
+                 compression: Optional[str] = None, compression_level: Optional[int] = None,
+                 max_records: Optional[int] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            fieldnames: Columnas declaradas; si se indican no se descubren
+                columnas nuevas y los campos extra se ignoran
+            sample_size: Registros usados para descubrir las columnas
+            sep: Separador de las columnas anidadas
+            lists: 'json' (lista serializada en la celda) o 'child' (cada
+                lista de objetos va a `<salida>.<campo>.csv` con columnas
+                `_parent` y `_index`)
+            compression: 'gzip' o 'zstd' (por defecto, según la extensión)
+            compression_level: Nivel de compresión
+            max_records: Registros por fragmento de salida
+            max_bytes: Tamaño aproximado (sin comprimir) por fragmento
+        """
+        if lists not in ('json', 'child'):
+            raise ValueError(f"Modo de listas no soportado: {lists}")
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(f"Compresión no soportada: {compression}")
+        self.fieldnames = fieldnames
+        self.sample_size = max(1, sample_size)
+        self.sep = sep
+        self.lists = lists
+        self.compression = compression
+        self.compression_level = compression_level
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+
+    def open(self, output_file: str) -> RecordWriter:
+        """Abrir un escritor CSV incremental (o de fragmentos)."""
+        if self.max_records or self.max_bytes:
+            output_file, compression = resolve_output(output_file, self.compression)
+            return ShardedWriter(self._open_file, output_file, self.max_records, self.max_bytes,
+                                 info={'format': 'csv', 'compression': compression})
+        return self._open_file(output_file)
+
+    def _open_file(self, output_file: str) -> "CSVStreamWriter":
+        return CSVStreamWriter(
+            output_file,
+            fieldnames=self.fieldnames,
+            sample_size=self.sample_size,
+            sep=self.sep,
+            lists=self.lists,
+            compression=self.compression,
+            compression_level=self.compression_level,
+        )
+
+    def export(self, data: Iterable[Dict[str, Any]], output_file: str) -> str:
         """
         Exportar datos a formato CSV.
         
         Args:
-            data: Datos a exportar
+            data: Datos a exportar (lista o cualquier iterable de registros)
             output_file: Archivo de salida
             
         Returns:
-            Ruta del archivo generado
+            Ruta del archivo generado (o del manifiesto si se fragmenta)
         """
-        if not data:
-            # Crear archivo vacío si no hay datos
-            with open(output_file, 'w', encoding='utf-8') as f:
-                pass
-            return output_file
-        
-        # Obtener todas las claves únicas de todos los registros
-        all_keys = set()
-        for item in data:
-            if isinstance(item, dict):
-                all_keys.update(item.keys())
-        
-        fieldnames = sorted(list(all_keys))
-        
-        with open(output_file, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            
+        with span("export", exporter=type(self).__name__), self.open(output_file) as writer:
             for item in data:
                 if isinstance(item, dict):
-                    # Asegurar que todos los campos estén presentes
-                    row = {key: item.get(key, '') for key in fieldnames}
-                    writer.writerow(row)
+                    writer.write(item)
         
+        return writer.close()
+
+
+class CSVStreamWriter:
+    """
+    Escritor CSV incremental.
+
+    Los primeros `sample_size` registros se retienen para fijar la cabecera;
+    el resto se escribe según llega. Si más tarde aparecen columnas nuevas se
+    añaden al final y, al cerrar, el archivo se reescribe una vez a través de
+    un temporal en el mismo directorio para completar la cabecera y rellenar
+    las filas anteriores. La memoria usada no crece con el número de registros.
+    """
+
+    def __init__(self, output_file: str, fieldnames: Optional[List[str]] = None,
+                 sample_size: int = 1000, sep: str = '.', lists: str = 'json',
+                 compression: Optional[str] = None, compression_level: Optional[int] = None):
+        self.output_file, self.compression = resolve_output(output_file, compression)
+        self.compression_level = compression_level
+        self.sample_size = max(1, sample_size)
+        self.sep = sep
+        self.lists = lists
+        self.schema = RecordSchema()
+        self.fixed = fieldnames is not None
+        self.columns: List[str] = list(fieldnames) if fieldnames else []
+        self.count = 0
+        self._header_columns = 0
+        self._sample: List[Dict[str, Any]] = []
+        self._sample_size = 0
+        self._file = None
+        self._writer = None
+        self._children: Dict[str, CSVStreamWriter] = {}
+        self._closed = False
+
+    def _child_writer(self, path: str) -> "CSVStreamWriter":
+        writer = self._children.get(path)
+        if writer is None:
+            root, ext, compressed = split_output(self.output_file)
+            writer = CSVStreamWriter(
+                f"{root}.{path}{ext or '.csv'}{compressed}",
+                sample_size=self.sample_size,
+                sep=self.sep,
+                lists=self.lists,
+                compression=self.compression,
+                compression_level=self.compression_level,
+            )
+            self._children[path] = writer
+        return writer
+
+    @property
+    def child_files(self) -> List[str]:
+        """Archivos de las tablas hijas (incluidas las anidadas)."""
+        return [f for child in self._children.values()
+                for f in (child.output_file, *child.child_files)]
+
+    @property
+    def size(self) -> int:
+        """
+        Caracteres escritos al archivo principal, sin comprimir; mientras
+        se retiene la muestra, una estimación de lo que ocupará.
+        """
+        return self._file.size if self._file is not None else self._sample_size
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Añadir un registro a la salida."""
+        children: Dict[str, list] = {}
+        row = flatten_record(record, self.sep, self.lists, children)
+
+        if not self.fixed and self.schema.observe(record):
+            self._extend_columns()
+
+        for path, items in children.items():
+            child = self._child_writer(path)
+            for index, item in enumerate(items):
+                child.write({'_parent': self.count, '_index': index, **item})
+
+        self.count += 1
+        if self._writer is None:
+            self._sample.append(row)
+            # Valores más separadores y fin de línea
+            self._sample_size += sum(len(str(v)) + 1 for v in row.values()) + 1
+            if len(self._sample) >= self.sample_size:
+                self._start()
+        else:
+            self._writer.writerow(row)
+
+    def _extend_columns(self) -> None:
+        known = set(self.columns)
+        new = [c for c in self.schema.columns(self.sep, self.lists) if c not in known]
+        if not new:
+            return
+        self.columns.extend(sorted(new))
+        if self._writer is not None:
+            self._writer.fieldnames = self.columns
+
+    def _start(self) -> None:
+        if not self.fixed:
+            self.columns.sort()
+        self._file = OutputStream(self.output_file, self.compression, self.compression_level)
+        self._writer = csv.DictWriter(self._file, fieldnames=self.columns,
+                                      restval='', extrasaction='ignore')
+        self._writer.writeheader()
+        self._header_columns = len(self.columns)
+        self._writer.writerows(self._sample)
+        self._sample = []
+        self._sample_size = 0
+
+    def close(self) -> str:
+        """Cerrar la salida y devolver la ruta del archivo."""
+        if self._closed:
+            return self.output_file
+        self._closed = True
+        METRICS.inc("export_records_total", self.count, format='csv')
+
+        if self._writer is None:
+            if not self.count:
+                # Crear archivo vacío si no hay datos
+                OutputStream(self.output_file, self.compression, self.compression_level).close()
+            else:
+                self._start()
+        if self._file is not None:
+            self._file.close()
+
+        if len(self.columns) > self._header_columns and self.count:
+            self._rewrite_header()
+
+        for child in self._children.values():
+            child.close()
+        return self.output_file
+
+    def abort(self) -> None:
+        """Cerrar tras un error y eliminar la salida parcial y sus tablas hijas."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if self._file is not None:
+                self._file.close()
+        finally:
+            _discard(self.output_file)
+            for child in self._children.values():
+                child.abort()
+
+    def _rewrite_header(self) -> None:
+        """Reescribir la cabecera tras descubrir columnas tardías."""
+        width = len(self.columns)
+        directory = os.path.dirname(os.path.abspath(self.output_file))
+        fd, tmp_path = tempfile.mkstemp(prefix='.csv-', dir=directory)
+        os.close(fd)
+        try:
+            with open_input(self.output_file, self.compression) as src:
+                dst = OutputStream(tmp_path, self.compression, self.compression_level)
+                try:
+                    reader = csv.reader(src)
+                    writer = csv.writer(dst)
+                    next(reader, None)
+                    writer.writerow(self.columns)
+                    for row in reader:
+                        if len(row) < width:
+                            row.extend([''] * (width - len(row)))
+                        writer.writerow(row)
+                finally:
+                    dst.close()
+            os.replace(tmp_path, self.output_file)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+def _arrow_type(field: Optional[FieldSchema], pa):
+    """Tipo Arrow equivalente a los tipos observados de un campo."""
+    if field is None:
+        return pa.string()
+    kinds = field.types - {'null'}
+    if not kinds:
+        return pa.string()
+    if kinds == {'bool'}:
+        return pa.bool_()
+    if kinds == {'int'}:
+        return pa.int64()
+    if kinds <= {'int', 'float'}:
+        return pa.float64()
+    if kinds == {'dict'}:
+        if not field.children.fields:
+            # Parquet no admite structs sin campos: siempre `{}`, se guarda como nulo
+            return pa.null()
+        return pa.struct([
+            pa.field(name, _arrow_type(sub, pa))
+            for name, sub in field.children.fields.items()
+        ])
+    if kinds == {'list'}:
+        return pa.list_(_arrow_type(field.items, pa))
+    # Tipos mezclados: se guardan como texto (JSON para los no escalares)
+    return pa.string()
+
+
+def arrow_schema(schema: RecordSchema):
+    """Convertir un `RecordSchema` descubierto en un `pyarrow.Schema`."""
+    import pyarrow as pa
+
+    return pa.schema([
+        pa.field(name, _arrow_type(field, pa))
+        for name, field in schema.fields.items()
+    ])
+
+
+def _conform(value: Any, arrow_type, pa) -> Any:
+    """Adaptar un valor al tipo de columna (texto para campos mixtos)."""
+    if value is None or pa.types.is_null(arrow_type):
+        return None
+    if pa.types.is_string(arrow_type):
+        if isinstance(value, str):
+            return value
+        if isinstance(value, (dict, list, tuple)):
+            return json.dumps(value, ensure_ascii=False)
+        return str(value)
+    if pa.types.is_struct(arrow_type) and isinstance(value, dict):
+        return {
+            arrow_type.field(i).name: _conform(value.get(arrow_type.field(i).name),
+                                               arrow_type.field(i).type, pa)
+            for i in range(arrow_type.num_fields)
+        }
+    if pa.types.is_list(arrow_type) and isinstance(value, (list, tuple)):
+        return [_conform(item, arrow_type.value_type, pa) for item in value]
+    return value
+
+
+class ParquetExporter(BaseExporter):
+    """
+    Exportador columnar a Parquet.
+
+    Los registros se agrupan en row groups de `row_group_size` filas con
+    tipos inferidos (mediante `RecordSchema`, la misma estructura que usa el
+    exportador CSV). Los objetos anidados se guardan como structs y las
+    listas como columnas de lista, de modo que `results: [{...}]` queda
+    como `list<struct<name, position, time>>`. Si un grupo posterior trae
+    campos nuevos o tipos distintos, el esquema se amplía (int -> float,
+    tipos mezclados -> texto, columnas nulas que reciben valores) y los
+    grupos ya escritos se reescriben una vez con el nuevo esquema; para
+    evitarlo, declara `schema`.
+
+    Requiere `pyarrow`.
+    """
+
+    def __init__(self, row_group_size: int = 10000, compression: str = 'zstd',
+                 schema: Any = None):
+        """
+        Args:
+            row_group_size: Registros por row group (o por lote IPC)
+            compression: Códec de compresión ('zstd', 'snappy', 'gzip', None...)
+            schema: `pyarrow.Schema` declarado; si es None se infiere
+        """
+        self.row_group_size = max(1, row_group_size)
+        self.compression = compression
+        self.schema = schema
+
+    def open(self, output_file: str) -> "ColumnarStreamWriter":
+        """Abrir un escritor columnar incremental."""
+        return ColumnarStreamWriter(self, output_file)
+
+    def export(self, data: Iterable[Dict[str, Any]], output_file: str) -> str:
+        """
+        Exportar datos a formato Parquet.
+
+        Args:
+            data: Datos a exportar (lista o cualquier iterable de registros)
+            output_file: Archivo de salida
+
+        Returns:
+            Ruta del archivo generado
+        """
+        with span("export", exporter=type(self).__name__), self.open(output_file) as writer:
+            for item in data:
+                if isinstance(item, dict):
+                    writer.write(item)
+
         return output_file
+
+    def _open_sink(self, output_file: str, schema):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetWriter(output_file, schema, compression=self.compression)
+
+    def _read_rows(self, output_file: str) -> Iterable[List[Dict[str, Any]]]:
+        """Leer de nuevo los registros escritos, por lotes."""
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(output_file)
+        try:
+            for batch in parquet_file.iter_batches(batch_size=self.row_group_size):
+                yield batch.to_pylist()
+        finally:
+            parquet_file.close()
+
+
+class ArrowExporter(ParquetExporter):
+    """
+    Exportador columnar a Arrow IPC (formato de archivo / Feather v2).
+
+    Igual que `ParquetExporter` pero cada row group se escribe como un lote
+    IPC, que se puede mapear en memoria sin deserializar.
+    """
+
+    def __init__(self, row_group_size: int = 10000, compression: Optional[str] = 'zstd',
+                 schema: Any = None):
+        super().__init__(row_group_size, compression, schema)
+
+    def _open_sink(self, output_file: str, schema):
+        import pyarrow as pa
+
+        options = pa.ipc.IpcWriteOptions(compression=self.compression)
+        return pa.ipc.new_file(output_file, schema, options=options)
+
+    def _read_rows(self, output_file: str) -> Iterable[List[Dict[str, Any]]]:
+        import pyarrow as pa
+
+        with pa.OSFile(output_file, 'rb') as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i).to_pylist()
+
+
+class ColumnarStreamWriter:
+    """
+    Escritor incremental de row groups para `ParquetExporter`/`ArrowExporter`.
+
+    Sin esquema declarado, los tipos se infieren de todos los registros
+    vistos hasta el momento. Cuando un row group amplía el esquema, el
+    archivo se reescribe a través de un temporal en el mismo directorio
+    (leyendo un row group cada vez) y se sigue escribiendo en él.
+    """
+
+    def __init__(self, exporter: ParquetExporter, output_file: str):
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError(
+                "pyarrow es necesario para exportar a Parquet/Arrow: pip install pyarrow"
+            ) from e
+
+        self._pa = pa
+        self.exporter = exporter
+        self.output_file = output_file
+        self.schema = exporter.schema
+        self.count = 0
+        self._observed = RecordSchema() if exporter.schema is None else None
+        self._batch: List[Dict[str, Any]] = []
+        self._sink = None
+        self._sink_path = output_file
+        self._closed = False
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Añadir un registro a la salida."""
+        self._batch.append(record)
+        self.count += 1
+        if len(self._batch) >= self.exporter.row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Escribir los registros pendientes como un row group."""
+        if not self._batch:
+            return
+
+        if self._observed is not None:
+            grown = False
+            for record in self._batch:
+                grown = self._observed.observe(record) or grown
+            if self.schema is None or grown:
+                schema = arrow_schema(self._observed)
+                if self._sink is not None and not schema.equals(self.schema):
+                    self._widen(schema)
+                self.schema = schema
+        if self._sink is None:
+            self._sink = self.exporter._open_sink(self._sink_path, self.schema)
+
+        self._sink.write_table(self._table(self._batch, self.schema))
+        METRICS.inc("export_records_total", len(self._batch), format='arrow' if isinstance(self.exporter, ArrowExporter) else 'parquet')
+        self._batch = []
+
+    def _table(self, rows: List[Dict[str, Any]], schema):
+        pa = self._pa
+        columns = {
+            field.name: [_conform(row.get(field.name), field.type, pa) for row in rows]
+            for field in schema
+        }
+        return pa.Table.from_pydict(columns, schema=schema)
+
+    def _widen(self, schema) -> None:
+        """Reescribir los row groups ya escritos con el esquema ampliado."""
+        self._sink.close()
+        self._sink = None
+        directory = os.path.dirname(os.path.abspath(self.output_file))
+        fd, tmp_path = tempfile.mkstemp(prefix='.columnar-', dir=directory)
+        os.close(fd)
+        try:
+            sink = self.exporter._open_sink(tmp_path, schema)
+            try:
+                for rows in self.exporter._read_rows(self._sink_path):
+                    sink.write_table(self._table(rows, schema))
+            except BaseException:
+                sink.close()
+                raise
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        if self._sink_path != self.output_file:
+            os.remove(self._sink_path)
+        # El archivo definitivo se sustituye al cerrar
+        self._sink, self._sink_path = sink, tmp_path
+        METRICS.inc("export_schema_rewrites_total")
+
+    def close(self) -> str:
+        """Cerrar la salida y devolver la ruta del archivo."""
+        if self._closed:
+            return self.output_file
+        self._closed = True
+        self.flush()
+        if self._sink is None:
+            # Sin registros: archivo válido con el esquema declarado (o vacío)
+            schema = self.schema if self.schema is not None else self._pa.schema([])
+            self._sink = self.exporter._open_sink(self._sink_path, schema)
+        self._sink.close()
+        if self._sink_path != self.output_file:
+            os.replace(self._sink_path, self.output_file)
+        return self.output_file
+
+    def abort(self) -> None:
+        """Cerrar tras un error y eliminar la salida parcial."""
+        if self._closed:
+            return
+        self._closed = True
+        self._batch = []
+        try:
+            if self._sink is not None:
+                self._sink.close()
+        finally:
+            _discard(self._sink_path, self.output_file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
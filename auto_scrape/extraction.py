@@ -0,0 +1,406 @@
+"""
+Extracción declarativa en una sola llamada al navegador.
+
+Una especificación describe los registros (selector de cada elemento),
+sus campos (selector relativo, texto o atributo, tipo) y las listas
+anidadas. Se compila a un único script que recorre el DOM dentro del
+navegador y devuelve todos los registros en un solo `page.evaluate`, en
+lugar de una llamada IPC por cada `query_selector`, `inner_text` o
+`get_attribute`.
+
+La misma especificación puede evaluarse sobre HTML ya descargado con lxml
+(`extract_html`, `parse_html`), por ejemplo en el pool de procesos del
+modo `snapshot` del crawler, con los mismos resultados que en el navegador.
+
+Ejemplo (el esquema `results` del README):
+    spec = ExtractionSpec({
+        "selector": ".competition",
+        "fields": {
+            "name": "h2",
+            "date": "time@datetime",
+            "url": "a.details@href",
+            "results": {
+                "selector": "tr.result",
+                "fields": {
+                    "name": ".athlete",
+                    "position": {"selector": ".pos", "type": "int"},
+                    "time": {"selector": ".time", "pattern": r"\\d+:\\d+:\\d+"},
+                },
+            },
+        },
+        "links": "a.next",
+    })
+    records = await spec.extract(page)
+"""
+
+import functools
+import json
+import re
+from html import escape
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import urljoin
+
+
+TEXT, HTML = "text", "html"
+# Atributos con URLs: se resuelven contra la URL base del documento
+URL_ATTRS = {"href", "src", "action", "poster", "data-src", "data-href"}
+TYPES = {"str", "int", "float", "bool"}
+
+_WS_RE = re.compile(r"\s+")
+_NUMBER_RE = re.compile(r"-?\d[\d.,\s]*")
+# Atajo "selector@atributo": solo si lo que sigue a la última @ es un nombre
+# de atributo, para no partir selectores como a[href^="mailto:x@y.com"]
+_ATTR_SHORTHAND_RE = re.compile(r"(.+)@([\w:-]+)")
+
+
+def normalize_text(value: Optional[str]) -> Optional[str]:
+    """Colapsar espacios y saltos de línea como los ve un lector."""
+    if value is None:
+        return None
+    return _WS_RE.sub(" ", value).strip()
+
+
+def parse_number(text: str) -> Optional[float]:
+    """
+    Primer número de un texto, con separadores de miles y decimales en
+    formato inglés (`1,234.5`) o español (`1.234,5`).
+    """
+    match = _NUMBER_RE.search(text)
+    if match is None:
+        return None
+    token = re.sub(r"\s", "", match.group(0)).rstrip(".,")
+    if "," in token and "." in token:
+        # El último separador es el decimal
+        decimal = "," if token.rfind(",") > token.rfind(".") else "."
+        thousands = "." if decimal == "," else ","
+        token = token.replace(thousands, "").replace(decimal, ".")
+    elif "," in token:
+        whole, _, fraction = token.rpartition(",")
+        if token.count(",") > 1 or (len(fraction) == 3 and whole.lstrip("-") not in ("", "0")):
+            token = token.replace(",", "")  # Miles: "1,234", "1,234,567"
+        else:
+            token = token.replace(",", ".")  # Decimal: "12,5"
+    elif token.count(".") > 1:
+        token = token.replace(".", "")
+    try:
+        return float(token)
+    except ValueError:
+        return None
+
+
+def coerce(value: Optional[str], type_: str) -> Any:
+    """Convertir un texto extraído al tipo declarado (None si no se puede)."""
+    if value is None or type_ == "str":
+        return value
+    if type_ == "bool":
+        return value.strip().lower() not in ("", "0", "false", "no", "off", "none", "null")
+    number = parse_number(value)
+    if number is None:
+        return None
+    return int(number) if type_ == "int" else number
+
+
+class Field:
+    """Campo normalizado de una especificación."""
+
+    __slots__ = ("name", "selector", "attr", "many", "fields", "type", "pattern", "default")
+
+    def __init__(self, name: str, spec: Union[str, Dict[str, Any]]):
+        if isinstance(spec, str):
+            spec = {"selector": spec}
+        elif not isinstance(spec, dict):
+            raise ValueError(f"Campo {name!r}: se esperaba un selector o un diccionario")
+        unknown = set(spec) - {"selector", "attr", "many", "fields", "type", "pattern", "default"}
+        if unknown:
+            raise ValueError(f"Campo {name!r}: claves desconocidas {sorted(unknown)}")
+
+        selector = spec.get("selector") or ""
+        attr = spec.get("attr")
+        shorthand = _ATTR_SHORTHAND_RE.fullmatch(selector) if attr is None else None
+        if shorthand is not None:
+            # Atajo "a.details@href"
+            selector, attr = shorthand.groups()
+        self.name = name
+        self.selector = selector.strip()
+        self.attr = attr or TEXT
+        nested = spec.get("fields")
+        self.fields: Optional[List[Field]] = (
+            [Field(k, v) for k, v in nested.items()] if nested is not None else None
+        )
+        # Los objetos anidados son listas salvo que se pida uno solo
+        self.many = bool(spec.get("many", self.fields is not None))
+        self.type = spec.get("type", "str")
+        if self.type not in TYPES:
+            raise ValueError(f"Campo {name!r}: tipo no soportado {self.type!r} ({', '.join(sorted(TYPES))})")
+        self.pattern = re.compile(spec["pattern"]) if spec.get("pattern") else None
+        self.default = spec.get("default")
+
+
+def _js(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+@functools.lru_cache(maxsize=256)
+def _css(selector: str):
+    """Selector CSS compilado a XPath (lxml + cssselect), cacheado por proceso."""
+    from lxml.cssselect import CSSSelector
+
+    return CSSSelector(selector, translator="html")
+
+
+def _inner_html(el) -> str:
+    from lxml import html as lxml_html
+
+    children = "".join(lxml_html.tostring(child, encoding="unicode", with_tail=True) for child in el)
+    return escape(el.text or "", quote=False) + children
+
+
+class _HTMLDocument:
+    """
+    Equivalente en lxml de los ayudantes del script de navegador: mismos
+    selectores (sin incluir el propio elemento, como `querySelectorAll`),
+    `textContent`, `innerHTML` y atributos en bruto.
+    """
+
+    def __init__(self, html: str, url: str):
+        from lxml import html as lxml_html
+
+        self.root = lxml_html.document_fromstring(html if html.strip() else "<html></html>")
+        base = self.root.find(".//base[@href]")
+        self.base = urljoin(url, base.get("href").strip()) if base is not None else url
+
+    def all(self, el, selector: str) -> list:
+        if not selector:
+            return [el]
+        # Desde el documento el propio <html> también puede coincidir
+        return [e for e in _css(selector)(el) if e is not el or el is self.root]
+
+    def one(self, el, selector: str):
+        if not selector:
+            return el
+        return next(iter(self.all(el, selector)), None)
+
+    @staticmethod
+    def value(el, attr: str) -> Optional[str]:
+        if el is None:
+            return None
+        if attr == TEXT:
+            return str(el.text_content())
+        if attr == HTML:
+            return _inner_html(el)
+        return el.get(attr)
+
+
+class ExtractionSpec:
+    """
+    Especificación de extracción compilada a un único script de navegador.
+
+    Claves de la especificación:
+        selector: Selector CSS de cada registro (sin él se extrae un único
+            registro del documento)
+        fields: Campos del registro; cada uno es un selector CSS relativo
+            al registro (`"h2"`, `"a@href"`) o un diccionario con
+            `selector`, `attr` ('text', 'html' o un atributo), `many`
+            (lista de valores), `fields` (lista de objetos anidados),
+            `type` ('str', 'int', 'float', 'bool'), `pattern` (expresión
+            regular; se usa el primer grupo) y `default`
+        links: Selector CSS de los enlaces a seguir (para `as_parse`)
+
+    El navegador solo devuelve los textos y atributos en bruto; la
+    normalización de espacios, la resolución de URLs relativas, los
+    patrones y los tipos se aplican en Python (`process`), igual para
+    cualquier otro motor que recorra el mismo HTML.
+    """
+
+    def __init__(self, spec: Union[Dict[str, Any], str]):
+        """
+        Args:
+            spec: Especificación como diccionario o como texto JSON
+        """
+        if isinstance(spec, str):
+            spec = json.loads(spec)
+        if "fields" not in spec:
+            raise ValueError("La especificación necesita 'fields'")
+        self.spec = spec
+        self.selector: str = (spec.get("selector") or "").strip()
+        self.fields = [Field(name, field) for name, field in spec["fields"].items()]
+        self.links: str = (spec.get("links") or "").strip()
+        self._script: Optional[str] = None
+
+    @classmethod
+    def from_file(cls, path: str) -> "ExtractionSpec":
+        """Cargar una especificación desde un archivo JSON."""
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    # -- Compilación ------------------------------------------------------
+
+    def _compile_fields(self, fields: List[Field], functions: List[str]) -> str:
+        """Generar la función JS que construye un registro y devolver su nombre."""
+        name = f"r{len(functions)}"
+        functions.append("")  # Reservar el nombre antes de compilar los anidados
+        entries = []
+        for field in fields:
+            if field.fields is not None:
+                nested = self._compile_fields(field.fields, functions)
+                expr = (f"all(el, {_js(field.selector)}).map({nested})" if field.many
+                        else f"(e => e ? {nested}(e) : null)(one(el, {_js(field.selector)}))")
+            else:
+                value = {TEXT: "text", HTML: "html"}.get(field.attr)
+                getter = value or f"(e => attr(e, {_js(field.attr)}))"
+                expr = (f"all(el, {_js(field.selector)}).map({getter})" if field.many
+                        else f"{getter}(one(el, {_js(field.selector)}))")
+            entries.append(f"{_js(field.name)}: {expr}")
+        functions[int(name[1:])] = f"const {name} = (el) => ({{{', '.join(entries)}}});"
+        return name
+
+    @property
+    def script(self) -> str:
+        """Script de `page.evaluate` que devuelve `{base, records, links}` en bruto."""
+        if self._script is None:
+            functions: List[str] = []
+            root = self._compile_fields(self.fields, functions)
+            records = (f"all(document, {_js(self.selector)}).map({root})" if self.selector
+                       else f"[{root}(document.documentElement)]")
+            links = (f"Array.from(document.querySelectorAll({_js(self.links)}), e => e.getAttribute('href'))"
+                     f".filter(Boolean)" if self.links else "[]")
+            self._script = "\n".join([
+                "() => {",
+                "const one = (el, s) => s ? el.querySelector(s) : el;",
+                "const all = (el, s) => s ? Array.from(el.querySelectorAll(s)) : [el];",
+                "const text = (e) => e ? e.textContent : null;",
+                "const html = (e) => e ? e.innerHTML : null;",
+                "const attr = (e, a) => e ? e.getAttribute(a) : null;",
+                *functions,
+                f"return {{base: document.baseURI, records: {records}, links: {links}}};",
+                "}",
+            ])
+        return self._script
+
+    # -- Evaluación sobre HTML ------------------------------------------------
+
+    def _raw_record(self, doc: _HTMLDocument, fields: List[Field], el) -> Dict[str, Any]:
+        raw: Dict[str, Any] = {}
+        for field in fields:
+            if field.fields is not None:
+                if field.many:
+                    raw[field.name] = [self._raw_record(doc, field.fields, e)
+                                       for e in doc.all(el, field.selector)]
+                else:
+                    match = doc.one(el, field.selector)
+                    raw[field.name] = self._raw_record(doc, field.fields, match) if match is not None else None
+            elif field.many:
+                raw[field.name] = [doc.value(e, field.attr) for e in doc.all(el, field.selector)]
+            else:
+                raw[field.name] = doc.value(doc.one(el, field.selector), field.attr)
+        return raw
+
+    def evaluate_html(self, html: str, url: str) -> Dict[str, Any]:
+        """
+        Resultado en bruto `{base, records, links}` calculado con lxml sobre
+        un HTML, igual que el de `script` en el navegador.
+
+        Requiere `lxml` y `cssselect`.
+        """
+        doc = _HTMLDocument(html, url)
+        elements = doc.all(doc.root, self.selector) if self.selector else [doc.root]
+        links = [e.get("href") for e in doc.all(doc.root, self.links)] if self.links else []
+        return {
+            "base": doc.base,
+            "records": [self._raw_record(doc, self.fields, el) for el in elements],
+            "links": [link for link in links if link],
+        }
+
+    # -- Post-proceso -----------------------------------------------------
+
+    def _value(self, field: Field, raw: Optional[str], base: str) -> Any:
+        if raw is None:
+            return field.default
+        if field.attr == TEXT:
+            raw = normalize_text(raw)
+        elif field.attr in URL_ATTRS:
+            raw = urljoin(base, raw.strip())
+        if field.pattern is not None:
+            match = field.pattern.search(raw)
+            if match is None:
+                return field.default
+            raw = match.group(1) if match.groups() else match.group(0)
+        value = coerce(raw, field.type)
+        return field.default if value is None else value
+
+    def _record(self, fields: List[Field], raw: Dict[str, Any], base: str) -> Dict[str, Any]:
+        record = {}
+        for field in fields:
+            value = raw.get(field.name)
+            if field.fields is not None:
+                if field.many:
+                    record[field.name] = [self._record(field.fields, item, base) for item in value or []]
+                else:
+                    record[field.name] = self._record(field.fields, value, base) if value else field.default
+            elif field.many:
+                values = (self._value(field, item, base) for item in value or [])
+                record[field.name] = [v for v in values if v is not None]
+            else:
+                record[field.name] = self._value(field, value, base)
+        return record
+
+    def process(self, raw: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Aplicar espacios, URLs, patrones y tipos al resultado en bruto.
+
+        Args:
+            raw: Diccionario `{base, records, links}` devuelto por `script`
+
+        Returns:
+            Registros y enlaces absolutos
+        """
+        base = raw.get("base") or ""
+        records = [self._record(self.fields, item, base) for item in raw.get("records") or []]
+        links = [urljoin(base, link.strip()) for link in raw.get("links") or []]
+        return records, links
+
+    # -- Ejecución --------------------------------------------------------
+
+    async def extract(self, page) -> List[Dict[str, Any]]:
+        """Extraer los registros de una página de Playwright con un solo `evaluate`."""
+        records, _ = self.process(await page.evaluate(self.script))
+        return records
+
+    def extract_sync(self, page) -> List[Dict[str, Any]]:
+        """Versión de `extract` para la API síncrona de Playwright."""
+        records, _ = self.process(page.evaluate(self.script))
+        return records
+
+    def extract_html(self, html: str, url: str) -> List[Dict[str, Any]]:
+        """Extraer los registros de un HTML ya descargado o renderizado."""
+        records, _ = self.process(self.evaluate_html(html, url))
+        return records
+
+    def parse_html(self, html: str, url: str):
+        """
+        Función `parse_html(html, url)` para `Crawler` (modos `fetch: 'auto'`
+        y `snapshot`): registros y enlaces como con `as_parse`.
+        """
+        from .scraper import PageResult
+
+        records, links = self.process(self.evaluate_html(html, url))
+        return PageResult(records, links)
+
+    def __reduce__(self):
+        # Para los pools de procesos basta con la especificación original
+        return type(self), (self.spec,)
+
+    def as_parse(self) -> Callable:
+        """
+        Función `parse(page, url)` para `Crawler`: registros y enlaces
+        (`links`) en la misma llamada al navegador.
+        """
+        from .scraper import PageResult
+
+        async def parse(page, url: str):
+            records, links = self.process(await page.evaluate(self.script))
+            return PageResult(records, links)
+
+        # Identifica la extracción, p. ej. en la clave del punto de control
+        parse.spec = self.spec
+        return parse
@@ -0,0 +1,386 @@
+"""
+Capa de descarga: HTTP primero y Playwright solo cuando hace falta JavaScript.
+"""
+
+import fnmatch
+import functools
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+from .browser import BrowserPool, wait_ready
+from .cache import CachedResponse, ResponseCache
+from .metrics import METRICS, span
+
+
+HTTP = "http"
+BROWSER = "browser"
+AUTO = "auto"
+
+_SCRIPT_RE = re.compile(r"<(script|style|noscript|template|svg)\b.*?</\1\s*>", re.I | re.S)
+_TAG_RE = re.compile(r"<[^>]+>")
+_WS_RE = re.compile(r"\s+")
+_SHELL_RE = re.compile(
+    r"<div[^>]+id=[\"'](root|app|__next|__nuxt|main-app)[\"'][^>]*>\s*</div>"
+    r"|enable javascript|you need to enable javascript|requires javascript",
+    re.I,
+)
+
+
+@dataclass
+class FetchResult:
+    """Respuesta descargada por HTTP o renderizada en el navegador."""
+
+    url: str
+    status: int
+    html: str
+    via: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+
+def visible_text_length(html: str) -> int:
+    """Longitud aproximada del texto visible de un documento HTML."""
+    text = _TAG_RE.sub(" ", _SCRIPT_RE.sub(" ", html))
+    return len(_WS_RE.sub(" ", text).strip())
+
+
+@functools.lru_cache(maxsize=None)
+def can_check_selectors() -> bool:
+    """Indicar si está BeautifulSoup para comprobar selectores (avisa una vez si no)."""
+    try:
+        import bs4  # noqa: F401
+    except ImportError:
+        print("⚠️  beautifulsoup4 no está instalado: no se pueden comprobar los selectores "
+              "en el HTML estático y esas páginas se renderizan (pip install beautifulsoup4)")
+        return False
+    return True
+
+
+def missing_selectors(html: str, selectors: Sequence[str]) -> List[str]:
+    """
+    Selectores CSS que no aparecen en el HTML estático.
+
+    Usa BeautifulSoup (con lxml si está disponible). Sin BeautifulSoup la
+    comprobación no es concluyente y se devuelven todos los selectores,
+    para que la página se renderice en vez de darse por buena.
+    """
+    if not selectors:
+        return []
+    if not can_check_selectors():
+        return list(selectors)
+    from bs4 import BeautifulSoup
+
+    try:
+        soup = BeautifulSoup(html, "lxml")
+    except Exception:
+        soup = BeautifulSoup(html, "html.parser")
+    return [s for s in selectors if soup.select_one(s) is None]
+
+
+def needs_javascript(html: str, selectors: Sequence[str] = (), min_text: int = 200) -> bool:
+    """
+    Heurística para decidir si una página necesita renderizarse.
+
+    Una página necesita JavaScript si faltan los selectores esperados o si
+    el cuerpo es casi solo un "app shell" (poco texto visible, contenedor
+    raíz vacío o aviso de activar JavaScript).
+    """
+    if missing_selectors(html, selectors):
+        return True
+    if visible_text_length(html) < min_text:
+        return True
+    return bool(_SHELL_RE.search(html)) and visible_text_length(html) < min_text * 5
+
+
+class RenderPolicy:
+    """
+    Decide y recuerda por host o patrón de URL si una página se descarga por
+    HTTP o se renderiza con Playwright.
+
+    Las reglas explícitas (`rules`) tienen prioridad: patrones `fnmatch`
+    contra el host o, si contienen '/', contra la URL completa, con valor
+    'http', 'browser' o 'auto'. Para el resto se aprende la decisión por host
+    y, si se indica `path`, se guarda en un archivo JSON entre ejecuciones.
+    """
+
+    def __init__(self, rules: Optional[Dict[str, str]] = None, path: Optional[str] = None):
+        self.rules = dict(rules or {})
+        self.path = path
+        self.learned: Dict[str, str] = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.learned = json.load(f)
+
+    @staticmethod
+    def key(url: str) -> str:
+        return urlsplit(url).netloc.lower()
+
+    def rule_for(self, url: str) -> Optional[str]:
+        """Modo de la primera regla explícita que coincide con la URL (o None)."""
+        host = self.key(url)
+        for pattern, mode in self.rules.items():
+            target = url if "/" in pattern else host
+            if fnmatch.fnmatch(target, pattern):
+                return mode
+        return None
+
+    def mode_for(self, url: str) -> str:
+        """Modo configurado o aprendido para una URL."""
+        mode = self.rule_for(url)
+        if mode is not None and mode != AUTO:
+            return mode
+        return self.learned.get(self.key(url), AUTO)
+
+    def learned_http(self, url: str) -> bool:
+        """Indicar si la URL va por HTTP solo porque así se aprendió para su host."""
+        return self.rule_for(url) in (None, AUTO) and self.learned.get(self.key(url)) == HTTP
+
+    def learn(self, url: str, mode: str) -> None:
+        """Recordar la decisión tomada para el host de la URL."""
+        host = self.key(url)
+        if self.learned.get(host) == mode:
+            return
+        self.learned[host] = mode
+        if self.path:
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.learned, f, indent=2)
+            os.replace(tmp, self.path)
+
+
+def _dns_trace(aiohttp):
+    """`TraceConfig` de aiohttp que registra el tiempo de resolución DNS (sin caché)."""
+    trace = aiohttp.TraceConfig()
+
+    async def on_start(session, context, params):
+        context.dns_started = time.perf_counter()
+
+    async def on_end(session, context, params):
+        METRICS.observe("dns_seconds", time.perf_counter() - context.dns_started)
+
+    async def on_cache_hit(session, context, params):
+        METRICS.inc("dns_cache_hits_total")
+
+    trace.on_dns_resolvehost_start.append(on_start)
+    trace.on_dns_resolvehost_end.append(on_end)
+    trace.on_dns_cache_hit.append(on_cache_hit)
+    return trace
+
+
+class Fetcher:
+    """
+    Descarga páginas con un cliente HTTP con keep-alive y recurre a un
+    `BrowserPool` solo si la política o la heurística lo piden.
+
+    Con una `ResponseCache`, las respuestas frescas se sirven desde disco y
+    las caducadas se revalidan con una petición condicional.
+
+    Requiere `aiohttp` para la ruta HTTP.
+    """
+
+    def __init__(self, pool: Optional[BrowserPool] = None,
+                 policy: Optional[RenderPolicy] = None,
+                 cache: Optional[ResponseCache] = None,
+                 concurrency: int = 64, per_host: int = 8, timeout: float = 30.0,
+                 headers: Optional[Dict[str, str]] = None, min_text: int = 200):
+        """
+        Args:
+            pool: Pool de navegadores para el fallback
+            policy: Política de renderizado (por defecto aprende en memoria)
+            cache: Caché de respuestas HTTP en disco
+            concurrency: Conexiones HTTP totales del pool
+            per_host: Conexiones HTTP por host
+            timeout: Tiempo máximo por petición (segundos)
+            headers: Cabeceras por defecto
+            min_text: Texto visible mínimo para dar por buena una página estática
+        """
+        self.pool = pool
+        self.policy = policy or RenderPolicy()
+        self.cache = cache
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.headers = headers or {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+        }
+        self.min_text = min_text
+        self.stats = {HTTP: 0, BROWSER: 0, "fallbacks": 0, "rechecks": 0, "cached": 0}
+        self._session = None
+
+    async def start(self) -> "Fetcher":
+        """Crear la sesión HTTP compartida."""
+        if self._session is None:
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(
+                limit=self.concurrency,
+                limit_per_host=self.per_host,
+                keepalive_timeout=30,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                trace_configs=[_dns_trace(aiohttp)],
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self
+
+    async def close(self) -> None:
+        """Cerrar la sesión HTTP."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def fetch_http(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        """Descargar una URL con el cliente HTTP (o desde la caché)."""
+        await self.start()
+        started = time.monotonic()
+        request_headers = dict(self.headers, **(headers or {}))
+
+        cached = self.cache.get(url, request_headers) if self.cache is not None else None
+        if cached is not None and cached.fresh:
+            self.stats["cached"] += 1
+            METRICS.inc("fetch_total", via="cache")
+            return self._from_cache(cached, started)
+
+        if cached is not None:
+            request_headers.update(cached.validators())
+        with span("fetch", via=HTTP):
+            async with self._session.get(url, headers=request_headers) as response:
+                if response.status == 304 and cached is not None:
+                    self.cache.touch(cached.key)
+                    self.stats["cached"] += 1
+                    METRICS.inc("fetch_total", via="revalidated")
+                    return self._from_cache(cached, started)
+
+                body = await response.read()
+                status = response.status
+                final_url = str(response.url)
+                response_headers = response.headers
+                try:
+                    encoding = response.get_encoding()
+                except Exception:
+                    encoding = "utf-8"
+        self.stats[HTTP] += 1
+        METRICS.inc("fetch_total", via=HTTP)
+        METRICS.inc("fetch_bytes_total", len(body), via=HTTP)
+        if self.cache is not None and status == 200:
+            self.cache.store(url, status, response_headers, body,
+                             dict(self.headers, **(headers or {})), encoding=encoding)
+        return FetchResult(
+            url=final_url,
+            status=status,
+            html=body.decode(encoding, errors="replace"),
+            via=HTTP,
+            headers=dict(response_headers),
+            elapsed=time.monotonic() - started,
+        )
+
+    @staticmethod
+    def _from_cache(cached: CachedResponse, started: float) -> FetchResult:
+        return FetchResult(
+            url=cached.url,
+            status=cached.status,
+            html=cached.text,
+            via="cache",
+            headers=cached.headers,
+            elapsed=time.monotonic() - started,
+        )
+
+    async def fetch_browser(self, url: str, selectors: Sequence[str] = (),
+                            timeout: Optional[int] = None) -> FetchResult:
+        """
+        Renderizar una URL con una página del pool.
+
+        Args:
+            url: URL a renderizar
+            selectors: Selectores CSS que se esperan en la página
+            timeout: Tiempo máximo en milisegundos (por defecto el `timeout`
+                del fetcher)
+        """
+        if self.pool is None:
+            raise RuntimeError("Se necesita un BrowserPool para renderizar páginas")
+        if timeout is None:
+            timeout = int(self.timeout * 1000)
+        started = time.monotonic()
+        async with self.pool.page() as page:
+            with span("navigate"):
+                response = await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+            await wait_ready(page, selectors, timeout)
+            html = await page.content()
+            self.stats[BROWSER] += 1
+            METRICS.inc("fetch_total", via=BROWSER)
+            return FetchResult(
+                url=page.url,
+                status=response.status if response is not None else 200,
+                html=html,
+                via=BROWSER,
+                headers=dict(response.headers) if response is not None else {},
+                elapsed=time.monotonic() - started,
+            )
+
+    async def fetch(self, url: str, selectors: Sequence[str] = ()) -> FetchResult:
+        """
+        Descargar una URL por HTTP y renderizarla solo si hace falta.
+
+        Args:
+            url: URL a descargar
+            selectors: Selectores CSS que se esperan en la página
+
+        Solo las respuestas 2xx en HTML sirven para decidir: los errores
+        (404, 5xx...) se devuelven tal cual, sin renderizar ni aprender nada
+        del host.
+
+        Returns:
+            Resultado con el HTML final y la vía usada ('http' o 'browser')
+        """
+        mode = self.policy.mode_for(url)
+        if mode == BROWSER:
+            return await self.fetch_browser(url, selectors)
+
+        result = await self.fetch_http(url)
+        if mode == HTTP:
+            return result
+
+        content_type = result.headers.get("Content-Type", "")
+        if not 200 <= result.status < 300 or (content_type and "html" not in content_type):
+            return result
+        if not needs_javascript(result.html, selectors, self.min_text):
+            self.policy.learn(url, HTTP)
+            return result
+
+        if self.pool is None:
+            return result
+        self.stats["fallbacks"] += 1
+        METRICS.inc("render_fallbacks_total")
+        rendered = await self.fetch_browser(url, selectors)
+        # Sin poder comprobar los selectores no hay nada que aprender del host
+        if 200 <= rendered.status < 300 and (not selectors or can_check_selectors()):
+            self.policy.learn(url, BROWSER)
+        return rendered
+
+    async def recheck(self, url: str, selectors: Sequence[str] = ()) -> Optional[FetchResult]:
+        """
+        Renderizar una página cuya versión HTTP no dio datos si el host va
+        por HTTP solo por una decisión aprendida (no por una regla).
+
+        Returns:
+            El resultado renderizado, o None si no procede comprobarlo
+        """
+        if self.pool is None or not self.policy.learned_http(url):
+            return None
+        self.stats["rechecks"] += 1
+        METRICS.inc("render_rechecks_total")
+        return await self.fetch_browser(url, selectors)
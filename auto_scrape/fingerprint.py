@@ -0,0 +1,280 @@
+"""
+Huellas de estructura DOM para reutilizar extractores entre páginas de la
+misma plantilla.
+"""
+
+import hashlib
+import re
+import time
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from .ai_assistant import AIAssistant
+from .cache import default_cache_dir
+
+
+SKIPPED_TAGS = {"script", "style", "noscript", "template", "svg", "iframe", "head"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+             "meta", "param", "source", "track", "wbr"}
+_VOLATILE_RE = re.compile(r"[0-9a-f]{6,}|\d+")
+
+
+class _Node:
+    __slots__ = ("label", "children")
+
+    def __init__(self, label: str):
+        self.label = label
+        self.children: List["_Node"] = []
+
+    def signature(self, depth: int, max_depth: int) -> str:
+        if depth >= max_depth or not self.children:
+            return self.label
+        # Conjunto ordenado de hermanos distintos: 3 productos o 300, o una
+        # tarjeta patrocinada en cualquier posición, dan la misma huella
+        parts = sorted({child.signature(depth + 1, max_depth) for child in self.children})
+        return f"{self.label}({','.join(parts)})"
+
+
+class _SkeletonParser(HTMLParser):
+    """Construye el esqueleto de etiquetas y clases, sin texto."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.root = _Node("#root")
+        self.stack = [self.root]
+        self.skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if self.skip:
+            if tag in SKIPPED_TAGS:
+                self.skip += 1
+            return
+        if tag in SKIPPED_TAGS:
+            self.skip = 1
+            return
+        classes = ""
+        for name, value in attrs:
+            if name == "class" and value:
+                # Quitar números y hashes (clases generadas por CSS-in-JS)
+                classes = ".".join(sorted({_VOLATILE_RE.sub("", c) for c in value.split()} - {""}))
+        node = _Node(f"{tag}.{classes}" if classes else tag)
+        self.stack[-1].children.append(node)
+        if tag not in VOID_TAGS:
+            self.stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        if self.skip or tag in SKIPPED_TAGS:
+            return
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.stack.pop()
+
+    def handle_endtag(self, tag):
+        if self.skip:
+            if tag in SKIPPED_TAGS:
+                self.skip -= 1
+            return
+        # Cerrar hasta la etiqueta correspondiente (HTML mal anidado)
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].label.split(".", 1)[0] == tag:
+                del self.stack[i:]
+                break
+
+
+def dom_fingerprint(html: str, max_depth: int = 12) -> str:
+    """
+    Huella de la plantilla de una página.
+
+    Se calcula sobre el esqueleto de etiquetas y clases hasta `max_depth`
+    niveles, sin texto ni atributos variables y reduciendo los hijos de
+    cada nodo al conjunto de sus estructuras distintas, de modo que dos
+    fichas de producto de la misma tienda dan la misma huella aunque cambie
+    el contenido, el número de elementos o su orden.
+    """
+    parser = _SkeletonParser()
+    parser.feed(html)
+    parser.close()
+    skeleton = parser.root.signature(0, max_depth)
+    return hashlib.sha1(skeleton.encode("utf-8")).hexdigest()[:16]
+
+
+def _strip_fences(code: str) -> str:
+    match = re.search(r"```(?:python)?\s*\n(.*?)```", code, re.S)
+    return match.group(1) if match else code
+
+
+def load_extractor(code: str, trust_generated_code: bool = False) -> Callable[[str], List[Dict[str, Any]]]:
+    """
+    Compilar el código generado y devolver su función `extract(html)`.
+
+    El código se ejecuta en el proceso actual con sus mismos permisos, así
+    que hay que confirmarlo explícitamente (o usarlo dentro del sandbox).
+
+    Args:
+        code: Código Python que define `extract(html)`
+        trust_generated_code: Confirmación de que se puede ejecutar el código
+
+    Raises:
+        PermissionError: Si no se confirma `trust_generated_code`
+    """
+    if not trust_generated_code:
+        raise PermissionError(
+            "load_extractor ejecuta código generado en este proceso: "
+            "pasa trust_generated_code=True para permitirlo"
+        )
+    namespace: Dict[str, Any] = {}
+    exec(compile(_strip_fences(code), "<extractor>", "exec"), namespace)
+    extract = namespace.get("extract")
+    if not callable(extract):
+        raise ValueError("El código generado no define una función extract(html)")
+    return extract
+
+
+def non_empty_records(records: Any) -> bool:
+    """Validación por defecto: una lista no vacía de diccionarios."""
+    return (isinstance(records, list) and bool(records)
+            and all(isinstance(r, dict) for r in records))
+
+
+EXTRACTOR_PROMPT = """{description}
+
+Escribe una función de Python `extract(html: str) -> list` que reciba el HTML
+de una página como la del ejemplo y devuelva la lista de registros descrita.
+Usa BeautifulSoup con selectores CSS estables (evita posiciones y clases
+generadas) para que sirva para todas las páginas con la misma plantilla.
+Devuelve solo el código.
+
+URL de ejemplo: {url}
+"""
+
+
+class TemplateExtractors:
+    """
+    Registro de extractores por huella de plantilla.
+
+    La primera página de cada grupo genera un extractor con `AIAssistant`;
+    el resto de páginas del grupo lo reutilizan y el modelo solo se vuelve a
+    llamar cuando la extracción falla la validación. Los extractores se
+    guardan como `<clave>-<huella>.py` en `path`, así que sobreviven entre
+    ejecuciones; la clave resume `description` y `prompt_template`, de modo
+    que configuraciones que extraen datos distintos de la misma plantilla no
+    comparten extractor.
+
+    Los extractores son código generado por el modelo (o leído de `path`) y
+    se ejecutan en el proceso actual, por lo que hay que aceptarlo con
+    `trust_generated_code=True`; para código no confiable, ejecuta el
+    crawl dentro del sandbox.
+    """
+
+    def __init__(self, assistant: AIAssistant, description: str,
+                 path: Union[str, Path, None] = None,
+                 validate: Callable[[Any], bool] = non_empty_records,
+                 prompt_template: str = EXTRACTOR_PROMPT,
+                 trust_generated_code: bool = False):
+        """
+        Args:
+            assistant: Asistente usado para generar los extractores
+            description: Descripción de los datos a extraer (p. ej. la de la config)
+            path: Directorio de los extractores (por defecto en la caché persistente)
+            validate: Función que decide si el resultado de un extractor es
+                válido; con `RecordValidator.accepts` de `auto_scrape.validation`
+                el extractor se regenera cuando sus campos no cumplen el
+                esquema de salida
+            prompt_template: Plantilla del prompt con {description} y {url}; el
+                HTML de ejemplo lo añade (reducido) `AIAssistant.build_prompt`
+            trust_generated_code: Permitir ejecutar en este proceso los
+                extractores generados y los guardados en `path`
+
+        Raises:
+            PermissionError: Si no se confirma `trust_generated_code`
+        """
+        if not trust_generated_code:
+            raise PermissionError(
+                "TemplateExtractors ejecuta código generado por el modelo y guardado en "
+                f"{path or 'la caché'}: pasa trust_generated_code=True para permitirlo"
+            )
+        self.assistant = assistant
+        self.description = description
+        self.path = Path(path) if path is not None else default_cache_dir("extractors")
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.validate = validate
+        self.prompt_template = prompt_template
+        self.trust_generated_code = trust_generated_code
+        self.key = hashlib.sha1(
+            f"{description}\0{prompt_template}".encode("utf-8")).hexdigest()[:12]
+        self.stats = {"pages": 0, "generated": 0, "reused": 0, "regenerated": 0, "failed": 0}
+        self._loaded: Dict[str, Callable] = {}
+
+    def build_prompt(self, url: str) -> str:
+        """Prompt para generar el extractor de la plantilla de una página."""
+        return self.prompt_template.format(description=self.description, url=url)
+
+    def _name(self, fingerprint: str) -> str:
+        return f"{self.key}-{fingerprint}"
+
+    def _generate(self, fingerprint: str, html: str, url: str, refresh: bool) -> Optional[Callable]:
+        code = self.assistant.generate_scraping_code(self.build_prompt(url), refresh=refresh,
+                                                     html=html)
+        if not code:
+            return None
+        try:
+            extract = load_extractor(code, trust_generated_code=self.trust_generated_code)
+        except Exception as e:
+            print(f"❌ Extractor generado no válido para {url}: {e}")
+            return None
+        name = self._name(fingerprint)
+        (self.path / f"{name}.py").write_text(
+            f"# Plantilla {fingerprint}, generado a partir de {url} "
+            f"({time.strftime('%Y-%m-%d %H:%M:%S')})\n{_strip_fences(code)}",
+            encoding="utf-8",
+        )
+        self._loaded[name] = extract
+        return extract
+
+    def _stored(self, fingerprint: str) -> Optional[Callable]:
+        name = self._name(fingerprint)
+        extract = self._loaded.get(name)
+        if extract is None:
+            stored = self.path / f"{name}.py"
+            if stored.exists():
+                extract = self._loaded[name] = load_extractor(
+                    stored.read_text(encoding="utf-8"), trust_generated_code=self.trust_generated_code)
+        return extract
+
+    @staticmethod
+    def _run(extract: Callable, html: str) -> Any:
+        try:
+            return extract(html)
+        except Exception as e:
+            return e
+
+    def extract(self, html: str, url: str = "") -> List[Dict[str, Any]]:
+        """
+        Extraer registros de una página reutilizando el extractor de su plantilla.
+
+        Returns:
+            Registros extraídos (lista vacía si no se consigue un extractor válido)
+        """
+        self.stats["pages"] += 1
+        fingerprint = dom_fingerprint(html)
+
+        extract = self._stored(fingerprint)
+        if extract is not None:
+            records = self._run(extract, html)
+            if self.validate(records):
+                self.stats["reused"] += 1
+                return records
+            # El extractor del grupo no sirve para esta página: regenerar
+            self.stats["regenerated"] += 1
+            extract = self._generate(fingerprint, html, url, refresh=True)
+        else:
+            self.stats["generated"] += 1
+            extract = self._generate(fingerprint, html, url, refresh=False)
+
+        if extract is not None:
+            records = self._run(extract, html)
+            if self.validate(records):
+                return records
+        self.stats["failed"] += 1
+        return []
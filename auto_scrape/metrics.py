@@ -0,0 +1,457 @@
+"""
+Métricas de rendimiento: contadores, histogramas y trazas por etapa.
+
+Todas las etapas (descarga, navegación, espera, extracción, generación con
+IA, exportación y ciclo de vida del sandbox) registran su duración en el
+registro global `METRICS` mediante `span`. Al final de una ejecución se
+puede volcar en formato de texto de Prometheus (archivo o endpoint HTTP),
+como resumen JSON o como traza para `chrome://tracing` / Perfetto.
+
+Uso:
+    from auto_scrape.metrics import METRICS, span
+
+    with span("extract", site="example.com"):
+        ...
+    METRICS.write_summary("metrics.json")
+"""
+
+import bisect
+import contextvars
+import functools
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+
+# Límites (segundos) de los histogramas de duración
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    """Contador monótono con etiquetas."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str = ""):
+        self.name = name
+        self.help = help
+        self.values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self.values.get(_label_key(labels), 0)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(key)} {_format_value(v)}"
+                for key, v in sorted(self.values.items())]
+
+    def summary(self) -> Dict[str, float]:
+        return {_format_labels(key) or "total": v for key, v in sorted(self.values.items())}
+
+
+class _Series:
+    __slots__ = ("counts", "sum", "count", "max")
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * (buckets + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+
+class Histogram:
+    """Histograma de valores (normalmente duraciones en segundos) con etiquetas."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self.series: Dict[LabelKey, _Series] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = _Series(len(self.buckets))
+            series.counts[index] += 1
+            series.sum += value
+            series.count += 1
+            if value > series.max:
+                series.max = value
+
+    def quantile(self, q: float, **labels) -> float:
+        """Cuantil aproximado (interpolando dentro del bucket), como `histogram_quantile`."""
+        series = self.series.get(_label_key(labels))
+        return self._quantile(series, q) if series else 0.0
+
+    def _quantile(self, series: _Series, q: float) -> float:
+        rank = q * series.count
+        seen = 0
+        for i, count in enumerate(series.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else series.max
+                return min(series.max, lower + (upper - lower) * (rank - seen) / count)
+            seen += count
+        return series.max
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series.counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', _format_value(bound))])} "
+                             f"{cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series.sum!r}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series.count}")
+        return lines
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {
+            _format_labels(key) or "total": {
+                "count": series.count,
+                "sum": round(series.sum, 6),
+                "mean": round(series.sum / series.count, 6) if series.count else 0.0,
+                "p50": round(self._quantile(series, 0.5), 6),
+                "p95": round(self._quantile(series, 0.95), 6),
+                "p99": round(self._quantile(series, 0.99), 6),
+                "max": round(series.max, 6),
+            }
+            for key, series in sorted(self.series.items())
+        }
+
+
+_current_span: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar(
+    "auto_scrape_span", default=None)
+
+
+class Span:
+    """
+    Tramo temporal de una etapa; se usa con `with` (también en código asíncrono).
+
+    Al salir registra la duración en el histograma `<namespace>_<name>_seconds`
+    con sus etiquetas, cuenta los errores en `<namespace>_<name>_errors_total`
+    y guarda la traza con su tramo padre (el `span` abierto en la misma tarea).
+    """
+
+    __slots__ = ("registry", "name", "labels", "id", "parent", "start", "wall", "duration",
+                 "error", "_token")
+
+    def __init__(self, registry: "MetricsRegistry", name: str, labels: Dict[str, Any]):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.duration = 0.0
+        self.error: Optional[str] = None
+
+    def __enter__(self) -> "Span":
+        self.id = next(self.registry._ids)
+        self.parent = _current_span.get()
+        self._token = _current_span.set(self.id)
+        self.wall = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.duration = time.perf_counter() - self.start
+        _current_span.reset(self._token)
+        # Las cancelaciones (fin del crawl, `aclose`) no cuentan como errores
+        if exc_type is not None and exc_type.__name__ not in ("CancelledError", "GeneratorExit"):
+            self.error = exc_type.__name__
+        self.registry._finish(self)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "parent": self.parent, "name": self.name,
+                "labels": {k: str(v) for k, v in self.labels.items()},
+                "start": self.wall, "duration": self.duration, "error": self.error}
+
+
+class _NoSpan:
+    """Sustituto de `Span` cuando las métricas están desactivadas."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+
+_NO_SPAN = _NoSpan()
+
+
+class MetricsRegistry:
+    """
+    Registro de métricas de un proceso.
+
+    Las métricas se crean al usarlas por primera vez (`counter`,
+    `histogram`) y todas llevan el prefijo `namespace`. Es seguro usarlo
+    desde varios hilos y desde tareas asyncio.
+    """
+
+    def __init__(self, namespace: str = "auto_scrape", max_spans: int = 10000,
+                 enabled: bool = True):
+        """
+        Args:
+            namespace: Prefijo de los nombres de las métricas
+            max_spans: Trazas que se conservan (las más recientes)
+            enabled: Registrar métricas (si es False, `span` no hace nada)
+        """
+        self.namespace = namespace
+        self.enabled = enabled
+        self.metrics: Dict[str, Any] = {}
+        self.spans: Deque[Span] = deque(maxlen=max_spans)
+        self.started_at = time.time()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _name(self, name: str) -> str:
+        return name if name.startswith(self.namespace + "_") else f"{self.namespace}_{name}"
+
+    def _get(self, cls, name: str, help: str, **kwargs):
+        name = self._name(name)
+        metric = self.metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self.metrics.get(name)
+                if metric is None:
+                    metric = self.metrics[name] = cls(name, help, **kwargs)
+        if not isinstance(metric, cls):
+            raise ValueError(f"La métrica {name} ya existe como {metric.kind}")
+        return metric
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        """Obtener (o crear) un contador."""
+        return self._get(Counter, name, help)
+
+    def histogram(self, name: str, help: str = "",
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Obtener (o crear) un histograma."""
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        """Incrementar un contador (atajo de `counter(name).inc`)."""
+        if self.enabled:
+            self.counter(name).inc(amount, **labels)
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Registrar un valor en un histograma (atajo de `histogram(name).observe`)."""
+        if self.enabled:
+            self.histogram(name).observe(value, **labels)
+
+    def span(self, name: str, **labels):
+        """
+        Medir una etapa.
+
+        Uso:
+            with METRICS.span("navigate", site=host):
+                await page.goto(url)
+        """
+        if not self.enabled:
+            return _NO_SPAN
+        return Span(self, name, labels)
+
+    def timed(self, name: str, **labels) -> Callable:
+        """Decorador que mide cada llamada a una función (síncrona o asíncrona)."""
+        import inspect
+
+        def decorator(func):
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(name, **labels):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _finish(self, span: Span) -> None:
+        self.histogram(f"{span.name}_seconds", f"Duración de la etapa {span.name}").observe(
+            span.duration, **span.labels)
+        if span.error is not None:
+            self.counter(f"{span.name}_errors_total", f"Errores en la etapa {span.name}").inc(
+                **span.labels, error=span.error)
+        self.spans.append(span)
+
+    def reset(self) -> None:
+        """Descartar todas las métricas y trazas."""
+        with self._lock:
+            self.metrics.clear()
+            self.spans.clear()
+            self.started_at = time.time()
+
+    def to_prometheus(self) -> str:
+        """Métricas en el formato de texto de Prometheus."""
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            if metric.help:
+                lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def stages(self) -> Dict[str, Dict[str, float]]:
+        """Tiempo total, llamadas y media de cada etapa medida con `span`."""
+        result = {}
+        suffix = "_seconds"
+        for name, metric in self.metrics.items():
+            if isinstance(metric, Histogram) and name.endswith(suffix):
+                total = sum(s.sum for s in metric.series.values())
+                count = sum(s.count for s in metric.series.values())
+                stage = name[len(self.namespace) + 1:-len(suffix)]
+                result[stage] = {"seconds": round(total, 6), "count": count,
+                                 "mean": round(total / count, 6) if count else 0.0}
+        return dict(sorted(result.items(), key=lambda item: -item[1]["seconds"]))
+
+    def summary(self) -> Dict[str, Any]:
+        """Resumen JSON: etapas, contadores y percentiles de cada histograma."""
+        return {
+            "started_at": self.started_at,
+            "elapsed": round(time.time() - self.started_at, 3),
+            "stages": self.stages(),
+            "counters": {name: m.summary() for name, m in sorted(self.metrics.items())
+                         if isinstance(m, Counter)},
+            "histograms": {name: m.summary() for name, m in sorted(self.metrics.items())
+                           if isinstance(m, Histogram)},
+        }
+
+    def format_stages(self, limit: int = 6) -> str:
+        """Una línea con el reparto del tiempo entre etapas (para los `print` de resumen)."""
+        stages = self.stages()
+        total = sum(s["seconds"] for s in stages.values()) or 1.0
+        return ", ".join(f"{name} {s['seconds']:.1f}s ({s['seconds'] / total:.0%})"
+                         for name, s in list(stages.items())[:limit])
+
+    @staticmethod
+    def _write_atomic(path: str, text: str) -> str:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".metrics-", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+    def write_prometheus(self, path: str) -> str:
+        """
+        Escribir las métricas en un archivo `.prom` (reemplazo atómico, apto
+        para el textfile collector de node_exporter).
+        """
+        return self._write_atomic(path, self.to_prometheus())
+
+    def write_summary(self, path: str, **extra) -> str:
+        """Escribir el resumen JSON de la ejecución (con `extra` como claves adicionales)."""
+        summary = dict(self.summary(), **extra)
+        return self._write_atomic(path, json.dumps(summary, indent=2, ensure_ascii=False))
+
+    def write_trace(self, path: str) -> str:
+        """Escribir las trazas en formato Trace Event (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        spans = list(self.spans)
+        parents = {s.id: s.parent for s in spans}
+
+        def root(span_id: int) -> int:
+            # Cada árbol de tramos en su propia fila, para que las tareas concurrentes no se solapen
+            while parents.get(span_id) is not None:
+                span_id = parents[span_id]
+            return span_id
+
+        events = [{
+            "name": s.name, "ph": "X", "pid": pid, "tid": root(s.id),
+            "ts": int(s.wall * 1e6), "dur": int(s.duration * 1e6),
+            "args": dict(s.as_dict()["labels"], id=s.id, parent=s.parent, error=s.error),
+        } for s in spans]
+        return self._write_atomic(path, json.dumps({"traceEvents": events}))
+
+    def serve(self, port: int = 9464, host: str = "127.0.0.1"):
+        """
+        Servir `/metrics` en un hilo en segundo plano.
+
+        Returns:
+            El servidor (`server.shutdown()` lo detiene)
+        """
+        # Solo se importa si se usa: http.server arrastra email y http.client
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="auto_scrape-metrics",
+                         daemon=True).start()
+        return server
+
+
+# Registro global; AUTO_SCRAPE_METRICS=0 lo desactiva
+METRICS = MetricsRegistry(enabled=os.environ.get("AUTO_SCRAPE_METRICS", "1") != "0")
+
+
+def span(name: str, **labels):
+    """Medir una etapa en el registro global (ver `MetricsRegistry.span`)."""
+    return METRICS.span(name, **labels)
+
+
+def timed(name: str, **labels) -> Callable:
+    """Decorador que mide una función en el registro global."""
+    return METRICS.timed(name, **labels)
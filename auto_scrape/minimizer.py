@@ -0,0 +1,215 @@
+"""
+Reductor de HTML para los prompts de generación de código.
+
+Elimina lo que no ayuda al modelo a escribir selectores (scripts, estilos,
+SVG, marcado de tracking), colapsa los hermanos repetidos en unas pocas
+muestras y recorta los textos largos hasta que el documento cabe en un
+presupuesto de tokens.
+"""
+
+import re
+from dataclasses import dataclass
+from html import escape
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple, Union
+
+
+DROPPED_TAGS = {"script", "style", "noscript", "template", "svg", "iframe", "canvas",
+                "link", "meta", "base", "object", "embed", "video", "audio", "source",
+                "track", "picture"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+             "meta", "param", "source", "track", "wbr"}
+KEPT_ATTRS = {"id", "class", "href", "src", "alt", "title", "name", "type", "value",
+              "itemprop", "itemtype", "role", "aria-label", "datetime", "for", "colspan"}
+KEEP_EMPTY = {"img", "input", "td", "th", "a", "time"}
+# Clases e ids que solo usan anuncios y avisos de cookies (token exacto: no
+# se descartan `order-tracking`, `product-modal`, `ad-free` ni los patrocinados)
+NOISE_TOKENS = {"ad", "ads", "advert", "adverts", "advertisement", "adsbygoogle",
+                "ad-slot", "ad-unit", "ad-banner", "banner-ad", "ad-container",
+                "ad-wrapper", "google-ad", "dfp-ad", "cookie-banner", "cookie-consent",
+                "cookie-notice", "gdpr-banner", "onetrust-consent-sdk", "cybotcookiebotdialog"}
+# Píxeles de seguimiento por host (los scripts e iframes se descartan siempre)
+_TRACKER_SRC_RE = re.compile(
+    r"^(?:https?:)?//(?:[\w-]+\.)*(?:doubleclick\.net|google-analytics\.com|"
+    r"googletagmanager\.com|googlesyndication\.com|googleadservices\.com|"
+    r"scorecardresearch\.com|bat\.bing\.com|adnxs\.com|criteo\.com|"
+    r"facebook\.com/tr)(?:[:/?#]|$)",
+    re.I,
+)
+_WS_RE = re.compile(r"\s+")
+
+# (muestras por grupo de hermanos, longitud máxima de texto, de atributos)
+LEVELS = [(3, 200, 120), (2, 80, 80), (1, 40, 60), (1, 16, 40)]
+
+
+def count_tokens(text: str) -> int:
+    """Tokens de un texto: tiktoken si está instalado, si no ≈4 caracteres por token."""
+    try:
+        import tiktoken
+    except ImportError:
+        return (len(text) + 3) // 4
+    return len(tiktoken.get_encoding("cl100k_base").encode(text, disallowed_special=()))
+
+
+class _Element:
+    __slots__ = ("tag", "attrs", "children")
+
+    def __init__(self, tag: str, attrs: List[Tuple[str, str]]):
+        self.tag = tag
+        self.attrs = attrs
+        self.children: List[Union["_Element", str]] = []
+
+    @property
+    def signature(self) -> str:
+        classes = next((v for k, v in self.attrs if k == "class"), "")
+        return f"{self.tag}.{'.'.join(sorted(classes.split()))}" if classes else self.tag
+
+
+def _is_noise(tag: str, attrs: List[Tuple[str, Optional[str]]]) -> bool:
+    values = dict(attrs)
+    if "hidden" in values or values.get("aria-hidden") == "true":
+        return True
+    if tag == "input" and (values.get("type") or "").lower() == "hidden":
+        return True
+    if "display:none" in (values.get("style") or "").replace(" ", ""):
+        return True
+    if tag == "img" and values.get("width") in ("0", "1") and values.get("height") in ("0", "1"):
+        return True
+    if tag == "img" and _TRACKER_SRC_RE.match(values.get("src") or ""):
+        return True
+    tokens = (values.get("class") or "").lower().split()
+    tokens.append((values.get("id") or "").lower())
+    return not NOISE_TOKENS.isdisjoint(tokens)
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Element("#root", [])
+        self.stack = [self.root]
+        self.skip: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.skip:
+            if tag not in VOID_TAGS:
+                self.skip.append(tag)
+            return
+        if tag in DROPPED_TAGS or _is_noise(tag, attrs):
+            if tag not in VOID_TAGS:
+                self.skip.append(tag)
+            return
+        node = _Element(tag, [(k, v or "") for k, v in attrs if k in KEPT_ATTRS])
+        self.stack[-1].children.append(node)
+        if tag not in VOID_TAGS:
+            self.stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        if self.skip or tag in DROPPED_TAGS or _is_noise(tag, attrs):
+            return
+        self.stack[-1].children.append(
+            _Element(tag, [(k, v or "") for k, v in attrs if k in KEPT_ATTRS]))
+
+    def handle_endtag(self, tag):
+        if self.skip:
+            if tag in self.skip:
+                while self.skip and self.skip.pop() != tag:
+                    pass
+            return
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].tag == tag:
+                del self.stack[i:]
+                break
+
+    def handle_data(self, data):
+        if not self.skip and data.strip():
+            self.stack[-1].children.append(data)
+
+
+def _shorten(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit].rstrip() + "…"
+
+
+def _render(node: _Element, samples: int, max_text: int, max_attr: int, out: List[str]) -> None:
+    counts = {}
+    for child in node.children:
+        if isinstance(child, _Element):
+            counts[child.signature] = counts.get(child.signature, 0) + 1
+
+    seen = {}
+    for child in node.children:
+        if isinstance(child, str):
+            text = _WS_RE.sub(" ", child).strip()
+            if text:
+                out.append(escape(_shorten(text, max_text), quote=False))
+            continue
+
+        sig = child.signature
+        seen[sig] = seen.get(sig, 0) + 1
+        if seen[sig] > samples:
+            continue
+
+        start = len(out)
+        attrs = "".join(
+            f' {k}="{escape(_shorten(v, max_attr))}"' for k, v in child.attrs
+        )
+        out.append(f"<{child.tag}{attrs}>")
+        if child.tag not in VOID_TAGS:
+            _render(child, samples, max_text, max_attr, out)
+            out.append(f"</{child.tag}>")
+            # Quitar contenedores vacíos sin atributos útiles
+            if len(out) == start + 2 and not child.attrs and child.tag not in KEEP_EMPTY:
+                del out[start:]
+
+        if seen[sig] == samples and counts[sig] > samples:
+            out.append(f"<!-- +{counts[sig] - samples} {sig} -->")
+
+
+@dataclass
+class MinimizeResult:
+    """HTML reducido y tokens ahorrados."""
+
+    html: str
+    original_tokens: int
+    tokens: int
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.original_tokens - self.tokens
+
+    @property
+    def ratio(self) -> float:
+        return self.tokens / self.original_tokens if self.original_tokens else 1.0
+
+
+def minimize_html(html: str, token_budget: int = 6000) -> MinimizeResult:
+    """
+    Reducir un documento HTML para incluirlo en un prompt.
+
+    Aplica niveles de reducción cada vez más agresivos (menos muestras por
+    grupo de hermanos repetidos, textos y atributos más cortos) hasta que el
+    resultado cabe en `token_budget`; como último recurso lo trunca.
+
+    Args:
+        html: Documento original
+        token_budget: Tokens máximos del resultado
+
+    Returns:
+        Resultado con el HTML reducido y los tokens antes y después
+    """
+    original_tokens = count_tokens(html)
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+
+    reduced = ""
+    for samples, max_text, max_attr in LEVELS:
+        out: List[str] = []
+        _render(builder.root, samples, max_text, max_attr, out)
+        reduced = "".join(out)
+        tokens = count_tokens(reduced)
+        if tokens <= token_budget:
+            return MinimizeResult(reduced, original_tokens, tokens)
+
+    # Truncar por caracteres de forma proporcional al exceso
+    reduced = reduced[:int(len(reduced) * token_budget / tokens)] + "\n<!-- truncado -->"
+    return MinimizeResult(reduced, original_tokens, count_tokens(reduced))
@@ -0,0 +1,301 @@
+"""
+Archivos de salida de los exportadores: compresión y fragmentos.
+
+`OutputStream` es un archivo de texto que acumula lo escrito en bloques de
+64 KB y, con `compression` ('gzip' o 'zstd'), los comprime en un hilo
+aparte mientras el crawl sigue produciendo registros (zlib y zstd liberan
+el GIL). `ShardedWriter` reparte los registros de un escritor en
+fragmentos numerados (`salida-00000.jsonl.gz`, ...) por número de
+registros o tamaño, y mantiene un manifiesto JSON con los fragmentos ya
+terminados para que otros procesos puedan empezar a leerlos antes de que
+acabe la exportación.
+"""
+
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .metrics import METRICS
+
+
+COMPRESSIONS = {"gzip": ".gz", "zstd": ".zst"}
+CHUNK_SIZE = 1 << 16
+
+
+def resolve_output(path: str, compression: Optional[str]) -> Tuple[str, Optional[str]]:
+    """
+    Ruta y compresión efectivas de una salida.
+
+    Sin `compression` se deduce de la extensión (`.gz`, `.zst`); con ella,
+    se añade la extensión si falta.
+    """
+    if compression is None:
+        for name, suffix in COMPRESSIONS.items():
+            if path.endswith(suffix):
+                return path, name
+        return path, None
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Compresión no soportada: {compression} ({', '.join(COMPRESSIONS)})")
+    suffix = COMPRESSIONS[compression]
+    return (path if path.endswith(suffix) else path + suffix), compression
+
+
+def split_output(path: str) -> Tuple[str, str, str]:
+    """Separar `salida.jsonl.gz` en ('salida', '.jsonl', '.gz')."""
+    compressed = next((s for s in COMPRESSIONS.values() if path.endswith(s)), "")
+    root, ext = os.path.splitext(path[:len(path) - len(compressed)])
+    return root, ext, compressed
+
+
+def _compressor(compression: str, level: Optional[int]):
+    """Objeto con `compress(bytes)` y `flush()` que produce un flujo gzip o zstd."""
+    if compression == "gzip":
+        import zlib
+
+        # wbits=31: cabecera y cola gzip, legible con gzip.open o zcat
+        return zlib.compressobj(6 if level is None else level, zlib.DEFLATED, 31)
+    try:
+        import zstandard
+    except ImportError:
+        try:
+            from compression import zstd  # Python 3.14+
+        except ImportError as e:
+            raise ImportError(
+                "zstandard es necesario para comprimir en zstd: pip install zstandard"
+            ) from e
+        return zstd.ZstdCompressor(level=level)
+    return zstandard.ZstdCompressor(level=3 if level is None else level).compressobj()
+
+
+def open_input(path: str, compression: Optional[str] = None):
+    """Abrir una salida (comprimida o no) como texto para leerla."""
+    path, compression = resolve_output(path, compression)
+    if compression is None:
+        return open(path, newline="", encoding="utf-8")
+    if compression == "gzip":
+        import gzip
+
+        return gzip.open(path, "rt", newline="", encoding="utf-8")
+    import io
+
+    try:
+        import zstandard
+    except ImportError:
+        from compression import zstd  # Python 3.14+
+
+        return zstd.open(path, "rt", newline="", encoding="utf-8")
+    raw = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return io.TextIOWrapper(raw, newline="", encoding="utf-8")
+
+
+class OutputStream:
+    """
+    Archivo de salida de texto (UTF-8), opcionalmente comprimido en un hilo.
+
+    Sin compresión equivale a un archivo abierto con `open(..., 'w')`. Con
+    ella, los bloques se pasan por una cola acotada a un hilo que los
+    comprime y escribe: si el hilo se retrasa, `write` espera en lugar de
+    acumular memoria. `size` cuenta los caracteres escritos sin comprimir.
+    En modo append la compresión añade un nuevo miembro gzip o trama zstd,
+    que los lectores concatenan.
+    """
+
+    def __init__(self, path: str, compression: Optional[str] = None,
+                 level: Optional[int] = None, append: bool = False, queue_size: int = 8):
+        """
+        Args:
+            path: Archivo de salida
+            compression: None, 'gzip' o 'zstd'
+            level: Nivel de compresión (por defecto 6 en gzip y 3 en zstd)
+            append: Añadir al final del archivo en vez de truncarlo
+            queue_size: Bloques de 64 KB en cola hacia el hilo de compresión
+        """
+        self.path = path
+        self.compression = compression
+        self.size = 0
+        self._parts: List[str] = []
+        self._pending = 0
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._raw = open(path, "ab" if append else "wb")
+        self._queue = None
+        if compression is not None:
+            import queue
+            import threading
+
+            self._compressor = _compressor(compression, level)
+            self._queue = queue.Queue(maxsize=max(1, queue_size))
+            self._thread = threading.Thread(target=self._compress_loop, daemon=True,
+                                            name=f"compress-{os.path.basename(path)}")
+            self._thread.start()
+
+    def write(self, text: str) -> int:
+        self._parts.append(text)
+        length = len(text)
+        self._pending += length
+        self.size += length
+        if self._pending >= CHUNK_SIZE:
+            self._spill()
+        return length
+
+    def _spill(self) -> None:
+        if not self._parts:
+            return
+        data = "".join(self._parts).encode("utf-8")
+        self._parts = []
+        self._pending = 0
+        if self._queue is None:
+            self._raw.write(data)
+            return
+        if self._error is not None:
+            raise self._error
+        self._queue.put(data)
+
+    def _compress_loop(self) -> None:
+        try:
+            while True:
+                data = self._queue.get()
+                if data is None:
+                    break
+                self._raw.write(self._compressor.compress(data))
+            self._raw.write(self._compressor.flush())
+        except BaseException as e:
+            self._error = e
+            # Seguir vaciando la cola para no bloquear a `write`
+            while self._queue.get() is not None:
+                pass
+
+    def flush(self) -> None:
+        """Entregar lo pendiente (al disco, o al hilo de compresión)."""
+        self._spill()
+        if self._queue is None:
+            self._raw.flush()
+
+    def fileno(self) -> int:
+        return self._raw.fileno()
+
+    def close(self) -> None:
+        """Terminar la compresión y cerrar el archivo."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._spill()
+        finally:
+            if self._queue is not None:
+                self._queue.put(None)
+                self._thread.join()
+            self._raw.close()
+        if self._error is not None:
+            raise self._error
+
+
+def manifest_path(output_file: str) -> str:
+    """Ruta del manifiesto de una salida fragmentada (`salida.manifest.json`)."""
+    return split_output(output_file)[0] + ".manifest.json"
+
+
+def shard_path(output_file: str, index: int) -> str:
+    """Ruta del fragmento `index` (`salida-00003.jsonl.gz`)."""
+    root, ext, compressed = split_output(output_file)
+    return f"{root}-{index:05d}{ext}{compressed}"
+
+
+class ShardedWriter:
+    """
+    Escritor que reparte los registros en fragmentos numerados.
+
+    Cada fragmento lo escribe un escritor nuevo de `open_shard(ruta)` y se
+    cierra al llegar a `max_records` registros o `max_bytes` caracteres sin
+    comprimir (según su atributo `size`). Al cerrar cada fragmento se
+    reescribe de forma atómica el manifiesto, con los fragmentos terminados
+    y `complete: true` cuando termina la exportación.
+    """
+
+    def __init__(self, open_shard: Callable[[str], Any], output_file: str,
+                 max_records: Optional[int] = None, max_bytes: Optional[int] = None,
+                 info: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            open_shard: Función que abre el escritor de un fragmento
+            output_file: Salida base (los fragmentos se numeran a partir de ella)
+            max_records: Registros por fragmento
+            max_bytes: Tamaño aproximado por fragmento, sin comprimir
+            info: Datos añadidos al manifiesto (formato, compresión...)
+        """
+        if not max_records and not max_bytes:
+            raise ValueError("Se necesita max_records o max_bytes para fragmentar la salida")
+        self.output_file = output_file
+        self.manifest_file = manifest_path(output_file)
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.info = dict(info or {})
+        self.shards: List[Dict[str, Any]] = []
+        self.count = 0
+        self._open_shard = open_shard
+        self._writer = None
+        self._path = ""
+        self._closed = False
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Añadir un registro al fragmento actual y rotar si está lleno."""
+        if self._writer is None:
+            self._path = shard_path(self.output_file, len(self.shards))
+            self._writer = self._open_shard(self._path)
+        self._writer.write(record)
+        self.count += 1
+        if ((self.max_records and self._writer.count >= self.max_records)
+                or (self.max_bytes and self._writer.size >= self.max_bytes)):
+            self._finish_shard()
+
+    def _finish_shard(self) -> None:
+        writer, self._writer = self._writer, None
+        path = writer.close()
+        files = [path] + list(getattr(writer, "child_files", []))
+        self.shards.append({
+            "path": os.path.basename(path),
+            "records": writer.count,
+            "bytes": sum(os.path.getsize(f) for f in files),
+            **({"children": [os.path.basename(f) for f in files[1:]]} if files[1:] else {}),
+        })
+        METRICS.inc("export_shards_total")
+        self._write_manifest(complete=False)
+
+    def _write_manifest(self, complete: bool) -> None:
+        manifest = dict(self.info, complete=complete, records=sum(s["records"] for s in self.shards),
+                        shards=self.shards)
+        tmp = f"{self.manifest_file}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.manifest_file)
+
+    def close(self) -> str:
+        """Cerrar el último fragmento y devolver la ruta del manifiesto."""
+        if self._closed:
+            return self.manifest_file
+        self._closed = True
+        if self._writer is not None:
+            self._finish_shard()
+        self._write_manifest(complete=True)
+        return self.manifest_file
+
+    def abort(self) -> None:
+        """
+        Cerrar tras un error: se descarta el fragmento en curso y el
+        manifiesto queda con los fragmentos terminados y `complete: false`.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.abort()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
@@ -0,0 +1,824 @@
+"""
+Motor de crawling asíncrono con concurrencia acotada.
+"""
+
+import asyncio
+import copy
+import hashlib
+import heapq
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple, Union
+from urllib.parse import urljoin, urlsplit
+
+from .blocking import BlockingRules, route_blocking
+from .browser import BrowserPool, wait_ready
+from .exporters import BaseExporter, JSONExporter
+from .cache import ResponseCache
+from .checkpoint import CrawlCheckpoint, default_checkpoint_dir
+from .fetcher import BROWSER, Fetcher, RenderPolicy
+from .metrics import METRICS, span
+from .output import resolve_output
+from .utils import BloomFilter, normalize_url
+
+
+@dataclass
+class PageResult:
+    """Resultado de procesar una página: registros extraídos y enlaces a seguir."""
+
+    records: List[Dict[str, Any]] = field(default_factory=list)
+    links: List[str] = field(default_factory=list)
+
+
+@dataclass
+class CrawlStats:
+    """Estadísticas de una ejecución del crawler."""
+
+    pages_ok: int = 0
+    pages_failed: int = 0
+    retries: int = 0
+    records: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages_ok / self.elapsed if self.elapsed else 0.0
+
+
+ParseCallback = Callable[[Any, str], Awaitable[Union[PageResult, Iterable[Dict[str, Any]], None]]]
+HTMLParseCallback = Callable[[str, str], Union[PageResult, Iterable[Dict[str, Any]], None]]
+
+
+def host_of(url: str) -> str:
+    """Host (con puerto) de una URL, usado para los límites por host."""
+    return urlsplit(url).netloc.lower()
+
+
+class SeenURLs:
+    """
+    Conjunto de URLs vistas en memoria acotada.
+
+    Un `BloomFilter` descarta en memoria la inmensa mayoría de consultas por
+    URLs nuevas; solo cuando el filtro responde "puede que esté" se consulta
+    un almacén exacto en disco (SQLite con un hash de 16 bytes por URL), así
+    que los falsos positivos del filtro no hacen perder URLs. Con 50M de URLs
+    y `error_rate=0.001` el filtro ocupa unos 90 MB.
+    """
+
+    def __init__(self, path: Union[str, Path], capacity: int = 10_000_000,
+                 error_rate: float = 0.001, flush_every: int = 10_000):
+        """
+        Args:
+            path: Directorio del almacén exacto
+            capacity: URLs previstas (dimensiona el filtro)
+            error_rate: Tasa de falsos positivos del filtro con `capacity` URLs
+            flush_every: URLs nuevas acumuladas antes de escribir en disco
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.flush_every = max(1, flush_every)
+        self.lookups = 0
+        self.false_positives = 0
+        self._count = 0
+        self._pending: set = set()
+        self._db = sqlite3.connect(str(self.path / "seen.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=OFF")
+        self._db.execute("CREATE TABLE IF NOT EXISTS seen (digest BLOB PRIMARY KEY) WITHOUT ROWID")
+        self._db.execute("DELETE FROM seen")
+        self._db.commit()
+
+    @staticmethod
+    def _digest(url: str) -> bytes:
+        return hashlib.blake2b(url.encode("utf-8"), digest_size=16).digest()
+
+    def _stored(self, digest: bytes) -> bool:
+        self.lookups += 1
+        if digest in self._pending:
+            return True
+        return self._db.execute("SELECT 1 FROM seen WHERE digest = ?", (digest,)).fetchone() is not None
+
+    def __contains__(self, url: str) -> bool:
+        digest = self._digest(url)
+        return digest in self.bloom and self._stored(digest)
+
+    def add(self, url: str) -> bool:
+        """
+        Añadir una URL.
+
+        Returns:
+            True si la URL no se había visto
+        """
+        digest = self._digest(url)
+        if self.bloom.add(digest):
+            if self._stored(digest):
+                return False
+            self.false_positives += 1
+        self._pending.add(digest)
+        self._count += 1
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+        return True
+
+    def update(self, urls: Iterable[str]) -> None:
+        for url in urls:
+            self.add(url)
+
+    def flush(self) -> None:
+        """Escribir en disco las URLs nuevas acumuladas."""
+        if self._pending:
+            with self._db:
+                self._db.executemany("INSERT OR IGNORE INTO seen VALUES (?)",
+                                     ((d,) for d in self._pending))
+            self._pending.clear()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class URLFrontier:
+    """
+    Frontera de URLs con deduplicación, prioridades y límite por host.
+
+    Cada host tiene su propia cola ordenada por prioridad (menor primero;
+    por defecto la profundidad) y `get` solo entrega URLs de hosts que no
+    han alcanzado `per_host` peticiones en curso, recorriéndolos en
+    round-robin para que un host con muchas URLs no acapare a los workers.
+
+    Las URLs se deduplican por su forma normalizada (`normalize_url`, sin
+    fragmento ni parámetros de seguimiento). Con `expected_urls` la frontera
+    pasa a modo compacto para crawls de decenas de millones de URLs: las
+    vistas se guardan en un `SeenURLs` y, por encima de `max_queued` URLs
+    en memoria, las pendientes se desbordan a SQLite y se recargan por host
+    cuando su cola se vacía (el orden por prioridad pasa a ser aproximado
+    entre lo que está en memoria y lo desbordado).
+    """
+
+    def __init__(self, per_host: int = 2, max_pages: Optional[int] = None,
+                 priority: Optional[Callable[[str, int], float]] = None,
+                 expected_urls: Optional[int] = None, error_rate: float = 0.001,
+                 max_queued: Optional[int] = None,
+                 path: Union[str, Path, None] = None):
+        """
+        Args:
+            per_host: Peticiones simultáneas máximas por host
+            max_pages: URLs máximas a encolar en total
+            priority: Función `priority(url, depth)`; menor se visita antes
+            expected_urls: URLs previstas; activa el modo compacto
+            error_rate: Tasa de falsos positivos del filtro de Bloom
+            max_queued: URLs pendientes en memoria antes de desbordar a disco
+                (por defecto 100.000 en modo compacto y sin límite si no)
+            path: Directorio de trabajo del modo compacto (temporal por defecto)
+        """
+        self.per_host = max(1, per_host)
+        self.max_pages = max_pages
+        self.priority = priority or (lambda url, depth: depth)
+        self.max_queued = max_queued
+        self._tmpdir = None
+        self._spill = None
+        if expected_urls or max_queued is not None:
+            if path is None:
+                path = self._tmpdir = tempfile.mkdtemp(prefix="auto_scrape_frontier_")
+            path = Path(path)
+            path.mkdir(parents=True, exist_ok=True)
+        if expected_urls:
+            self.seen: Union[set, SeenURLs] = SeenURLs(path, expected_urls, error_rate)
+            if max_queued is None:
+                self.max_queued = 100_000
+        else:
+            self.seen = set()
+        if self.max_queued is not None:
+            self._spill = sqlite3.connect(str(path / "queue.sqlite"), check_same_thread=False)
+            self._spill.execute("PRAGMA journal_mode=WAL")
+            self._spill.execute("PRAGMA synchronous=OFF")
+            self._spill.execute("DROP TABLE IF EXISTS queue")
+            self._spill.execute("""
+                CREATE TABLE queue (
+                    seq INTEGER PRIMARY KEY, host TEXT NOT NULL, priority REAL NOT NULL,
+                    url TEXT NOT NULL, depth INTEGER NOT NULL
+                )
+            """)
+            self._spill.execute("CREATE INDEX queue_host ON queue (host, priority, seq)")
+        self._queues: Dict[str, List[Tuple[float, int, str, int]]] = {}
+        self._hosts: Deque[str] = deque()
+        self._queued = 0
+        self._spilled: Dict[str, int] = {}
+        self._spill_buffer: List[Tuple[int, str, float, str, int]] = []
+        self._seq = 0
+        self._in_flight: Dict[str, int] = {}
+        self._unfinished = 0
+        self._delayed: Set[asyncio.Future] = set()
+        self._cond = asyncio.Condition()
+
+    def __len__(self) -> int:
+        return self._queued + sum(self._spilled.values())
+
+    def _enqueue(self, url: str, depth: int) -> None:
+        host = host_of(url)
+        queue = self._queues.get(host)
+        if queue is None and not self._spilled.get(host):
+            self._hosts.append(host)
+        self._seq += 1
+        entry = (self.priority(url, depth), self._seq, url, depth)
+        if self.max_queued is not None and self._queued >= self.max_queued:
+            self._spill_buffer.append((self._seq, host, entry[0], url, depth))
+            self._spilled[host] = self._spilled.get(host, 0) + 1
+            if len(self._spill_buffer) >= 10_000:
+                self._flush_spill()
+        else:
+            if queue is None:
+                queue = self._queues[host] = []
+            heapq.heappush(queue, entry)
+            self._queued += 1
+        self._unfinished += 1
+
+    def _flush_spill(self) -> None:
+        if self._spill_buffer:
+            with self._spill:
+                self._spill.executemany("INSERT INTO queue VALUES (?, ?, ?, ?, ?)", self._spill_buffer)
+            self._spill_buffer.clear()
+
+    def _refill(self, host: str) -> List[Tuple[float, int, str, int]]:
+        """Recargar en memoria las URLs desbordadas de un host."""
+        self._flush_spill()
+        room = max(1, min(1000, self.max_queued - self._queued))
+        rows = self._spill.execute(
+            "SELECT priority, seq, url, depth FROM queue WHERE host = ? "
+            "ORDER BY priority, seq LIMIT ?", (host, room)).fetchall()
+        with self._spill:
+            self._spill.executemany("DELETE FROM queue WHERE seq = ?", ((r[1],) for r in rows))
+        self._spilled[host] -= len(rows)
+        if not self._spilled[host]:
+            del self._spilled[host]
+        queue = self._queues[host] = [tuple(r) for r in rows]
+        heapq.heapify(queue)
+        self._queued += len(queue)
+        return queue
+
+    def add(self, url: str, depth: int = 0) -> bool:
+        """
+        Añadir una URL si no se ha visto antes.
+
+        Returns:
+            True si la URL se ha encolado (False también si no es una URL
+            válida, p. ej. con un puerto no numérico)
+        """
+        if self.max_pages is not None and len(self.seen) >= self.max_pages:
+            return False
+        key = normalize_url(url)
+        if key is None:
+            METRICS.inc("invalid_urls_total")
+            return False
+        if isinstance(self.seen, SeenURLs):
+            # Una sola pasada por el filtro para consultar y marcar
+            if not self.seen.add(key):
+                return False
+        elif key in self.seen:
+            return False
+        else:
+            self.seen.add(key)
+        self._enqueue(url, depth)
+        return True
+
+    async def put(self, url: str, depth: int = 0) -> bool:
+        """Versión asíncrona de `add` que despierta a los workers en espera."""
+        async with self._cond:
+            added = self.add(url, depth)
+            if added:
+                self._cond.notify_all()
+            return added
+
+    async def put_many(self, urls: Iterable[str], depth: int = 0) -> List[str]:
+        """Añadir varias URLs de una vez y devolver las que se han encolado."""
+        async with self._cond:
+            added = [url for url in urls if self.add(url, depth)]
+            if added:
+                self._cond.notify_all()
+            return added
+
+    def restore(self, seen: Iterable[str], pending: Iterable[Tuple[str, int]]) -> None:
+        """Restaurar las URLs vistas y pendientes de un punto de control."""
+        for url in seen:
+            key = normalize_url(url)
+            if key is not None:
+                self.seen.add(key)
+        for url, depth in pending:
+            self._enqueue(url, depth)
+
+    async def retry(self, url: str, depth: int, delay: float = 0.0) -> None:
+        """
+        Volver a encolar una URL ya vista (reintento).
+
+        Con `delay`, la URL vuelve a la cola pasados esos segundos; mientras
+        tanto no ocupa ningún hueco de su host, pero cuenta como pendiente
+        para `join`.
+        """
+        if delay > 0:
+            self._unfinished += 1
+            task = asyncio.ensure_future(self._retry_later(url, depth, delay))
+            self._delayed.add(task)
+            task.add_done_callback(self._delayed.discard)
+            return
+        async with self._cond:
+            self._enqueue(url, depth)
+            self._cond.notify_all()
+
+    async def _retry_later(self, url: str, depth: int, delay: float) -> None:
+        await asyncio.sleep(delay)
+        async with self._cond:
+            self._unfinished -= 1
+            self._enqueue(url, depth)
+            self._cond.notify_all()
+
+    def _pop_ready(self) -> Optional[Tuple[str, int]]:
+        for _ in range(len(self._hosts)):
+            host = self._hosts[0]
+            self._hosts.rotate(-1)
+            if self._in_flight.get(host, 0) >= self.per_host:
+                continue
+            queue = self._queues.get(host) or self._refill(host)
+            _, _, url, depth = heapq.heappop(queue)
+            self._queued -= 1
+            if not queue:
+                del self._queues[host]
+                if not self._spilled.get(host):
+                    self._hosts.remove(host)
+            self._in_flight[host] = self._in_flight.get(host, 0) + 1
+            return url, depth
+        return None
+
+    async def get(self) -> Tuple[str, int]:
+        """Esperar a la siguiente URL de un host con capacidad libre."""
+        async with self._cond:
+            while True:
+                item = self._pop_ready()
+                if item is not None:
+                    return item
+                await self._cond.wait()
+
+    async def done(self, url: str) -> None:
+        """Marcar como terminada una URL entregada por `get`."""
+        async with self._cond:
+            host = host_of(url)
+            self._in_flight[host] -= 1
+            if not self._in_flight[host]:
+                del self._in_flight[host]
+            self._unfinished -= 1
+            self._cond.notify_all()
+
+    async def join(self) -> None:
+        """Esperar a que no queden URLs pendientes ni en curso."""
+        async with self._cond:
+            while self._unfinished:
+                await self._cond.wait()
+
+    def close(self) -> None:
+        """Cancelar los reintentos en espera y liberar los almacenes en disco."""
+        for task in list(self._delayed):
+            task.cancel()
+        if isinstance(self.seen, SeenURLs):
+            self.seen.close()
+        if self._spill is not None:
+            self._spill.close()
+        if self._tmpdir is not None:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+
+
+def _is_empty(result) -> bool:
+    """Indicar si una extracción no ha dado registros ni enlaces."""
+    if result is None:
+        return True
+    if isinstance(result, PageResult):
+        return not result.records and not result.links
+    return not result
+
+
+async def default_parse(page, url: str) -> PageResult:
+    """Extracción por defecto: título de la página."""
+    return PageResult(records=[{
+        "url": url,
+        "title": await page.title(),
+        "timestamp": datetime.now().isoformat(),
+    }])
+
+
+class Crawler:
+    """
+    Motor de crawling asíncrono sobre Playwright.
+
+    Lee `start_urls` de la configuración, reparte las URLs entre un número
+    fijo de workers que toman páginas prestadas de un `BrowserPool` (nunca
+    hay más de `concurrency` pestañas abiertas) y envía los registros al
+    exportador a medida que se extraen.
+
+    Con `fetch: 'auto'` y un `parse_html`, cada URL se descarga primero por
+    HTTP y solo se renderiza en el navegador si la `RenderPolicy` o la
+    heurística (selectores esperados ausentes, app shell vacío) lo piden.
+    Si una página de un host aprendido como estático no da registros ni
+    enlaces, se renderiza para comprobarlo y el host se reaprende si el
+    navegador sí los da.
+
+    Con `snapshot: True` y un `parse_html` (por ejemplo
+    `ExtractionSpec.parse_html`), cada página renderizada se copia con
+    `page.content()`, se devuelve al pool en el acto y el HTML se procesa en
+    un pool de `parse_workers` procesos: el navegador no espera a la
+    extracción y esta usa todos los núcleos. `parse_html` debe poder
+    serializarse con pickle (función de módulo o método de un objeto) y el
+    script que lanza el crawl necesita el guard `if __name__ == "__main__"`.
+
+    Claves de configuración reconocidas (todas opcionales salvo `start_urls`):
+    `concurrency`, `per_host`, `max_pages`, `max_depth`, `max_retries`,
+    `timeout` (ms), `allowed_domains`, `contexts`, `max_navigations`,
+    `fetch` ('browser' o 'auto'), `snapshot`, `parse_workers` (procesos
+    de extracción; por defecto uno por núcleo), `selectors`, `render` (reglas por sitio
+    para `RenderPolicy`), `render_policy_file`, `cache` (True o ruta de una
+    `ResponseCache`), `cache_ttl` (segundos), `checkpoint` (True o
+    directorio de un `CrawlCheckpoint`), `checkpoint_interval` (segundos)
+    `block` (perfil de bloqueo de recursos o reglas por sitio, ver
+    `BlockingRules`; solo para el pool que crea el propio crawler) y, para
+    la frontera, `priority` (función `priority(url, depth)`),
+    `expected_urls`, `false_positive_rate`, `max_queued` y `frontier_dir`
+    (ver `URLFrontier`). Para las métricas de `auto_scrape.metrics`:
+    `metrics_port` (endpoint de Prometheus durante el crawl),
+    `metrics_file` (archivo `.prom` actualizado cada `metrics_interval`
+    segundos) y `metrics_summary` (resumen JSON al terminar). Para validar
+    los registros antes del exportador con `auto_scrape.validation`:
+    `schema` (esquema de salida, o True para leerlo de `description`),
+    `schema_drop_invalid`, `schema_max_failure_rate` y
+    `on_schema_degraded` (función `(campo, informe)` llamada cuando un
+    campo supera la tasa de fallo, p. ej. para regenerar el extractor).
+
+    Con `checkpoint`, el estado del crawl se guarda cada pocos segundos y
+    una ejecución con las mismas `start_urls` (o el mismo directorio)
+    continúa donde se quedó la anterior, añadiendo a su misma salida.
+    """
+
+    def __init__(self, config: Dict[str, Any], parse: Optional[ParseCallback] = None,
+                 exporter: Optional[BaseExporter] = None,
+                 output_file: Optional[str] = None,
+                 pool: Optional[BrowserPool] = None,
+                 parse_html: Optional[HTMLParseCallback] = None):
+        """
+        Args:
+            config: Configuración del crawl
+            parse: Corrutina `parse(page, url)` que devuelve un `PageResult`
+                o una lista de registros
+            exporter: Exportador de los registros (JSON Lines por defecto;
+                con `checkpoint` debe ser JSON Lines)
+            output_file: Archivo de salida del exportador
+            pool: Pool de navegadores compartido; si es None se crea uno
+                para la ejecución
+            parse_html: Función `parse_html(html, url)` usada en modo
+                `fetch: 'auto'`, donde la página puede no pasar por el
+                navegador, y en modo `snapshot`
+        """
+        self.config = config
+        self.start_urls: List[str] = list(config.get('start_urls', []))
+        self.parse = parse or default_parse
+        self.exporter = exporter or JSONExporter(lines=True)
+        self.output_file = output_file or config.get(
+            'output', f"crawl_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+        )
+        self.concurrency = max(1, int(config.get('concurrency', 8)))
+        self.max_depth = config.get('max_depth', 0)
+        self.max_retries = int(config.get('max_retries', 2))
+        self.timeout = int(config.get('timeout', 30000))
+        self.allowed_domains = set(config.get('allowed_domains') or
+                                   (host_of(u) for u in self.start_urls))
+        self.frontier = URLFrontier(
+            per_host=int(config.get('per_host', 2)),
+            max_pages=config.get('max_pages'),
+            priority=config.get('priority'),
+            expected_urls=config.get('expected_urls'),
+            error_rate=float(config.get('false_positive_rate', 0.001)),
+            max_queued=config.get('max_queued'),
+            path=config.get('frontier_dir'),
+        )
+        self.pool = pool
+        self.blocking = BlockingRules(config['block']) if config.get('block') else None
+        self.parse_html = parse_html
+        self.selectors: List[str] = list(config.get('selectors') or [])
+        self.snapshot = bool(config.get('snapshot'))
+        if self.snapshot and parse_html is None:
+            raise ValueError("El modo snapshot necesita una función parse_html")
+        self.parse_workers = max(1, int(config.get('parse_workers') or os.cpu_count() or 1))
+        self._executor = None
+        self.fetcher: Optional[Fetcher] = None
+        if config.get('fetch', 'browser') == 'auto':
+            if parse_html is None:
+                raise ValueError("El modo fetch='auto' necesita una función parse_html")
+            self.fetcher = Fetcher(
+                policy=RenderPolicy(config.get('render'), config.get('render_policy_file')),
+                per_host=int(config.get('per_host', 2)),
+                timeout=self.timeout / 1000,
+            )
+        self.checkpoint: Optional[CrawlCheckpoint] = None
+        checkpoint = config.get('checkpoint')
+        if checkpoint:
+            if not (isinstance(self.exporter, JSONExporter) and self.exporter.lines):
+                raise ValueError("Los puntos de control necesitan un exportador JSON Lines")
+            if self.exporter.sharded or resolve_output(self.output_file, self.exporter.compression)[1]:
+                raise ValueError("Los puntos de control necesitan una salida sin comprimir ni fragmentar")
+            self.checkpoint = CrawlCheckpoint(
+                default_checkpoint_dir(config, extraction=[self.parse, parse_html])
+                if checkpoint is True else checkpoint,
+                interval=float(config.get('checkpoint_interval', 5)),
+            )
+        self.validator = None
+        if config.get('schema'):
+            from .validation import RecordValidator
+
+            self.validator = RecordValidator(
+                config['schema'] if config['schema'] is not True else config.get('description') or True,
+                drop_invalid=bool(config.get('schema_drop_invalid')),
+                max_failure_rate=float(config.get('schema_max_failure_rate', 0.2)),
+                on_degraded=config.get('on_schema_degraded'),
+            )
+        self.stats = CrawlStats()
+        self._writer = None
+        self._attempts: Dict[str, int] = {}
+        self._exported = 0
+
+    def _allowed(self, url: str) -> bool:
+        return urlsplit(url).scheme in ('http', 'https') and host_of(url) in self.allowed_domains
+
+    async def _fetch(self, page, url: str) -> None:
+        """Navegar hasta la URL y esperar a los `selectors` de la configuración."""
+        with span("navigate"):
+            await page.goto(url, wait_until="domcontentloaded", timeout=self.timeout)
+        await wait_ready(page, self.selectors, self.timeout)
+
+    async def _handle(self, page, url: str, depth: int) -> None:
+        await self._fetch(page, url)
+        with span("extract", via="browser"):
+            result = await self.parse(page, url)
+        await self._emit(url, depth, result)
+
+    async def _parse_html(self, html: str, url: str, via: str):
+        """Aplicar `parse_html` en el pool de procesos si lo hay, o aquí mismo."""
+        with span("extract", via=via):
+            if self._executor is None:
+                return self.parse_html(html, url)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self.parse_html, html, url)
+
+    async def _handle_html(self, url: str, depth: int) -> None:
+        fetched = await self.fetcher.fetch(url, self.selectors)
+        if fetched.status >= 400:
+            raise RuntimeError(f"HTTP {fetched.status}")
+        result = await self._parse_html(fetched.html, fetched.url, "html")
+        if fetched.via != BROWSER and _is_empty(result):
+            # El host se aprendió como estático pero esta página puede
+            # necesitar JavaScript: renderizarla y, si da datos, reaprender
+            rendered = await self.fetcher.recheck(url, self.selectors)
+            if rendered is not None and 200 <= rendered.status < 300:
+                rendered_result = await self._parse_html(rendered.html, rendered.url, "html")
+                if not _is_empty(rendered_result):
+                    self.fetcher.policy.learn(url, BROWSER)
+                    result = rendered_result
+        await self._emit(url, depth, result)
+
+    async def _handle_snapshot(self, pool: BrowserPool, url: str, depth: int) -> None:
+        async with pool.page() as page:
+            await self._fetch(page, url)
+            with span("snapshot"):
+                html = await page.content()
+            final_url = page.url
+        # La página ya está libre para otra URL mientras se extrae
+        result = await self._parse_html(html, final_url, "snapshot")
+        await self._emit(url, depth, result)
+
+    async def _emit(self, url: str, depth: int, result) -> None:
+        if result is None:
+            result = PageResult()
+        elif not isinstance(result, PageResult):
+            result = PageResult(records=list(result))
+
+        links = []
+        if self.max_depth is None or depth < self.max_depth:
+            for link in result.links:
+                try:
+                    link = urljoin(url, link).split('#', 1)[0]
+                except ValueError:
+                    # Un enlace mal formado no debe hacer fallar la página
+                    METRICS.inc("invalid_urls_total")
+                    continue
+                if self._allowed(link):
+                    links.append(link)
+        added = await self.frontier.put_many(links, depth + 1) if links else []
+
+        # Sin await desde aquí: los registros y la página hecha entran
+        # juntos en el siguiente punto de control
+        records = result.records
+        if self.validator is not None:
+            records = self.validator.validate(records)
+        with span("export_write"):
+            for record in records:
+                self._writer.write(record)
+        self.stats.records += len(records)
+        METRICS.inc("records_total", len(records))
+        if self.checkpoint is not None:
+            for link in added:
+                self.checkpoint.seen(link, depth + 1)
+            self.checkpoint.page_done(url)
+
+    async def _worker(self, pool: BrowserPool) -> None:
+        while True:
+            url, depth = await self.frontier.get()
+            try:
+                if self.fetcher is not None:
+                    await self._handle_html(url, depth)
+                elif self.snapshot:
+                    await self._handle_snapshot(pool, url, depth)
+                else:
+                    async with pool.page() as page:
+                        await self._handle(page, url, depth)
+                self.stats.pages_ok += 1
+                METRICS.inc("pages_total", status="ok")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                attempts = self._attempts.get(url, 0) + 1
+                self._attempts[url] = attempts
+                if attempts <= self.max_retries:
+                    self.stats.retries += 1
+                    METRICS.inc("retries_total")
+                    if self.checkpoint is not None:
+                        self.checkpoint.attempt(url, attempts)
+                    # El backoff no retiene el hueco del host: `done` lo libera ya
+                    await self.frontier.retry(url, depth, delay=min(2 ** attempts, 30) * 0.5)
+                else:
+                    self._attempts.pop(url, None)
+                    self.stats.pages_failed += 1
+                    METRICS.inc("pages_total", status="failed")
+                    if self.checkpoint is not None:
+                        self.checkpoint.page_done(url, failed=True)
+                    print(f"❌ Error en {url}: {e}")
+            finally:
+                await self.frontier.done(url)
+
+    def _resume(self) -> bool:
+        """Cargar el punto de control; devuelve True si se reanuda un crawl."""
+        state = self.checkpoint.load()
+        if state is None:
+            self.checkpoint.reset(self.output_file)
+            return False
+
+        self.output_file = state.output_file or self.output_file
+        # Descartar lo escrito después del último punto de control
+        if os.path.exists(self.output_file) and os.path.getsize(self.output_file) > state.output_offset:
+            os.truncate(self.output_file, state.output_offset)
+        self.frontier.restore(self.checkpoint.iter_seen(), self.checkpoint.iter_pending())
+        self._attempts = dict(state.attempts)
+        self._exported = state.records
+        print(f"🔁 Reanudando crawl: {state.done} páginas hechas, "
+              f"{state.pending} pendientes, {state.records} registros en {self.output_file}")
+        return True
+
+    async def _metrics_loop(self, path: str) -> None:
+        while True:
+            await asyncio.sleep(float(self.config.get('metrics_interval', 10)))
+            METRICS.write_prometheus(path)
+
+    def _write_metrics(self) -> None:
+        if self.config.get('metrics_file'):
+            METRICS.write_prometheus(self.config['metrics_file'])
+        if self.config.get('metrics_summary'):
+            extra = {}
+            if self.validator is not None:
+                extra['validation'] = self.validator.report()
+            METRICS.write_summary(self.config['metrics_summary'], crawl={
+                'pages_ok': self.stats.pages_ok, 'pages_failed': self.stats.pages_failed,
+                'retries': self.stats.retries, 'records': self.stats.records,
+                'elapsed': round(self.stats.elapsed, 3),
+                'pages_per_second': round(self.stats.pages_per_second, 3),
+            }, **extra)
+
+    async def _checkpoint_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.checkpoint.interval)
+            await self.checkpoint.commit_async(self._writer, self._exported + self.stats.records)
+
+    async def run(self) -> CrawlStats:
+        """
+        Ejecutar el crawl hasta vaciar la frontera.
+
+        Returns:
+            Estadísticas de la ejecución
+        """
+        exporter = self.exporter
+        if self.checkpoint is not None and self._resume():
+            exporter = copy.copy(self.exporter)
+            exporter.append = True
+        else:
+            for url in self.start_urls:
+                if self.frontier.add(url) and self.checkpoint is not None:
+                    self.checkpoint.seen(url, 0)
+
+        own_pool = self.pool is None
+        pool = self.pool or BrowserPool(
+            contexts=int(self.config.get('contexts', 2)),
+            max_pages=self.concurrency,
+            max_navigations=int(self.config.get('max_navigations', 100)),
+            on_context=(lambda ctx: route_blocking(ctx, self.blocking)) if self.blocking else None,
+        )
+
+        self.stats = CrawlStats()
+        self._writer = exporter.open(self.output_file)
+        saver = None
+        reporter = None
+        server = METRICS.serve(int(self.config['metrics_port'])) if self.config.get('metrics_port') else None
+        finished = False
+        try:
+            if self.checkpoint is not None:
+                saver = asyncio.create_task(self._checkpoint_loop())
+            if self.config.get('metrics_file'):
+                reporter = asyncio.create_task(self._metrics_loop(self.config['metrics_file']))
+            await pool.start()
+            if self.fetcher is not None:
+                self.fetcher.pool = pool
+                cache = self.config.get('cache')
+                if cache:
+                    # Se abre en cada ejecución y se cierra al final para
+                    # guardar los accesos pendientes (orden LRU)
+                    self.fetcher.cache = ResponseCache(
+                        None if cache is True else cache,
+                        ttl=float(self.config.get('cache_ttl', 3600)),
+                    )
+                await self.fetcher.start()
+            n_workers = self.concurrency
+            if self.snapshot:
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+
+                # Procesos nuevos (spawn): no heredan el bucle ni los hilos del navegador
+                self._executor = ProcessPoolExecutor(
+                    self.parse_workers, mp_context=multiprocessing.get_context("spawn"))
+                # Workers de más para que haya extracciones en curso mientras
+                # las `concurrency` páginas del pool cargan las siguientes URLs
+                n_workers += self.parse_workers
+            workers = [asyncio.create_task(self._worker(pool))
+                       for _ in range(n_workers)]
+            try:
+                await self.frontier.join()
+                finished = True
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+        finally:
+            if saver is not None:
+                saver.cancel()
+                await asyncio.gather(saver, return_exceptions=True)
+                self.checkpoint.commit(self._writer, self._exported + self.stats.records, finished)
+                self.checkpoint.close()
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+            if self.fetcher is not None:
+                await self.fetcher.close()
+                if self.fetcher.cache is not None:
+                    self.fetcher.cache.close()
+                    self.fetcher.cache = None
+            if own_pool:
+                await pool.close()
+            with span("export_write"):
+                self._writer.close()
+            self.frontier.close()
+            self.stats.finished_at = time.monotonic()
+            if reporter is not None:
+                reporter.cancel()
+                await asyncio.gather(reporter, return_exceptions=True)
+            self._write_metrics()
+            if self.validator is not None:
+                print(f"📋 {self.validator.format_report()}")
+            if server is not None:
+                server.shutdown()
+
+        return self.stats
+
+
+def crawl(config: Dict[str, Any], parse: Optional[ParseCallback] = None,
+          exporter: Optional[BaseExporter] = None,
+          output_file: Optional[str] = None,
+          pool: Optional[BrowserPool] = None,
+          parse_html: Optional[HTMLParseCallback] = None) -> CrawlStats:
+    """Ejecutar un `Crawler` de forma síncrona."""
+    return asyncio.run(Crawler(config, parse, exporter, output_file, pool, parse_html).run())
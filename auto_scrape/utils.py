@@ -0,0 +1,156 @@
+"""
+Utilidades comunes de auto_scrape.
+"""
+
+import asyncio
+import hashlib
+import math
+import time
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Parámetros de seguimiento que no cambian el contenido de la página
+TRACKING_PARAMS = {"gclid", "gclsrc", "dclid", "fbclid", "msclkid", "yclid", "igshid",
+                   "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "ref_src", "spm"}
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_")
+
+
+def is_tracking_param(name: str) -> bool:
+    """Indicar si un parámetro de la query es de seguimiento (utm_*, gclid...)."""
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def normalize_url(url: str, strip_tracking: bool = True) -> Optional[str]:
+    """
+    Normalizar una URL para usarla como clave de caché o de deduplicación.
+
+    Pasa a minúsculas el esquema y el host, elimina el puerto por defecto,
+    el fragmento y (con `strip_tracking`) los parámetros de seguimiento,
+    ordena los parámetros de la query y usa '/' como ruta vacía.
+
+    Returns:
+        La URL normalizada, o None si no se puede analizar (puerto no
+        numérico o fuera de rango, host IPv6 mal formado...)
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    netloc = host if port is None or DEFAULT_PORTS.get(scheme) == port else f"{host}:{port}"
+    if parts.username:
+        userinfo = parts.username + (f":{parts.password}" if parts.password else "")
+        netloc = f"{userinfo}@{netloc}"
+    query = ""
+    if parts.query:
+        params = parse_qsl(parts.query, keep_blank_values=True)
+        if strip_tracking:
+            params = [(k, v) for k, v in params if not is_tracking_param(k)]
+        query = urlencode(sorted(params))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+class TokenBucket:
+    """
+    Limitador de tasa asíncrono (token bucket).
+
+    Se rellena a razón de `rate` unidades por minuto hasta `capacity`; cada
+    llamada a `acquire(n)` espera hasta que haya `n` unidades disponibles.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: Unidades por minuto (peticiones, tokens...)
+            capacity: Ráfaga máxima (por defecto, el consumo de un minuto)
+        """
+        self.rate = rate / 60.0
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1) -> None:
+        """Esperar hasta poder consumir `amount` unidades."""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom sobre un `bytearray`.
+
+    Responde "seguro que no está" o "puede que esté" con una tasa de falsos
+    positivos de `error_rate` mientras no se superen `capacity` elementos.
+    Ocupa unos 1,2 bytes por elemento con un 1 % de falsos positivos y
+    unos 1,8 bytes con un 0,1 %.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        """
+        Args:
+            capacity: Número de elementos previsto
+            error_rate: Tasa de falsos positivos con `capacity` elementos
+        """
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate debe estar entre 0 y 1")
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: bytes):
+        # Doble hashing (Kirsch-Mitzenmacher) a partir de un solo blake2b
+        digest = hashlib.blake2b(item, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: bytes) -> bool:
+        """
+        Añadir un elemento.
+
+        Returns:
+            True si el elemento ya podía estar en el filtro
+        """
+        present = True
+        bits = self.bits
+        for pos in self._positions(item):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not bits[byte] & mask:
+                present = False
+                bits[byte] |= mask
+        if not present:
+            self.count += 1
+        return present
+
+    def __contains__(self, item: bytes) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self.bits)
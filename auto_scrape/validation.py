@@ -0,0 +1,656 @@
+"""
+Validación y normalización de registros según el esquema de salida.
+
+El esquema sale del `description` de la configuración (el bloque
+`[{'name': ..., 'results': [{'position': Number, 'time': '00:01:30'}]}]`)
+o se indica directamente con nombres de tipo:
+
+    {'name': 'str', 'date': 'date', 'results': [{'position': 'int', 'time': 'duration'}]}
+
+Se compila a una función de Python sin recursión ni búsquedas por campo que
+valida y convierte lotes enteros de registros (`position` a entero, tiempos
+a `HH:MM:SS`...) y cuenta, por campo, los valores ausentes y los que no se
+pueden convertir. Esas tasas de fallo indican cuándo un extractor ha dejado
+de funcionar y pueden provocar su regeneración (`accepts`, `on_degraded`).
+"""
+
+import ast
+import json
+import re
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from .exporters import BaseExporter, RecordWriter
+from .extraction import parse_number
+from .metrics import METRICS, span
+
+
+TYPES = {"str", "int", "float", "bool", "date", "duration", "any"}
+# Nombres de tipo aceptados en el esquema o en la descripción
+TYPE_ALIASES = {
+    "str": "str", "string": "str", "text": "str", "texto": "str",
+    "int": "int", "integer": "int", "number": "int", "numero": "int", "número": "int",
+    "float": "float", "decimal": "float", "double": "float",
+    "bool": "bool", "boolean": "bool",
+    "date": "date", "fecha": "date",
+    "duration": "duration", "time": "duration", "duracion": "duration", "duración": "duration",
+    "any": "any", "null": "any", "none": "any",
+}
+
+Schema = Union[str, Dict[str, Any], List[Any]]
+
+_DURATION_SAMPLE_RE = re.compile(r"^\d{1,3}:\d{2}(:\d{2})?([.,]\d+)?$")
+_DATE_SAMPLE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_CLOCK_RE = re.compile(r"^(?:(\d+):)?(\d{1,2}):(\d{1,2}(?:[.,]\d+)?)$")
+_UNITS_RE = re.compile(r"^(?:(\d+)\s*h)?\s*(?:(\d+)\s*(?:m|min|'))?\s*(?:(\d+(?:[.,]\d+)?)\s*(?:s|seg|\"))?$", re.I)
+_DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%Y/%m/%d", "%d/%m/%y")
+
+# Valor de retorno de los conversores cuando el valor no es válido
+INVALID = object()
+
+
+# -- Conversores ----------------------------------------------------------
+
+def to_str(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return INVALID
+
+
+def to_int(value: Any) -> Any:
+    if isinstance(value, bool):
+        return INVALID
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else INVALID
+    if isinstance(value, str):
+        number = parse_number(value)
+        if number is not None and number.is_integer():
+            return int(number)
+    return INVALID
+
+
+def to_float(value: Any) -> Any:
+    if isinstance(value, bool):
+        return INVALID
+    if isinstance(value, int):
+        return float(value)
+    if isinstance(value, str):
+        number = parse_number(value)
+        if number is not None:
+            return number
+    return INVALID
+
+
+def to_bool(value: Any) -> Any:
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in ("true", "yes", "si", "sí", "1", "on"):
+            return True
+        if text in ("false", "no", "0", "off"):
+            return False
+    return INVALID
+
+
+def to_date(value: Any) -> Any:
+    """Fecha en formato ISO (`YYYY-MM-DD`)."""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()[:10]
+    if not isinstance(value, str):
+        return INVALID
+    text = value.strip()
+    if _DATE_SAMPLE_RE.match(text[:10]):
+        text = text[:10]  # ISO con hora
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return INVALID
+
+
+def format_duration(seconds: float) -> str:
+    """Duración en segundos como `HH:MM:SS` (con décimas si las hay)."""
+    whole = int(seconds)
+    hours, rest = divmod(whole, 3600)
+    text = f"{hours:02d}:{rest // 60:02d}:{rest % 60:02d}"
+    fraction = round(seconds - whole, 3)
+    return text + f"{fraction:.3f}"[1:].rstrip("0") if fraction else text
+
+
+def to_duration(value: Any) -> Any:
+    """Duración como `HH:MM:SS` a partir de `1:02:03`, `2:03`, `1h 2m 3s` o segundos."""
+    if isinstance(value, bool):
+        return INVALID
+    if isinstance(value, (int, float)):
+        return format_duration(value) if value >= 0 else INVALID
+    if not isinstance(value, str):
+        return INVALID
+    text = value.strip()
+    match = _CLOCK_RE.match(text)
+    if match:
+        hours, minutes, seconds = match.groups()
+        total = int(hours or 0) * 3600 + int(minutes) * 60 + float(seconds.replace(",", "."))
+        return format_duration(total)
+    match = _UNITS_RE.match(text)
+    if match and text and any(match.groups()):
+        hours, minutes, seconds = match.groups()
+        total = int(hours or 0) * 3600 + int(minutes or 0) * 60 + float((seconds or "0").replace(",", "."))
+        return format_duration(total)
+    return INVALID
+
+
+CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    "str": to_str, "int": to_int, "float": to_float, "bool": to_bool,
+    "date": to_date, "duration": to_duration,
+}
+# Tipos cuyo valor ya correcto no pasa por el conversor
+_EXACT = {"str": "str", "int": "int", "float": "float", "bool": "bool"}
+
+
+# -- Esquema --------------------------------------------------------------
+
+def normalize_schema(schema: Schema) -> Schema:
+    """
+    Validar un esquema y normalizar sus nombres de tipo.
+
+    Un esquema es un nombre de tipo, un diccionario de campos o una lista
+    de un elemento (lista de ese tipo). Una lista en la raíz equivale a su
+    elemento: el esquema describe cada registro.
+    """
+    if isinstance(schema, str):
+        type_ = TYPE_ALIASES.get(schema.strip().lower())
+        if type_ is None:
+            raise ValueError(f"Tipo no soportado en el esquema: {schema!r} ({', '.join(sorted(TYPES))})")
+        return type_
+    if isinstance(schema, dict):
+        return {str(key): normalize_schema(value) for key, value in schema.items()}
+    if isinstance(schema, list):
+        if len(schema) != 1:
+            raise ValueError("Las listas del esquema deben tener un único elemento")
+        return [normalize_schema(schema[0])]
+    raise ValueError(f"Esquema no válido: {schema!r}")
+
+
+def _sample_type(value: Any) -> Schema:
+    """Tipo a partir de un valor de ejemplo de la descripción."""
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str):
+        text = value.strip()
+        if text.lower() in TYPE_ALIASES:
+            return TYPE_ALIASES[text.lower()]
+        if _DURATION_SAMPLE_RE.match(text):
+            return "duration"
+        if _DATE_SAMPLE_RE.match(text):
+            return "date"
+        return "str"
+    return "any"
+
+
+def _merge(samples: List[Schema]) -> Schema:
+    """Unir los ejemplos de una lista (`[{...}, {...}]`) en un solo tipo de elemento."""
+    if samples and all(isinstance(s, dict) for s in samples):
+        merged: Dict[str, Schema] = {}
+        for sample in samples:
+            for key, value in sample.items():
+                merged.setdefault(key, value)
+        return merged
+    return samples[0] if samples else "any"
+
+
+def _from_ast(node: ast.AST) -> Schema:
+    if isinstance(node, ast.Dict):
+        return {_literal_key(k): _from_ast(v) for k, v in zip(node.keys, node.values) if k is not None}
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        return [_merge([_from_ast(e) for e in node.elts])]
+    if isinstance(node, ast.Constant):
+        return _sample_type(node.value)
+    if isinstance(node, ast.Name):
+        # Marcadores sin comillas: Number, Date, true...
+        if node.id in ("true", "false", "True", "False"):
+            return "bool"
+        return TYPE_ALIASES.get(node.id.lower(), "any")
+    return "any"
+
+
+def _literal_key(node: ast.AST) -> str:
+    if isinstance(node, ast.Constant):
+        return str(node.value)
+    if isinstance(node, ast.Name):
+        return node.id
+    raise ValueError("Las claves del esquema deben ser textos")
+
+
+def _blocks(text: str) -> Iterator[str]:
+    """Bloques `[...]` y `{...}` equilibrados del texto, en orden."""
+    for start, char in enumerate(text):
+        if char not in "[{":
+            continue
+        depth = 0
+        quote = None
+        for end in range(start, len(text)):
+            c = text[end]
+            if quote:
+                if c == quote and text[end - 1] != "\\":
+                    quote = None
+            elif c in "'\"":
+                quote = c
+            elif c in "[{(":
+                depth += 1
+            elif c in "]})":
+                depth -= 1
+                if depth == 0:
+                    yield text[start:end + 1]
+                    break
+
+
+def schema_from_description(description: str) -> Schema:
+    """
+    Esquema de registro a partir de la descripción en lenguaje natural.
+
+    Toma el primer bloque `[...]` o `{...}` que se pueda leer como literal
+    (admite comillas simples, comas finales y marcadores como `Number`) e
+    infiere el tipo de cada campo a partir del valor de ejemplo.
+
+    Raises:
+        ValueError: Si la descripción no contiene ningún esquema
+    """
+    for block in _blocks(description):
+        try:
+            tree = ast.parse(block, mode="eval").body
+        except SyntaxError:
+            continue
+        schema = _from_ast(tree)
+        if isinstance(schema, list):
+            schema = schema[0]
+        if isinstance(schema, dict) and schema:
+            return schema
+    raise ValueError("La descripción no contiene un esquema de salida reconocible")
+
+
+def load_schema(schema: Union[Schema, bool], description: Optional[str] = None) -> Schema:
+    """
+    Esquema de registro a partir de la configuración.
+
+    Args:
+        schema: Esquema (diccionario, lista o texto JSON), una descripción
+            en lenguaje natural, o True para usar `description`
+        description: Descripción de la configuración
+    """
+    if schema is True:
+        if not description:
+            raise ValueError("schema=True necesita una 'description' con el formato de salida")
+        schema = description
+    if isinstance(schema, str):
+        try:
+            schema = json.loads(schema)
+        except ValueError:
+            schema = schema_from_description(schema)
+    schema = normalize_schema(schema)
+    if isinstance(schema, list):
+        schema = schema[0]
+    if not isinstance(schema, dict):
+        raise ValueError("El esquema de un registro debe ser un diccionario de campos")
+    return schema
+
+
+# -- Compilación ----------------------------------------------------------
+
+class _Compiler:
+    """
+    Genera el código de `validate(records, keep, seen, missing, invalid)`,
+    que devuelve los registros conservados y cuántos tenían fallos.
+    """
+
+    def __init__(self):
+        self.paths: List[str] = []
+        self.lines: List[str] = []
+        self.namespace: Dict[str, Any] = {"INVALID": INVALID, "dict": dict, "list": list,
+                                          "isinstance": isinstance}
+
+    def emit(self, indent: int, line: str) -> None:
+        self.lines.append("    " * indent + line)
+
+    def index(self, path: str) -> int:
+        self.paths.append(path)
+        return len(self.paths) - 1
+
+    def converter(self, type_: str) -> str:
+        name = f"to_{type_}"
+        self.namespace[name] = CONVERTERS[type_]
+        return name
+
+    def fail(self, indent: int, counter: str, i: int) -> None:
+        self.emit(indent, f"{counter}[{i}] += 1")
+        self.emit(indent, "bad = True")
+
+    def compile(self, schema: Dict[str, Schema]) -> Callable:
+        record = self.index("")
+        self.emit(0, "def validate(records, keep, seen, missing, invalid):")
+        self.emit(1, "out = []")
+        self.emit(1, "failed = 0")
+        self.emit(1, "for d0 in records:")
+        self.emit(2, "bad = False")
+        self.emit(2, f"seen[{record}] += 1")
+        self.emit(2, "if not isinstance(d0, dict):")
+        self.emit(3, f"invalid[{record}] += 1")
+        self.emit(3, "failed += 1")
+        self.emit(3, "continue")
+        self.object(2, 0, schema, "")
+        self.emit(2, "if bad:")
+        self.emit(3, "failed += 1")
+        self.emit(3, "if not keep:")
+        self.emit(4, "continue")
+        self.emit(2, "out.append(d0)")
+        self.emit(1, "return out, failed")
+        source = "\n".join(self.lines)
+        exec(compile(source, "<validator>", "exec"), self.namespace)
+        self.namespace["__source__"] = source
+        return self.namespace["validate"]
+
+    def object(self, indent: int, depth: int, fields: Dict[str, Schema], prefix: str) -> None:
+        obj = f"d{depth}"
+        for key, node in fields.items():
+            path = f"{prefix}{key}"
+            i = self.index(path)
+            self.emit(indent, f"seen[{i}] += 1")
+            self.emit(indent, f"v = {obj}.get({key!r})")
+            self.emit(indent, "if v is None or v == '':")
+            self.emit(indent + 1, f"{obj}[{key!r}] = None")
+            self.fail(indent + 1, "missing", i)
+            if isinstance(node, str):
+                self.scalar(indent, f"{obj}[{key!r}]", node, i)
+            elif isinstance(node, dict):
+                self.emit(indent, "elif isinstance(v, dict):")
+                self.emit(indent + 1, f"d{depth + 1} = v")
+                self.object(indent + 1, depth + 1, node, f"{path}.")
+                self.invalid_else(indent, f"{obj}[{key!r}]", i)
+            else:
+                self.emit(indent, "elif isinstance(v, list):")
+                self.items(indent + 1, depth + 1, f"{obj}[{key!r}]", node[0], f"{path}[]")
+                self.invalid_else(indent, f"{obj}[{key!r}]", i)
+
+    def scalar(self, indent: int, target: str, type_: str, i: int) -> None:
+        if type_ == "any":
+            return
+        exact = _EXACT.get(type_)
+        self.emit(indent, f"elif v.__class__ is not {exact}:" if exact else "else:")
+        self.emit(indent + 1, f"v = {self.converter(type_)}(v)")
+        self.emit(indent + 1, "if v is INVALID:")
+        self.emit(indent + 2, f"{target} = None")
+        self.fail(indent + 2, "invalid", i)
+        self.emit(indent + 1, "else:")
+        self.emit(indent + 2, f"{target} = v")
+
+    def invalid_else(self, indent: int, target: str, i: int) -> None:
+        self.emit(indent, "else:")
+        self.emit(indent + 1, f"{target} = None")
+        self.fail(indent + 1, "invalid", i)
+
+    def items(self, indent: int, depth: int, target: str, node: Schema, path: str) -> None:
+        i = self.index(path)
+        item = f"d{depth}"
+        values = f"l{depth}"
+        if isinstance(node, dict):
+            # Lista de objetos: se reconstruye sin los elementos que no lo son
+            self.emit(indent, f"{values} = []")
+            self.emit(indent, f"for {item} in v:")
+            self.emit(indent + 1, f"seen[{i}] += 1")
+            self.emit(indent + 1, f"if not isinstance({item}, dict):")
+            self.fail(indent + 2, "invalid", i)
+            self.emit(indent + 2, "continue")
+            self.object(indent + 1, depth, node, f"{path}.")
+            self.emit(indent + 1, f"{values}.append({item})")
+            self.emit(indent, f"{target} = {values}")
+            return
+        if isinstance(node, list) or node == "any":
+            # Listas de listas o de cualquier cosa: solo se cuentan
+            self.emit(indent, f"seen[{i}] += len(v)")
+            return
+        # Lista de escalares: se reconstruye sin los valores ausentes o no válidos
+        exact = _EXACT.get(node)
+        self.emit(indent, f"{values} = []")
+        self.emit(indent, f"for {item} in v:")
+        self.emit(indent + 1, f"seen[{i}] += 1")
+        self.emit(indent + 1, f"if {item} is None or {item} == '':")
+        self.fail(indent + 2, "missing", i)
+        self.emit(indent + 2, "continue")
+        if exact:
+            self.emit(indent + 1, f"if {item}.__class__ is not {exact}:")
+        else:
+            self.emit(indent + 1, "if True:")
+        self.emit(indent + 2, f"{item} = {self.converter(node)}({item})")
+        self.emit(indent + 2, f"if {item} is INVALID:")
+        self.fail(indent + 3, "invalid", i)
+        self.emit(indent + 3, "continue")
+        self.emit(indent + 1, f"{values}.append({item})")
+        self.emit(indent, f"{target} = {values}")
+
+
+class RecordValidator:
+    """
+    Validador y conversor compilado de registros.
+
+    `validate` recorre un lote de registros y los corrige en el sitio: cada
+    campo del esquema se convierte a su tipo, y los ausentes o no
+    convertibles quedan a None y se cuentan por ruta (`results[].position`).
+    Los campos que no están en el esquema se conservan sin tocar.
+
+    Cuando la tasa de fallo acumulada de un campo supera
+    `max_failure_rate` (con al menos `min_records` valores vistos) se llama
+    una vez a `on_degraded(campo, informe)`: la señal para regenerar el
+    extractor. `accepts` aplica el mismo umbral a un único lote y sirve
+    como `validate` de `TemplateExtractors`.
+    """
+
+    def __init__(self, schema: Schema, drop_invalid: bool = False,
+                 max_failure_rate: float = 0.2, min_records: int = 50,
+                 on_degraded: Optional[Callable[[str, Dict[str, Any]], None]] = None):
+        """
+        Args:
+            schema: Esquema de cada registro (ver `load_schema`)
+            drop_invalid: Descartar los registros con algún campo ausente o no válido
+            max_failure_rate: Tasa de fallo máxima aceptable por campo
+            min_records: Valores vistos de un campo antes de avisar de su degradación
+            on_degraded: Función llamada cuando un campo supera la tasa de fallo
+        """
+        self.schema = load_schema(schema)
+        self.drop_invalid = drop_invalid
+        self.max_failure_rate = max_failure_rate
+        self.min_records = min_records
+        self.on_degraded = on_degraded
+        compiler = _Compiler()
+        self._validate = compiler.compile(self.schema)
+        self.source: str = compiler.namespace["__source__"]
+        self.paths = compiler.paths
+        size = len(self.paths)
+        self.seen = [0] * size
+        self.missing = [0] * size
+        self.invalid = [0] * size
+        self.invalid_records = 0
+        self._degraded: set = set()
+
+    @classmethod
+    def from_description(cls, description: str, **kwargs) -> "RecordValidator":
+        """Validador con el esquema incluido en la descripción de la configuración."""
+        return cls(schema_from_description(description), **kwargs)
+
+    def _run(self, records: List[Dict[str, Any]], keep: bool):
+        size = len(self.paths)
+        seen, missing, invalid = [0] * size, [0] * size, [0] * size
+        out, failed = self._validate(records, keep, seen, missing, invalid)
+        return out, failed, seen, missing, invalid
+
+    def validate(self, records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Validar y convertir un lote de registros.
+
+        Returns:
+            Los registros convertidos (sin los no válidos si `drop_invalid`)
+        """
+        if not isinstance(records, list):
+            records = list(records)
+        with span("validate"):
+            out, failed, seen, missing, invalid = self._run(records, not self.drop_invalid)
+            self._accumulate(failed, seen, missing, invalid)
+        return out
+
+    def _accumulate(self, failed: int, seen, missing, invalid) -> None:
+        self.invalid_records += failed
+        for i, path in enumerate(self.paths):
+            if not seen[i]:
+                continue
+            self.seen[i] += seen[i]
+            if missing[i]:
+                self.missing[i] += missing[i]
+                METRICS.inc("validation_failures_total", missing[i], field=path or "<record>", reason="missing")
+            if invalid[i]:
+                self.invalid[i] += invalid[i]
+                METRICS.inc("validation_failures_total", invalid[i], field=path or "<record>", reason="invalid")
+        METRICS.inc("validation_records_total", seen[0] - failed, status="valid")
+        if failed:
+            METRICS.inc("validation_records_total", failed, status="invalid")
+        self._check_degraded()
+
+    def failure_rate(self, path: str) -> float:
+        """Tasa de fallo acumulada (ausentes + no válidos) de un campo."""
+        i = self.paths.index(path)
+        return (self.missing[i] + self.invalid[i]) / self.seen[i] if self.seen[i] else 0.0
+
+    def degraded(self) -> List[str]:
+        """Campos cuya tasa de fallo acumulada supera `max_failure_rate`."""
+        return [path for i, path in enumerate(self.paths)
+                if self.seen[i] >= self.min_records
+                and (self.missing[i] + self.invalid[i]) / self.seen[i] > self.max_failure_rate]
+
+    def _check_degraded(self) -> None:
+        for path in self.degraded():
+            if path in self._degraded:
+                continue
+            self._degraded.add(path)
+            print(f"⚠️  Campo {path or '<registro>'!r}: {self.failure_rate(path):.0%} de valores "
+                  f"ausentes o no válidos")
+            if self.on_degraded is not None:
+                self.on_degraded(path, self.report())
+
+    def accepts(self, records: Any) -> bool:
+        """
+        Validación de un lote para `TemplateExtractors(validate=...)`.
+
+        Convierte los registros en el sitio y los acepta si es una lista no
+        vacía de diccionarios en la que ningún campo supera `max_failure_rate`.
+        """
+        if not isinstance(records, list) or not records:
+            return False
+        _, _, seen, missing, invalid = self._run(records, True)
+        if invalid[0]:
+            return False
+        return all((missing[i] + invalid[i]) <= self.max_failure_rate * seen[i]
+                   for i in range(1, len(self.paths)))
+
+    def report(self) -> Dict[str, Any]:
+        """Recuento y tasa de fallo por campo."""
+        fields = {}
+        for i, path in enumerate(self.paths[1:], start=1):
+            failed = self.missing[i] + self.invalid[i]
+            fields[path] = {
+                "seen": self.seen[i],
+                "missing": self.missing[i],
+                "invalid": self.invalid[i],
+                "failure_rate": round(failed / self.seen[i], 4) if self.seen[i] else 0.0,
+            }
+        return {
+            "records": self.seen[0],
+            "invalid_records": self.invalid_records,
+            "fields": fields,
+            "degraded": self.degraded(),
+        }
+
+    def format_report(self) -> str:
+        """Resumen legible de los campos con fallos."""
+        report = self.report()
+        failing = [f"{path} {stats['failure_rate']:.1%} ({stats['missing']} ausentes, "
+                   f"{stats['invalid']} no válidos)"
+                   for path, stats in report["fields"].items()
+                   if stats["missing"] or stats["invalid"]]
+        head = f"{report['records']} registros validados"
+        return f"{head}; " + "; ".join(failing) if failing else f"{head} sin fallos"
+
+
+class ValidatingExporter(BaseExporter):
+    """
+    Exportador que valida y convierte los registros antes de pasarlos a
+    otro exportador, en lotes de `batch_size`.
+    """
+
+    def __init__(self, exporter: BaseExporter, validator: RecordValidator, batch_size: int = 500):
+        """
+        Args:
+            exporter: Exportador que recibe los registros validados
+            validator: Validador compilado
+            batch_size: Registros por lote de validación
+        """
+        self.exporter = exporter
+        self.validator = validator
+        self.batch_size = max(1, batch_size)
+
+    def _batches(self, data: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        batch: List[Dict[str, Any]] = []
+        for record in data:
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                yield from self.validator.validate(batch)
+                batch = []
+        if batch:
+            yield from self.validator.validate(batch)
+
+    def export(self, data: Iterable[Dict[str, Any]], output_file: str) -> str:
+        return self.exporter.export(self._batches(data), output_file)
+
+    def open(self, output_file: str) -> "ValidatingWriter":
+        return ValidatingWriter(self.exporter.open(output_file), self.validator, self.batch_size)
+
+
+class ValidatingWriter:
+    """Escritor que valida los registros por lotes antes de escribirlos."""
+
+    def __init__(self, writer: RecordWriter, validator: RecordValidator, batch_size: int = 500):
+        self.writer = writer
+        self.validator = validator
+        self.batch_size = batch_size
+        self._batch: List[Dict[str, Any]] = []
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._batch.append(record)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        batch, self._batch = self._batch, []
+        for record in self.validator.validate(batch):
+            self.writer.write(record)
+
+    def close(self) -> str:
+        self.flush()
+        return self.writer.close()
+
+    def abort(self) -> None:
+        self._batch = []
+        self.writer.abort()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
@@ -0,0 +1,111 @@
+"""
+Presupuesto de tiempo de importación de auto_scrape.
+
+Importa cada módulo en un intérprete nuevo con `-X importtime` y comprueba
+que el tiempo acumulado (mediana de varias ejecuciones) no supera su
+presupuesto y que no arrastra dependencias pesadas que solo deberían
+cargarse al usarse (openai, Playwright, aiohttp, pyarrow...).
+
+Uso:
+    python -m benchmarks.importtime               # termina con código 1 si se supera algún límite
+    python -m benchmarks.importtime --scale 2     # presupuestos x2 en máquinas lentas
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = ("openai", "playwright", "aiohttp", "pyarrow", "tiktoken", "bs4", "lxml", "http.server")
+
+# Módulo -> (presupuesto en ms, dependencias que no debe importar)
+BUDGETS: Dict[str, Tuple[float, Tuple[str, ...]]] = {
+    "auto_scrape": (10, HEAVY_MODULES + ("asyncio", "typing", "auto_scrape.exporters")),
+    "auto_scrape.exporters": (80, HEAVY_MODULES + ("asyncio",)),
+    "auto_scrape.metrics": (80, HEAVY_MODULES + ("asyncio",)),
+    "auto_scrape.ai_assistant": (200, HEAVY_MODULES),
+    "auto_scrape.scraper": (250, HEAVY_MODULES),
+}
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    # Con bytecode en caché, como en una instalación normal
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    return env
+
+
+def import_profile(module: str) -> Tuple[float, List[str]]:
+    """
+    Importar `module` en un intérprete nuevo.
+
+    Returns:
+        Tiempo acumulado de la importación (ms) y módulos importados por ella
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env=_env(), cwd=str(ROOT))
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    imported: List[str] = []
+    cumulative = 0.0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumul, name = line[len("import time:"):].split("|")
+        imported.append(name.strip())
+        if name.strip() == module:
+            cumulative = int(cumul) / 1000
+    return cumulative, imported
+
+
+def forbidden_imports(imported: List[str], forbidden: Tuple[str, ...]) -> List[str]:
+    """Módulos de `imported` que son (o cuelgan de) alguno de `forbidden`."""
+    return sorted(m for m in imported if any(m == f or m.startswith(f + ".") for f in forbidden))
+
+
+def check(runs: int = 5, scale: float = 1.0) -> List[Dict]:
+    """Medir cada módulo de `BUDGETS` y devolver los resultados con sus infracciones."""
+    results = []
+    for module, (budget, forbidden) in BUDGETS.items():
+        import_profile(module)  # Calentar la caché de bytecode
+        samples = []
+        imported: List[str] = []
+        for _ in range(runs):
+            ms, imported = import_profile(module)
+            samples.append(ms)
+        median = statistics.median(samples)
+        heavy = forbidden_imports(imported, forbidden)
+        results.append({
+            "module": module,
+            "ms": round(median, 1),
+            "budget_ms": budget * scale,
+            "forbidden": heavy,
+            "ok": median <= budget * scale and not heavy,
+        })
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Presupuesto de tiempo de importación")
+    parser.add_argument("--runs", type=int, default=5, help="Ejecuciones por módulo (se usa la mediana)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplicador de los presupuestos")
+    args = parser.parse_args()
+
+    results = check(args.runs, args.scale)
+    for r in results:
+        icon = "✅" if r["ok"] else "❌"
+        line = f"{icon} {r['module']}: {r['ms']:.1f} ms (presupuesto {r['budget_ms']:.0f} ms)"
+        if r["forbidden"]:
+            line += f", importa {', '.join(r['forbidden'])}"
+        print(line)
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
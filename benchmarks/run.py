@@ -0,0 +1,499 @@
+"""
+Benchmarks de auto_scrape contra el sitio sintético de `benchmarks.site`.
+
+Cada caso se ejecuta en un subproceso para medir su pico de memoria por
+separado. Los casos cuyas dependencias no están instaladas (Playwright,
+aiohttp, pyarrow) se registran como omitidos.
+
+Uso:
+    python -m benchmarks.run                           # todas las suites
+    python -m benchmarks.run --suite exporters crawl --pages 2000
+    python -m benchmarks.run compare antes.json despues.json --threshold 0.1
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import json
+import math
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.site import FixtureSite, SiteConfig, product  # noqa: E402
+
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# Métricas en las que más es mejor; en el resto (latencias, memoria, tiempo) menos es mejor
+HIGHER_IS_BETTER = {"pages_per_sec", "records_per_sec", "mb_per_sec", "urls_per_sec"}
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Percentil `q` (0-100) por rango más cercano."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def peak_rss_mb() -> float:
+    """Pico de memoria residente del proceso actual (MB)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def latency_metrics(latencies: Sequence[float], elapsed: float, pages: int) -> Dict[str, float]:
+    return {
+        "pages": pages,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(pages / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Motor de crawling
+# ---------------------------------------------------------------------------
+
+_LINK_RE = re.compile(r"href='(/(?:item/\d+|list\?page=\d+))'")
+_TITLE_RE = re.compile(r"<h1 class='title'>(.*?)</h1>")
+_PRICE_RE = re.compile(r"<span class='price'>([\d.]+)</span>")
+
+PARSE_SCRIPT = """() => ({
+    links: [...document.querySelectorAll('a.product-link, a.next')].map(a => a.href),
+    title: document.querySelector('h1.title')?.textContent ?? null,
+    price: parseFloat(document.querySelector('.price')?.textContent ?? 'NaN'),
+})"""
+
+
+def parse_html(html: str, url: str):
+    from auto_scrape.scraper import PageResult
+
+    title = _TITLE_RE.search(html)
+    price = _PRICE_RE.search(html)
+    records = [{"url": url, "title": title.group(1),
+                "price": float(price.group(1)) if price else None}] if title else []
+    return PageResult(records, _LINK_RE.findall(html))
+
+
+async def parse_page(page, url: str):
+    from auto_scrape.scraper import PageResult
+
+    data = await page.evaluate(PARSE_SCRIPT)
+    records = [{"url": url, "title": data["title"], "price": data["price"]}] if data["title"] else []
+    return PageResult(records, data["links"])
+
+
+def _timed_crawler():
+    from auto_scrape.scraper import Crawler
+
+    class TimedCrawler(Crawler):
+        """Crawler que guarda la latencia de cada página procesada."""
+
+        latencies: List[float]
+
+        async def _handle(self, page, url, depth):
+            started = time.perf_counter()
+            await super()._handle(page, url, depth)
+            self.latencies.append(time.perf_counter() - started)
+
+        async def _handle_html(self, url, depth):
+            started = time.perf_counter()
+            await super()._handle_html(url, depth)
+            self.latencies.append(time.perf_counter() - started)
+
+    return TimedCrawler
+
+
+def bench_crawl(case: str, site_url: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Crawl completo del catálogo: `http` (fetch='auto') o `browser`."""
+    from auto_scrape.exporters import JSONExporter
+
+    if case == "http":
+        import aiohttp  # noqa: F401
+    else:
+        import playwright  # noqa: F401
+
+    config = {
+        "start_urls": [site_url + "/list?page=1"],
+        "max_depth": None,
+        "concurrency": options["concurrency"],
+        "per_host": options["concurrency"],
+        "max_retries": 3,
+        "selectors": [".product", ".products"],
+        "block": "light",
+    }
+    if case == "http":
+        config.update({"fetch": "auto", "render": {"127.0.0.1*": "http"}})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        crawler = _timed_crawler()(
+            config, parse_page, JSONExporter(lines=True), os.path.join(tmp, "out.jsonl"),
+            parse_html=parse_html if case == "http" else None,
+        )
+        crawler.latencies = []
+        started = time.perf_counter()
+        stats = asyncio.run(crawler.run())
+        elapsed = time.perf_counter() - started
+
+    metrics = latency_metrics(crawler.latencies, elapsed, stats.pages_ok)
+    metrics.update({"records": stats.records, "failed": stats.pages_failed, "retries": stats.retries})
+    return metrics
+
+
+def bench_frontier(case: str, site_url: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Alta y extracción de URLs en la frontera (`exact` o `compact`)."""
+    from auto_scrape.scraper import URLFrontier
+
+    count = options["urls"]
+
+    async def run() -> float:
+        frontier = URLFrontier(per_host=1_000_000, expected_urls=count if case == "compact" else None)
+        started = time.perf_counter()
+        for i in range(count):
+            frontier.add(f"{site_url}/item/{i}?utm_source=bench&page={i % 40}")
+        for i in range(0, count, 10):
+            frontier.add(f"{site_url}/item/{i}?page={i % 40}#dup")
+        for _ in range(count):
+            url, _ = await frontier.get()
+            await frontier.done(url)
+        elapsed = time.perf_counter() - started
+        frontier.close()
+        return elapsed
+
+    elapsed = asyncio.run(run())
+    return {"urls": count, "seconds": round(elapsed, 3), "urls_per_sec": round(count / elapsed, 1)}
+
+
+def bench_pagination(case: str, site_url: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Recorrido del listado con `paginate` (`prefetch-N`)."""
+    from auto_scrape.browser import BrowserPool
+    from auto_scrape.pagination import paginate
+
+    prefetch = int(case.split("-")[1])
+
+    async def extract(page, url):
+        return await page.eval_on_selector_all("a.product-link", "els => els.map(e => e.href)")
+
+    async def run():
+        latencies = []
+        async with BrowserPool(contexts=1, max_pages=prefetch + 1) as pool:
+            started = last = time.perf_counter()
+            pages = 0
+            async with contextlib.aclosing(paginate(pool, site_url + "/list?page=1", extract,
+                                                    prefetch=prefetch)) as listing:
+                async for _ in listing:
+                    now = time.perf_counter()
+                    latencies.append(now - last)
+                    last = now
+                    pages += 1
+            return latencies, time.perf_counter() - started, pages
+
+    latencies, elapsed, pages = asyncio.run(run())
+    return latency_metrics(latencies, elapsed, pages)
+
+
+# ---------------------------------------------------------------------------
+# Plantillas generadas
+# ---------------------------------------------------------------------------
+
+def _load_template(create: Callable, tmp: str, name: str, *args):
+    """Generar una plantilla en `tmp/user_scripts` e importarla como módulo."""
+    os.makedirs(os.path.join(tmp, "user_scripts"), exist_ok=True)
+    os.chdir(tmp)
+    path = create(name, *args)
+    spec = importlib.util.spec_from_file_location(name[:-3], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def bench_templates(case: str, site_url: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Plantillas de `SandboxUtils` contra el sitio (`basic` o `async`)."""
+    import playwright  # noqa: F401
+
+    sys.path.insert(0, str(ROOT / "sandbox"))
+    from utils import SandboxUtils
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["AUTO_SCRAPE_CACHE_DIR"] = os.path.join(tmp, "cache")
+        if case == "basic":
+            module = _load_template(SandboxUtils.create_basic_scraper_template, tmp,
+                                    "bench_basic.py", site_url + "/item/0")
+            module.READY_SELECTORS = [".product"]
+            latencies = []
+            started = time.perf_counter()
+            for _ in range(options["runs"]):
+                run_started = time.perf_counter()
+                module.scrape_data()
+                latencies.append(time.perf_counter() - run_started)
+            return latency_metrics(latencies, time.perf_counter() - started, options["runs"])
+
+        module = _load_template(SandboxUtils.create_async_scraper_template, tmp, "bench_async.py")
+        module.URLS = [f"{site_url}/item/{i}" for i in range(options["template_urls"])]
+        module.OUTPUT_FILE = os.path.join(tmp, "out.jsonl")
+        module.METRICS_FILE = os.path.join(tmp, "metrics.json")
+        module.READY_SELECTORS = [".product"]
+        started = time.perf_counter()
+        asyncio.run(module.main())
+        elapsed = time.perf_counter() - started
+        return latency_metrics([], elapsed, len(module.URLS))
+
+
+# ---------------------------------------------------------------------------
+# Exportadores
+# ---------------------------------------------------------------------------
+
+def _exporter(case: str):
+    from auto_scrape import exporters
+
+    factories = {
+        "json": lambda: exporters.JSONExporter(),
+        "jsonl": lambda: exporters.JSONExporter(lines=True),
+        "jsonl-gzip": lambda: exporters.JSONExporter(lines=True, compression="gzip"),
+        "jsonl-zstd": lambda: exporters.JSONExporter(lines=True, compression="zstd"),
+        "jsonl-shards": lambda: exporters.JSONExporter(lines=True, compression="gzip",
+                                                       max_records=10000),
+        "csv": lambda: exporters.CSVExporter(),
+        "csv-child": lambda: exporters.CSVExporter(lists="child"),
+        "csv-gzip": lambda: exporters.CSVExporter(compression="gzip"),
+        "parquet": lambda: exporters.ParquetExporter(),
+        "arrow": lambda: exporters.ArrowExporter(),
+    }
+    return factories[case]()
+
+
+def bench_exporters(case: str, site_url: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Exportación de registros anidados con cada exportador."""
+    if case in ("parquet", "arrow"):
+        import pyarrow  # noqa: F401
+    if case.endswith("-zstd"):
+        import zstandard  # noqa: F401
+
+    config = SiteConfig(page_kb=0)
+    count = options["records"]
+    records = []
+    for i in range(count):
+        record = product(i, config)
+        record["description"] = record["description"][:200]
+        record["offers"] = [{"seller": f"tienda_{k}", "price": record["price"] + k}
+                            for k in range(i % 4)]
+        records.append(record)
+
+    exporter = _exporter(case)
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, f"out.{case}")
+        started = time.perf_counter()
+        exporter.export(records, output)
+        elapsed = time.perf_counter() - started
+        size = sum(f.stat().st_size for f in Path(tmp).iterdir())
+
+    return {
+        "records": count,
+        "bytes": size,
+        "seconds": round(elapsed, 3),
+        "records_per_sec": round(count / elapsed, 1),
+        "mb_per_sec": round(size / elapsed / 1e6, 2),
+    }
+
+
+SUITES: Dict[str, Dict[str, Any]] = {
+    "crawl": {"run": bench_crawl, "cases": ["http", "browser"], "site": True},
+    "frontier": {"run": bench_frontier, "cases": ["exact", "compact"], "site": False},
+    "pagination": {"run": bench_pagination, "cases": ["prefetch-0", "prefetch-1", "prefetch-2"],
+                   "site": True},
+    "templates": {"run": bench_templates, "cases": ["basic", "async"], "site": True},
+    "exporters": {"run": bench_exporters,
+                  "cases": ["json", "jsonl", "jsonl-gzip", "jsonl-zstd", "jsonl-shards",
+                            "csv", "csv-child", "csv-gzip", "parquet", "arrow"], "site": False},
+}
+
+
+def run_case(suite: str, case: str, site_url: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Ejecutar un caso en el proceso actual y devolver su resultado."""
+    result: Dict[str, Any] = {"suite": suite, "case": case}
+    try:
+        metrics = SUITES[suite]["run"](case, site_url, options)
+    except ModuleNotFoundError as e:
+        result.update(status="skipped", reason=f"Falta la dependencia {e.name}")
+        return result
+    except Exception as e:
+        result.update(status="error", reason=f"{type(e).__name__}: {e}")
+        return result
+    metrics["peak_rss_mb"] = peak_rss_mb()
+    result.update(status="ok", metrics=metrics)
+    return result
+
+
+def run_case_subprocess(suite: str, case: str, site_url: str, options: Dict[str, Any],
+                        timeout: float) -> Dict[str, Any]:
+    cmd = [sys.executable, "-m", "benchmarks.run", "_case", suite, case, site_url, json.dumps(options)]
+    try:
+        proc = subprocess.run(cmd, cwd=str(ROOT), capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"suite": suite, "case": case, "status": "error", "reason": f"Timeout ({timeout:.0f}s)"}
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    return {"suite": suite, "case": case, "status": "error",
+            "reason": (proc.stderr.strip().splitlines() or ["sin salida"])[-1]}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=str(ROOT),
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               cwd=str(ROOT), capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _format_metrics(metrics: Dict[str, Any]) -> str:
+    keys = ["pages_per_sec", "urls_per_sec", "records_per_sec", "mb_per_sec",
+            "p50_ms", "p99_ms", "peak_rss_mb"]
+    return "  ".join(f"{k}={metrics[k]}" for k in keys if k in metrics)
+
+
+def run_benchmarks(args) -> Dict[str, Any]:
+    site_config = SiteConfig(pages=args.pages, per_page=args.per_page, page_kb=args.page_kb,
+                             mode=args.mode, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                             error_rate=args.error_rate, seed=args.seed)
+    options = {"concurrency": args.concurrency, "records": args.records, "urls": args.urls,
+               "runs": args.runs, "template_urls": args.template_urls}
+    report: Dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "site": asdict(site_config),
+            "options": options,
+        },
+        "results": [],
+    }
+
+    suites = args.suite or list(SUITES)
+    with FixtureSite(site_config) as site:
+        for suite in suites:
+            for case in SUITES[suite]["cases"]:
+                if args.case and case not in args.case:
+                    continue
+                print(f"⏱️  {suite}/{case}...", flush=True)
+                result = run_case_subprocess(suite, case, site.url("").rstrip("/"), options, args.timeout)
+                report["results"].append(result)
+                if result["status"] == "ok":
+                    print(f"   ✅ {_format_metrics(result['metrics'])}")
+                elif result["status"] == "skipped":
+                    print(f"   ⏭️  Omitido: {result['reason']}")
+                else:
+                    print(f"   ❌ {result['reason']}")
+    return report
+
+
+def compare(base_path: str, new_path: str, threshold: float) -> int:
+    """
+    Comparar dos informes y devolver 1 si alguna métrica empeora más de
+    `threshold` (proporción) respecto a la base.
+    """
+    with open(base_path, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"Base: {base['meta'].get('commit')}  Nuevo: {new['meta'].get('commit')}")
+    for key in ("site", "options"):
+        if base["meta"].get(key) != new["meta"].get(key):
+            print(f"⚠️  Los informes usan parámetros distintos ({key}): la comparación puede no ser válida")
+
+    base_results = {(r["suite"], r["case"]): r for r in base["results"] if r["status"] == "ok"}
+    regressions = 0
+    for result in new["results"]:
+        key = (result["suite"], result["case"])
+        if result["status"] != "ok" or key not in base_results:
+            continue
+        for name, value in result["metrics"].items():
+            old = base_results[key]["metrics"].get(name)
+            if not isinstance(value, (int, float)) or not old:
+                continue
+            change = (value - old) / old
+            worse = -change if name in HIGHER_IS_BETTER else change
+            # El tiempo total depende del tamaño del caso: se comparan ritmos, latencias y memoria
+            if name in HIGHER_IS_BETTER or name.endswith(("_ms", "_mb")):
+                mark = "❌" if worse > threshold else ("✅" if worse < -threshold else "  ")
+                regressions += worse > threshold
+                print(f"{mark} {key[0]}/{key[1]} {name}: {old} → {value} ({change:+.1%})")
+    print(f"{regressions} regresiones por encima del {threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    if len(sys.argv) > 1 and sys.argv[1] == "_case":
+        _, _, suite, case, site_url, options = sys.argv
+        print(json.dumps(run_case(suite, case, site_url, json.loads(options))))
+        return 0
+    if len(sys.argv) > 1 and sys.argv[1] == "compare":
+        parser = argparse.ArgumentParser(prog="benchmarks.run compare")
+        parser.add_argument("base")
+        parser.add_argument("new")
+        parser.add_argument("--threshold", type=float, default=0.10,
+                            help="Empeoramiento tolerado (0.10 = 10 %%)")
+        args = parser.parse_args(sys.argv[2:])
+        return compare(args.base, args.new, args.threshold)
+
+    parser = argparse.ArgumentParser(description="Benchmarks de auto_scrape")
+    parser.add_argument("--suite", nargs="+", choices=list(SUITES), help="Suites a ejecutar")
+    parser.add_argument("--case", nargs="+", help="Casos a ejecutar (por defecto, todos)")
+    parser.add_argument("--pages", type=int, default=500, help="Productos del sitio")
+    parser.add_argument("--per-page", type=int, default=20, help="Productos por página de listado")
+    parser.add_argument("--page-kb", type=int, default=30, help="Tamaño aproximado de cada ficha")
+    parser.add_argument("--mode", choices=["static", "js"], default="static",
+                        help="Fichas en HTML estático o renderizadas con JS")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latencia añadida por respuesta")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Variación de la latencia")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Proporción de respuestas 500")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrencia del crawler")
+    parser.add_argument("--records", type=int, default=50_000, help="Registros por exportador")
+    parser.add_argument("--urls", type=int, default=200_000, help="URLs para la frontera")
+    parser.add_argument("--runs", type=int, default=5, help="Ejecuciones de la plantilla básica")
+    parser.add_argument("--template-urls", type=int, default=50, help="URLs de la plantilla asíncrona")
+    parser.add_argument("--timeout", type=float, default=900, help="Tiempo máximo por caso (s)")
+    parser.add_argument("--quick", action="store_true",
+                        help="Tamaños reducidos para una comprobación rápida")
+    parser.add_argument("--output", help="Archivo JSON de resultados (por defecto en benchmarks/results/)")
+    args = parser.parse_args()
+    if args.quick:
+        args.pages, args.records, args.urls = min(args.pages, 100), min(args.records, 5000), min(args.urls, 20_000)
+        args.runs, args.template_urls = min(args.runs, 2), min(args.template_urls, 10)
+
+    report = run_benchmarks(args)
+    output = Path(args.output) if args.output else RESULTS_DIR / (
+        f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{report['meta']['commit'] or 'nogit'}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"💾 Resultados guardados en: {output}")
+    return 1 if any(r["status"] == "error" for r in report["results"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
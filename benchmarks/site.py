@@ -0,0 +1,233 @@
+"""
+Sitio sintético para los benchmarks.
+
+Sirve un catálogo paginado de productos generado de forma determinista:
+
+- `/` enlaza a la primera página del listado.
+- `/list?page=N` muestra `per_page` productos y un enlace `rel=next`.
+- `/item/<i>` es la ficha de un producto (título, precio, tabla de
+  características y una descripción de relleno hasta `page_kb` KB). En modo
+  `js` la ficha llega vacía y la construye un script a partir de un JSON.
+
+Cada respuesta puede retrasarse (`latency_ms` ± `jitter_ms`) y fallar con
+un 500 con probabilidad `error_rate`.
+"""
+
+import argparse
+import html
+import json
+import multiprocessing
+import random
+import socket
+import time
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+
+@dataclass
+class SiteConfig:
+    """Parámetros del sitio sintético."""
+
+    pages: int = 500
+    per_page: int = 20
+    page_kb: int = 30
+    mode: str = "static"
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 1234
+
+    @property
+    def list_pages(self) -> int:
+        return max(1, -(-self.pages // self.per_page))
+
+
+_WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+          "incididunt ut labore et dolore magna aliqua").split()
+
+
+def product(i: int, config: SiteConfig) -> Dict:
+    """Datos del producto `i` (deterministas para una semilla)."""
+    rng = random.Random(config.seed * 1_000_003 + i)
+    filler_words = max(1, config.page_kb * 1024 // 6)
+    return {
+        "id": i,
+        "title": f"Producto {i} " + " ".join(rng.choice(_WORDS) for _ in range(3)),
+        "price": round(rng.uniform(1, 500), 2),
+        "stock": rng.randint(0, 100),
+        "tags": rng.sample(_WORDS, 3),
+        "specs": {f"spec_{k}": rng.choice(_WORDS) for k in range(6)},
+        "description": " ".join(rng.choice(_WORDS) for _ in range(filler_words)),
+    }
+
+
+def _layout(title: str, body: str, head: str = "") -> str:
+    return (f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(title)}</title>"
+            f"<link rel='stylesheet' href='/static/site.css'>{head}</head>"
+            f"<body><header class='nav'><a href='/'>Inicio</a></header>{body}"
+            f"<footer class='footer'>Sitio de benchmark</footer></body></html>")
+
+
+def render_list(page: int, config: SiteConfig) -> str:
+    start = (page - 1) * config.per_page
+    items = "".join(
+        f"<li class='product-card'><a class='product-link' href='/item/{i}'>Producto {i}</a>"
+        f"<img src='/static/thumb/{i}.png' alt=''></li>"
+        for i in range(start, min(start + config.per_page, config.pages))
+    )
+    head = ""
+    nav = ""
+    if page < config.list_pages:
+        head = f"<link rel='next' href='/list?page={page + 1}'>"
+        nav = f"<a class='next' rel='next' href='/list?page={page + 1}'>Siguiente</a>"
+    return _layout(f"Listado {page}", f"<ul class='products'>{items}</ul><nav class='pagination'>{nav}</nav>", head)
+
+
+def render_item(i: int, config: SiteConfig) -> str:
+    data = product(i, config)
+    if config.mode == "js":
+        script = (
+            "const d = " + json.dumps(data) + ";"
+            "const rows = Object.entries(d.specs).map(([k, v]) => `<tr><th>${k}</th><td>${v}</td></tr>`).join('');"
+            "document.getElementById('app').innerHTML = `<article class='product'>"
+            "<h1 class='title'>${d.title}</h1><span class='price'>${d.price}</span>"
+            "<span class='stock'>${d.stock}</span><table class='specs'>${rows}</table>"
+            "<div class='description'>${d.description}</div></article>`;"
+        )
+        body = f"<div id='app'></div><script>{script}</script>"
+    else:
+        rows = "".join(f"<tr><th>{k}</th><td>{v}</td></tr>" for k, v in data["specs"].items())
+        body = (f"<article class='product'><h1 class='title'>{html.escape(data['title'])}</h1>"
+                f"<span class='price'>{data['price']}</span><span class='stock'>{data['stock']}</span>"
+                f"<ul class='tags'>{''.join(f'<li>{t}</li>' for t in data['tags'])}</ul>"
+                f"<table class='specs'>{rows}</table>"
+                f"<div class='description'>{data['description']}</div></article>")
+    return _layout(data["title"], body)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    config: SiteConfig
+    rng: random.Random
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "text/html; charset=utf-8") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        config = self.config
+        if config.latency_ms or config.jitter_ms:
+            delay = config.latency_ms + self.rng.uniform(-config.jitter_ms, config.jitter_ms)
+            time.sleep(max(0.0, delay) / 1000)
+        parts = urlsplit(self.path)
+        if parts.path.startswith("/static/"):
+            self._send(200, b"", "text/css" if parts.path.endswith(".css") else "image/png")
+            return
+        if config.error_rate and self.rng.random() < config.error_rate:
+            self._send(500, b"<h1>Error interno</h1>")
+            return
+        if parts.path == "/":
+            self._send(200, _layout("Inicio", "<a class='next' href='/list?page=1'>Catálogo</a>").encode())
+        elif parts.path == "/list":
+            page = int(parse_qs(parts.query).get("page", ["1"])[0])
+            if not 1 <= page <= config.list_pages:
+                self._send(404, b"<h1>No encontrado</h1>")
+                return
+            self._send(200, render_list(page, config).encode())
+        elif parts.path.startswith("/item/"):
+            try:
+                i = int(parts.path.rsplit("/", 1)[1])
+            except ValueError:
+                i = -1
+            if not 0 <= i < config.pages:
+                self._send(404, b"<h1>No encontrado</h1>")
+                return
+            self._send(200, render_item(i, config).encode())
+        else:
+            self._send(404, b"<h1>No encontrado</h1>")
+
+
+def make_server(config: SiteConfig, port: int = 0) -> ThreadingHTTPServer:
+    """Crear el servidor del sitio (sin arrancarlo)."""
+    handler = type("Handler", (_Handler,), {"config": config, "rng": random.Random(config.seed)})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def _serve(config: SiteConfig, port: int) -> None:
+    make_server(config, port).serve_forever()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class FixtureSite:
+    """
+    Sitio sintético en un proceso aparte, para que el servidor no cuente
+    en la CPU ni en la memoria del código medido.
+
+    Uso:
+        with FixtureSite(SiteConfig(pages=1000)) as site:
+            print(site.url("/list?page=1"))
+    """
+
+    def __init__(self, config: Optional[SiteConfig] = None):
+        self.config = config or SiteConfig()
+        self.port = 0
+        self._process: Optional[multiprocessing.Process] = None
+
+    def url(self, path: str = "/") -> str:
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def start(self) -> "FixtureSite":
+        self.port = _free_port()
+        self._process = multiprocessing.get_context("spawn").Process(
+            target=_serve, args=(self.config, self.port), daemon=True)
+        self._process.start()
+        for _ in range(200):
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=0.1).close()
+                return self
+            except OSError:
+                time.sleep(0.025)
+        raise RuntimeError("El sitio de benchmark no ha arrancado")
+
+    def stop(self) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servir el sitio sintético de los benchmarks")
+    parser.add_argument("--port", type=int, default=8800)
+    for name, value in asdict(SiteConfig()).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    args = vars(parser.parse_args())
+    port = args.pop("port")
+    config = SiteConfig(**args)
+    print(f"Sitio de benchmark en http://127.0.0.1:{port}/ ({config.pages} productos, "
+          f"{config.list_pages} páginas de listado, modo {config.mode})")
+    make_server(config, port).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -21,6 +21,12 @@ case "$1" in
         cd /app/persistent
         exec python "/app/user_scripts/$2"
         ;;
+    "worker")
+        echo "Iniciando worker persistente..."
+        cd /app/persistent
+        shift
+        exec python /app/worker.py serve "$@"
+        ;;
     "jupyter")
         echo "Iniciando Jupyter Notebook..."
         cd /app/persistent
@@ -30,6 +36,7 @@ case "$1" in
         echo "Modo no reconocido. Modos disponibles:"
         echo "  interactive - Intérprete IPython interactivo"
         echo "  script <nombre> - Ejecutar un script específico"
+        echo "  worker [--idle-timeout N] - Worker persistente con Chromium caliente"
         echo "  jupyter - Iniciar Jupyter Notebook"
         exit 1
         ;;
@@ -18,8 +18,62 @@ import sys
 import subprocess
 import argparse
 import json
+import time
+import uuid
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, asdict
+from datetime import datetime
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Dict
+
+
+class _NoMetrics:
+    """Sustituto sin efecto de `METRICS` cuando auto_scrape no está disponible."""
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        pass
+
+
+# Métricas compartidas con el paquete auto_scrape: instalado o, en una copia
+# del repositorio, en el directorio hermano del sandbox. Sin él, el CLI
+# funciona igual pero no mide nada.
+try:
+    from auto_scrape.metrics import METRICS, span
+except ImportError:
+    _CHECKOUT = str(Path(__file__).resolve().parent.parent)
+    sys.path.insert(0, _CHECKOUT)
+    try:
+        from auto_scrape.metrics import METRICS, span
+    except ImportError:
+        sys.path.remove(_CHECKOUT)
+        METRICS = _NoMetrics()
+
+        def span(name: str, **labels):
+            return nullcontext()
+
+
+WORKER_SOCKET = "/tmp/auto_scrape_worker.sock"
+
+# Archivos que forman el contexto de build (el resto lo excluye .dockerignore)
+BUILD_CONTEXT_FILES = ["Dockerfile", ".dockerignore", "requirements.txt", "entrypoint.sh", "worker.py"]
+CONTEXT_HASH_LABEL = "auto_scrape.context_hash"
+
+
+@dataclass
+class BatchJob:
+    """Resultado de un script ejecutado en modo batch."""
+    
+    script: str
+    container: str
+    exit_code: Optional[int] = None
+    duration: float = 0.0
+    log_file: str = ""
+    
+    @property
+    def ok(self) -> bool:
+        return self.exit_code == 0
 
 
 class PlaywrightSandbox:
@@ -31,23 +85,48 @@ class PlaywrightSandbox:
         self.sandbox_dir = Path(__file__).parent
         self.persistent_dir = self.sandbox_dir / "persistent_data"
         self.scripts_dir = self.sandbox_dir / "user_scripts"
+        self.package_dir = self.sandbox_dir.parent / "auto_scrape"
         
         # Crear directorios si no existen
         self.persistent_dir.mkdir(exist_ok=True)
         self.scripts_dir.mkdir(exist_ok=True)
     
-    def build_image(self) -> bool:
-        """Construir la imagen Docker del sandbox."""
+    def context_hash(self) -> str:
+        """Hash del contexto de build (Dockerfile, dependencias y scripts de entrada)."""
+        digest = hashlib.sha256()
+        for name in BUILD_CONTEXT_FILES:
+            path = self.sandbox_dir / name
+            digest.update(name.encode("utf-8") + b"\0")
+            if path.exists():
+                digest.update(path.read_bytes())
+            digest.update(b"\0")
+        return digest.hexdigest()
+    
+    def build_image(self, force: bool = False) -> bool:
+        """
+        Construir la imagen Docker del sandbox.
+        
+        Solo se reconstruye si el hash del contexto de build no coincide con
+        la etiqueta de la imagen existente, salvo que se pida `force`.
+        """
+        context_hash = self.context_hash()
+        if not force and self.image_context_hash() == context_hash:
+            print("✅ Imagen al día, no hace falta reconstruir")
+            return True
+        
         print("🔨 Construyendo imagen Docker del sandbox...")
         
         try:
             cmd = [
                 "docker", "build",
                 "-t", self.image_name,
+                "-t", f"{self.image_name.split(':')[0]}:{context_hash[:12]}",
+                "--label", f"{CONTEXT_HASH_LABEL}={context_hash}",
                 str(self.sandbox_dir)
             ]
             
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+            with span("sandbox_build"):
+                result = subprocess.run(cmd, check=True, capture_output=True, text=True)
             print("✅ Imagen construida exitosamente")
             return True
             
@@ -68,11 +147,51 @@ class PlaywrightSandbox:
         except subprocess.CalledProcessError:
             return False
     
+    def image_context_hash(self) -> Optional[str]:
+        """Hash del contexto con el que se construyó la imagen (None si no existe)."""
+        state = self.inspect_state()
+        return state["image_hash"] if state["image_exists"] else None
+    
+    def ensure_image(self) -> bool:
+        """Construir la imagen si no existe o si está desactualizada."""
+        return self.build_image()
+    
+    def inspect_state(self) -> Dict:
+        """
+        Estado de la imagen, el contenedor y el worker con una sola llamada
+        a `docker inspect`.
+        """
+        state = {"image_exists": False, "image_hash": None,
+                 "container_running": False, "worker_running": False}
+        try:
+            with span("sandbox_inspect"):
+                result = subprocess.run(
+                    ["docker", "inspect", self.image_name, self.container_name, self.worker_name],
+                    capture_output=True, text=True
+                )
+            objects = json.loads(result.stdout or "[]")
+        except (OSError, ValueError):
+            return state
+        
+        for obj in objects:
+            if "RepoTags" in obj:
+                state["image_exists"] = True
+                labels = (obj.get("Config") or {}).get("Labels") or {}
+                state["image_hash"] = labels.get(CONTEXT_HASH_LABEL)
+            else:
+                running = bool((obj.get("State") or {}).get("Running"))
+                name = obj.get("Name", "").lstrip("/")
+                if name == self.container_name:
+                    state["container_running"] = running
+                elif name == self.worker_name:
+                    state["worker_running"] = running
+        return state
+    
     def is_container_running(self) -> bool:
         """Verificar si el contenedor está ejecutándose."""
         try:
             result = subprocess.run(
-                ["docker", "ps", "-q", "-f", f"name={self.container_name}"],
+                ["docker", "ps", "-q", "-f", f"name=^{self.container_name}$"],
                 capture_output=True, text=True, check=True
             )
             return bool(result.stdout.strip())
@@ -85,10 +204,11 @@ class PlaywrightSandbox:
             return True
             
         try:
-            subprocess.run(
-                ["docker", "stop", self.container_name],
-                check=True, capture_output=True
-            )
+            with span("sandbox_stop", target="container"):
+                subprocess.run(
+                    ["docker", "stop", self.container_name],
+                    check=True, capture_output=True
+                )
             print(f"🛑 Contenedor {self.container_name} detenido")
             return True
         except subprocess.CalledProcessError as e:
@@ -97,9 +217,8 @@ class PlaywrightSandbox:
     
     def run_interactive(self) -> bool:
         """Ejecutar el sandbox en modo interactivo."""
-        if not self.check_image_exists():
-            if not self.build_image():
-                return False
+        if not self.ensure_image():
+            return False
         
         print("🚀 Iniciando sandbox en modo interactivo...")
         print("📝 Los archivos se guardarán en:", self.persistent_dir.absolute())
@@ -109,6 +228,7 @@ class PlaywrightSandbox:
             "--name", self.container_name,
             "-v", f"{self.persistent_dir.absolute()}:/app/persistent",
             "-v", f"{self.scripts_dir.absolute()}:/app/user_scripts",
+            "-v", f"{self.package_dir.absolute()}:/app/auto_scrape:ro",
         ]
         
         cmd.extend([self.image_name, "interactive"])
@@ -123,34 +243,137 @@ class PlaywrightSandbox:
             print("\n👋 Saliendo del sandbox...")
             return True
     
-    def run_script(self, script_name: str) -> bool:
-        """Ejecutar un script específico en el sandbox."""
+    def run_script(self, script_name: str, warm: bool = False) -> bool:
+        """
+        Ejecutar un script específico en el sandbox.
+        
+        Args:
+            script_name: Nombre del script en user_scripts/
+            warm: Ejecutarlo en el worker persistente en lugar de en un
+                contenedor nuevo
+        """
         script_path = self.scripts_dir / script_name
         
         if not script_path.exists():
             print(f"❌ Script no encontrado: {script_path}")
             return False
         
-        if not self.check_image_exists():
-            if not self.build_image():
-                return False
+        if warm:
+            return self.run_in_worker(script_name)
+        
+        if not self.ensure_image():
+            return False
         
         print(f"🏃 Ejecutando script: {script_name}")
         
         cmd = [
             "docker", "run", "--rm",
-            "--name", f"{self.container_name}_script",
+            "--name", self._unique_name("script"),
             "-v", f"{self.persistent_dir.absolute()}:/app/persistent",
             "-v", f"{self.scripts_dir.absolute()}:/app/user_scripts",
+            "-v", f"{self.package_dir.absolute()}:/app/auto_scrape:ro",
             self.image_name, "script", script_name
         ]
         
         try:
-            subprocess.run(cmd, check=True)
+            with span("sandbox_run", mode="script"):
+                subprocess.run(cmd, check=True)
             return True
         except subprocess.CalledProcessError as e:
             print(f"❌ Error ejecutando script: {e}")
             return False
+    
+    @property
+    def worker_name(self) -> str:
+        """Nombre del contenedor del worker persistente."""
+        return f"{self.container_name}_worker"
+    
+    def is_worker_running(self) -> bool:
+        """Verificar si el worker persistente está ejecutándose."""
+        try:
+            result = subprocess.run(
+                ["docker", "ps", "-q", "-f", f"name=^{self.worker_name}$"],
+                capture_output=True, text=True, check=True
+            )
+            return bool(result.stdout.strip())
+        except subprocess.CalledProcessError:
+            return False
+    
+    def start_worker(self, idle_timeout: int = 600, ready_timeout: float = 60) -> bool:
+        """
+        Iniciar el worker persistente (contenedor con Chromium caliente).
+        
+        El worker se detiene solo tras `idle_timeout` segundos sin trabajos.
+        """
+        if self.is_worker_running():
+            return True
+        
+        if not self.ensure_image():
+            return False
+        
+        print(f"🔥 Iniciando worker persistente (cierre tras {idle_timeout}s inactivo)...")
+        with span("sandbox_worker_start"):
+            return self._start_worker(idle_timeout, ready_timeout)
+    
+    def _start_worker(self, idle_timeout: int, ready_timeout: float) -> bool:
+        cmd = [
+            "docker", "run", "-d", "--rm",
+            "--name", self.worker_name,
+            "-v", f"{self.persistent_dir.absolute()}:/app/persistent",
+            "-v", f"{self.scripts_dir.absolute()}:/app/user_scripts",
+            "-v", f"{self.package_dir.absolute()}:/app/auto_scrape:ro",
+            self.image_name, "worker", "--idle-timeout", str(idle_timeout)
+        ]
+        
+        try:
+            subprocess.run(cmd, check=True, capture_output=True, text=True)
+        except subprocess.CalledProcessError as e:
+            print(f"❌ Error iniciando worker: {e.stderr}")
+            return False
+        
+        # Esperar a que el socket del worker esté disponible
+        deadline = time.monotonic() + ready_timeout
+        while time.monotonic() < deadline:
+            ready = subprocess.run(
+                ["docker", "exec", self.worker_name, "test", "-S", WORKER_SOCKET],
+                capture_output=True
+            )
+            if ready.returncode == 0:
+                print(f"✅ Worker listo: {self.worker_name}")
+                return True
+            time.sleep(0.2)
+        
+        print("❌ El worker no respondió a tiempo")
+        return False
+    
+    def stop_worker(self) -> bool:
+        """Detener el worker persistente."""
+        if not self.is_worker_running():
+            return True
+        try:
+            with span("sandbox_stop", target="worker"):
+                subprocess.run(["docker", "stop", self.worker_name], check=True, capture_output=True)
+            print(f"🛑 Worker {self.worker_name} detenido")
+            return True
+        except subprocess.CalledProcessError as e:
+            print(f"❌ Error deteniendo worker: {e}")
+            return False
+    
+    def run_in_worker(self, script_name: str, args: Optional[List[str]] = None) -> bool:
+        """Ejecutar un script en el worker persistente, iniciándolo si hace falta."""
+        if not self.start_worker():
+            return False
+        
+        print(f"🏃 Ejecutando script en el worker: {script_name}")
+        cmd = ["docker", "exec", self.worker_name,
+               "python", "/app/worker.py", "run", script_name] + list(args or [])
+        with span("sandbox_run", mode="worker"):
+            result = subprocess.run(cmd)
+        METRICS.inc("sandbox_scripts_total", mode="worker", ok=result.returncode == 0)
+        if result.returncode != 0:
+            print(f"❌ El script terminó con código {result.returncode}")
+            return False
+        return True
    
     def create_example_script(self) -> None:
         """Crear un script de ejemplo."""
@@ -159,7 +382,7 @@ class PlaywrightSandbox:
 Script de ejemplo para el sandbox con Playwright.
 """
 
-from playwright.sync_api import sync_playwright
+from auto_scrape.browser import SyncBrowserPool
 import json
 import time
 
@@ -167,11 +390,8 @@ def scrape_example():
     """Ejemplo básico de scraping con Playwright."""
     print("🎭 Iniciando ejemplo con Playwright...")
     
-    with sync_playwright() as p:
-        # Lanzar navegador
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        
+    # Navegador y contexto reutilizables del pool de auto_scrape
+    with SyncBrowserPool(contexts=1, max_pages=1) as pool, pool.page() as page:
         # Navegar a una página de ejemplo
         print("📄 Navegando a example.com...")
         page.goto("https://example.com")
@@ -195,8 +415,6 @@ def scrape_example():
             json.dump(results, f, indent=2)
         
         print("💾 Resultados guardados en example_results.json")
-        
-        browser.close()
 
 if __name__ == "__main__":
     scrape_example()
@@ -208,6 +426,107 @@ if __name__ == "__main__":
         
         print(f"📝 Script de ejemplo creado: {example_path}")
     
+    def _unique_name(self, kind: str) -> str:
+        """Nombre de contenedor único para poder ejecutar varios a la vez."""
+        return f"{self.container_name}_{kind}_{uuid.uuid4().hex[:8]}"
+    
+    def _run_batch_job(self, job: BatchJob, cpus: Optional[float],
+                       memory: Optional[str], timeout: Optional[float]) -> BatchJob:
+        cmd = [
+            "docker", "run", "--rm",
+            "--name", job.container,
+            "-v", f"{self.persistent_dir.absolute()}:/app/persistent",
+            "-v", f"{self.scripts_dir.absolute()}:/app/user_scripts",
+            "-v", f"{self.package_dir.absolute()}:/app/auto_scrape:ro",
+        ]
+        if cpus:
+            cmd.extend(["--cpus", str(cpus)])
+        if memory:
+            cmd.extend(["--memory", memory])
+        cmd.extend([self.image_name, "script", job.script])
+        
+        started = time.monotonic()
+        with open(job.log_file, "w", encoding="utf-8") as log, span("sandbox_run", mode="batch"):
+            try:
+                result = subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT,
+                                        timeout=timeout)
+                job.exit_code = result.returncode
+            except subprocess.TimeoutExpired:
+                subprocess.run(["docker", "kill", job.container], capture_output=True)
+                log.write(f"\n⏱️  Tiempo máximo superado ({timeout}s)\n")
+                job.exit_code = 124
+        job.duration = time.monotonic() - started
+        METRICS.inc("sandbox_scripts_total", mode="batch", ok=job.ok)
+        
+        icon = "✅" if job.ok else "❌"
+        print(f"   {icon} {job.script} ({job.duration:.1f}s, código {job.exit_code})")
+        return job
+    
+    def run_batch(self, scripts: Optional[List[str]] = None, workers: int = 4,
+                  cpus: Optional[float] = None, memory: Optional[str] = None,
+                  timeout: Optional[float] = None) -> Dict:
+        """
+        Ejecutar muchos scripts en paralelo, cada uno en su propio contenedor.
+        
+        Args:
+            scripts: Scripts o patrones glob de user_scripts/ (por defecto, todos)
+            workers: Contenedores simultáneos
+            cpus: Límite de CPU por contenedor (p. ej. 1.5)
+            memory: Límite de memoria por contenedor (p. ej. "1g")
+            timeout: Segundos máximos por script
+            
+        Returns:
+            Resumen con los trabajos, tiempos y throughput
+        """
+        names: List[str] = []
+        for pattern in scripts or ["*.py"]:
+            matches = sorted(f.name for f in self.scripts_dir.glob(pattern) if f.is_file())
+            if not matches:
+                print(f"⚠️  Ningún script coincide con: {pattern}")
+            names.extend(m for m in matches if m not in names)
+        if not names:
+            print("❌ No hay scripts que ejecutar")
+            return {}
+        
+        if not self.ensure_image():
+            return {}
+        
+        logs_dir = self.persistent_dir / "batch_logs" / datetime.now().strftime("%Y%m%d_%H%M%S")
+        logs_dir.mkdir(parents=True, exist_ok=True)
+        jobs = [
+            BatchJob(script=name, container=self._unique_name("batch"),
+                     log_file=str(logs_dir / f"{Path(name).stem}.log"))
+            for name in names
+        ]
+        
+        print(f"🏭 Ejecutando {len(jobs)} scripts con {workers} contenedores en paralelo...")
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            list(pool.map(lambda job: self._run_batch_job(job, cpus, memory, timeout), jobs))
+        wall_time = time.monotonic() - started
+        
+        succeeded = sum(1 for job in jobs if job.ok)
+        busy_time = sum(job.duration for job in jobs)
+        summary = {
+            "scripts": len(jobs),
+            "succeeded": succeeded,
+            "failed": len(jobs) - succeeded,
+            "workers": workers,
+            "wall_time": round(wall_time, 3),
+            "busy_time": round(busy_time, 3),
+            "scripts_per_minute": round(len(jobs) / wall_time * 60, 2) if wall_time else 0.0,
+            "speedup": round(busy_time / wall_time, 2) if wall_time else 0.0,
+            "logs_dir": str(logs_dir),
+            "jobs": [asdict(job) for job in jobs],
+        }
+        with open(logs_dir / "summary.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        
+        print(f"📊 {succeeded}/{len(jobs)} scripts correctos en {wall_time:.1f}s "
+              f"({summary['scripts_per_minute']} scripts/min, x{summary['speedup']} frente a serie)")
+        print(f"📁 Logs y resumen en: {logs_dir}")
+        return summary
+    
     def list_scripts(self) -> List[str]:
         """Listar scripts disponibles."""
         scripts = []
@@ -217,9 +536,18 @@ if __name__ == "__main__":
     
     def status(self) -> None:
         """Mostrar estado del sandbox."""
+        state = self.inspect_state()
+        if not state["image_exists"]:
+            image = "❌"
+        elif state["image_hash"] != self.context_hash():
+            image = "⚠️  (desactualizada, ejecuta: python sandbox.py build)"
+        else:
+            image = "✅"
+        
         print("📊 Estado del Sandbox:")
-        print(f"   Imagen Docker: {'✅' if self.check_image_exists() else '❌'} {self.image_name}")
-        print(f"   Contenedor: {'🟢' if self.is_container_running() else '⚫'} {self.container_name}")
+        print(f"   Imagen Docker: {image} {self.image_name}")
+        print(f"   Contenedor: {'🟢' if state['container_running'] else '⚫'} {self.container_name}")
+        print(f"   Worker: {'🟢' if state['worker_running'] else '⚫'} {self.worker_name}")
         print(f"   Directorio persistente: {self.persistent_dir.absolute()}")
         print(f"   Directorio de scripts: {self.scripts_dir.absolute()}")
         
@@ -246,6 +574,17 @@ Ejemplos de uso:
   # Ejecutar un script específico
   python sandbox.py script mi_scraper.py
 
+  # Ejecutar un script en el worker persistente (sin arrancar contenedor)
+  python sandbox.py script mi_scraper.py --warm
+
+  # Ejecutar muchos scripts en paralelo (4 contenedores, 1 CPU y 1 GB cada uno)
+  python sandbox.py batch --workers 4 --cpus 1 --memory 1g
+  python sandbox.py batch "tienda_*.py" --timeout 600
+
+  # Iniciar / detener el worker persistente
+  python sandbox.py worker start --idle-timeout 600
+  python sandbox.py worker stop
+
   # Crear script de ejemplo
   python sandbox.py example
 
@@ -254,8 +593,13 @@ Ejemplos de uso:
 
   # Construir imagen Docker
   python sandbox.py build
+
+  # Guardar el tiempo de cada fase del contenedor (Prometheus o JSON)
+  python sandbox.py --metrics metricas.prom batch
         """
     )
+    parser.add_argument("--metrics", metavar="ARCHIVO",
+                        help="Guardar las métricas al terminar (.prom: Prometheus, .json: resumen)")
     
     subparsers = parser.add_subparsers(dest="command", help="Comandos disponibles")
     
@@ -265,6 +609,22 @@ Ejemplos de uso:
     # Comando script
     script_parser = subparsers.add_parser("script", help="Ejecutar script específico")
     script_parser.add_argument("script_name", help="Nombre del script a ejecutar")
+    script_parser.add_argument("--warm", action="store_true",
+                               help="Ejecutar en el worker persistente")
+    
+    # Comando batch
+    batch_parser = subparsers.add_parser("batch", help="Ejecutar varios scripts en paralelo")
+    batch_parser.add_argument("scripts", nargs="*", help="Scripts o patrones (por defecto, todos)")
+    batch_parser.add_argument("--workers", type=int, default=4, help="Contenedores simultáneos")
+    batch_parser.add_argument("--cpus", type=float, help="Límite de CPU por contenedor")
+    batch_parser.add_argument("--memory", help="Límite de memoria por contenedor (p. ej. 1g)")
+    batch_parser.add_argument("--timeout", type=float, help="Segundos máximos por script")
+    
+    # Comando worker
+    worker_parser = subparsers.add_parser("worker", help="Gestionar el worker persistente")
+    worker_parser.add_argument("action", choices=["start", "stop"], help="Acción")
+    worker_parser.add_argument("--idle-timeout", type=int, default=600,
+                               help="Segundos sin trabajos antes de detenerse")
     
     # Comando example
     example_parser = subparsers.add_parser("example", help="Crear script de ejemplo")
@@ -274,6 +634,8 @@ Ejemplos de uso:
     
     # Comando build
     build_parser = subparsers.add_parser("build", help="Construir imagen Docker")
+    build_parser.add_argument("--force", action="store_true",
+                              help="Reconstruir aunque el contexto no haya cambiado")
     
     # Comando stop
     stop_parser = subparsers.add_parser("stop", help="Detener contenedor")
@@ -285,17 +647,42 @@ Ejemplos de uso:
         return
     
     sandbox = PlaywrightSandbox()
-    
+    try:
+        run_command(sandbox, args)
+    finally:
+        if args.metrics and isinstance(METRICS, _NoMetrics):
+            print("⚠️  auto_scrape no está disponible: no se guardan métricas")
+        elif args.metrics:
+            if args.metrics.endswith(".json"):
+                METRICS.write_summary(args.metrics)
+            else:
+                METRICS.write_prometheus(args.metrics)
+            print(f"⏱️  Tiempo por fase: {METRICS.format_stages()}")
+            print(f"📈 Métricas guardadas en: {args.metrics}")
+
+
+def run_command(sandbox: PlaywrightSandbox, args: argparse.Namespace) -> None:
+    """Ejecutar el comando del CLI."""
     if args.command == "interactive":
         sandbox.run_interactive()
     elif args.command == "script":
-        sandbox.run_script(args.script_name)
+        sandbox.run_script(args.script_name, warm=args.warm)
+    elif args.command == "batch":
+        summary = sandbox.run_batch(args.scripts, args.workers, args.cpus,
+                                    args.memory, args.timeout)
+        if not summary or summary["failed"]:
+            sys.exit(1)
+    elif args.command == "worker":
+        if args.action == "start":
+            sandbox.start_worker(args.idle_timeout)
+        else:
+            sandbox.stop_worker()
     elif args.command == "example":
         sandbox.create_example_script()
     elif args.command == "status":
         sandbox.status()
     elif args.command == "build":
-        sandbox.build_image()
+        sandbox.build_image(force=args.force)
     elif args.command == "stop":
         sandbox.stop_container()
 
@@ -3,7 +3,7 @@
 Script de ejemplo para el sandbox con Playwright.
 """
 
-from playwright.sync_api import sync_playwright
+from auto_scrape.browser import SyncBrowserPool
 import json
 import time
 
@@ -11,11 +11,8 @@ def scrape_example():
     """Ejemplo básico de scraping con Playwright."""
     print("🎭 Iniciando ejemplo con Playwright...")
     
-    with sync_playwright() as p:
-        # Lanzar navegador
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        
+    # Navegador y contexto reutilizables del pool de auto_scrape
+    with SyncBrowserPool(contexts=1, max_pages=1) as pool, pool.page() as page:
         # Navegar a una página de ejemplo
         print("📄 Navegando a example.com...")
         page.goto("https://example.com")
@@ -39,8 +36,6 @@ def scrape_example():
             json.dump(results, f, indent=2)
         
         print("💾 Resultados guardados en example_results.json")
-        
-        browser.close()
 
 if __name__ == "__main__":
     scrape_example()
@@ -22,62 +22,74 @@ Script de scraping generado automáticamente.
 Creado: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 """
 
-from playwright.sync_api import sync_playwright
+from auto_scrape.blocking import route_blocking_sync
+from auto_scrape.browser import SyncBrowserPool, wait_ready_sync
+from auto_scrape.cache import ResponseCache, route_with_cache_sync
+from auto_scrape.extraction import ExtractionSpec
 import json
 import time
 from datetime import datetime
 
 
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# Selectores de los datos: la página está lista en cuanto aparece alguno
+READY_SELECTORS = ["body"]  # p. ej. [".item", "table.results"]
+
+# Perfil de bloqueo de recursos por sitio: 'off', 'trackers', 'light' o 'strict'
+BLOCKING = {{
+    "*": "light",
+    # "spa.example.com": "off",
+}}
+
+# Datos a extraer: un registro por cada elemento de "selector" (o uno por página
+# sin él), con todos los campos en una sola llamada al navegador
+EXTRACTION = ExtractionSpec({{
+    # "selector": ".item",
+    "fields": {{
+        "title": "title",
+        "heading": "h1",
+        # "link": "a@href",
+        # "price": {{"selector": ".price", "type": "float"}},
+        # "rows": {{"selector": "tr", "fields": {{"name": "td.name", "value": "td.value"}}}},
+    }},
+}})
+
+
 def scrape_data():
     """Función principal de scraping."""
     print("🎭 Iniciando scraper con Playwright...")
     
     results = []
     
-    with sync_playwright() as p:
-        # Configurar navegador
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        
-        # Configurar user agent y timeouts
-        page.set_extra_http_headers({{
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }})
-        
-        try:
-            print(f"📄 Navegando a: {url}")
-            page.goto("{url}", wait_until="networkidle")
-            
-            # Esperar a que la página cargue
-            page.wait_for_timeout(2000)
-            
-            # Extraer título
-            title = page.title()
-            print(f"📑 Título de página: {{title}}")
-            
-            # TODO: Agregar tu lógica de extracción aquí
-            # Ejemplo:
-            # elements = page.query_selector_all(".item")
-            # for element in elements:
-            #     data = {{
-            #         "text": element.inner_text(),
-            #         "link": element.query_selector("a").get_attribute("href") if element.query_selector("a") else None
-            #     }}
-            #     results.append(data)
-            
-            # Datos de ejemplo
-            results.append({{
-                "title": title,
-                "url": "{url}",
-                "timestamp": datetime.now().isoformat(),
-                "data_extracted": "Modifica este script para extraer datos reales"
-            }})
-            
-        except Exception as e:
-            print(f"❌ Error durante el scraping: {{e}}")
-            
-        finally:
-            browser.close()
+    # Las re-ejecuciones sirven los documentos desde la caché en /app/persistent
+    cache = ResponseCache()
+    
+    def setup_context(context):
+        route_with_cache_sync(context, cache)
+        # Registrado después: decide antes que la caché qué recursos se descargan
+        route_blocking_sync(context, BLOCKING)
+    
+    # El pool mantiene el navegador y el contexto calientes entre páginas
+    with SyncBrowserPool(contexts=1, max_pages=1, user_agent=USER_AGENT,
+                         on_context=setup_context) as pool:
+        with pool.page() as page:
+            try:
+                print(f"📄 Navegando a: {url}")
+                page.goto("{url}", wait_until="domcontentloaded")
+                
+                # Esperar a los datos en lugar de a que la red quede inactiva
+                if not wait_ready_sync(page, READY_SELECTORS):
+                    print(f"⚠️  No apareció ninguno de {{READY_SELECTORS}}")
+                
+                # Extraer los datos definidos en EXTRACTION
+                for record in EXTRACTION.extract_sync(page):
+                    record.update(url="{url}", timestamp=datetime.now().isoformat())
+                    results.append(record)
+                print(f"📑 Registros extraídos: {{len(results)}}")
+                
+            except Exception as e:
+                print(f"❌ Error durante el scraping: {{e}}")
     
     return results
 
@@ -132,89 +144,93 @@ Creado: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 """
 
 import asyncio
-from playwright.async_api import async_playwright
-import json
+from auto_scrape.blocking import route_blocking
+from auto_scrape.browser import BrowserPool
+from auto_scrape.cache import ResponseCache, route_with_cache
+from auto_scrape.extraction import ExtractionSpec
+from auto_scrape.metrics import METRICS
+from auto_scrape.scraper import Crawler
 import time
 from datetime import datetime
 
 
-async def scrape_page(page, url):
-    """Scraping de una página individual."""
-    try:
-        await page.goto(url, wait_until="networkidle")
-        await page.wait_for_timeout(1000)
-        
-        # Extraer datos (personalizar según necesidades)
-        title = await page.title()
-        
-        return {{
-            "url": url,
-            "title": title,
-            "timestamp": datetime.now().isoformat()
-        }}
-        
-    except Exception as e:
-        print(f"❌ Error en {{url}}: {{e}}")
-        return None
+# Páginas abiertas a la vez (el resto de URLs esperan turno)
+MAX_PAGES = 8
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+OUTPUT_FILE = "/app/persistent/async_scraping.jsonl"
+METRICS_FILE = "/app/persistent/async_scraping_metrics.json"
 
+# URLs de ejemplo (modificar según necesidades)
+URLS = [
+    "https://example.com",
+    "https://httpbin.org/html",
+    # Agregar más URLs aquí
+]
 
-async def scrape_multiple_urls(urls):
-    """Scraping de múltiples URLs en paralelo."""
-    print(f"🎭 Iniciando scraping asíncrono de {{len(urls)}} URLs...")
-    
-    results = []
-    
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        
-        # Crear múltiples páginas para paralelización
-        tasks = []
-        for url in urls:
-            page = await browser.new_page()
-            await page.set_extra_http_headers({{
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            }})
-            
-            task = scrape_page(page, url)
-            tasks.append(task)
-        
-        # Ejecutar todas las tareas en paralelo
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Filtrar resultados válidos
-        valid_results = [r for r in results if r is not None and not isinstance(r, Exception)]
-        
-        await browser.close()
-    
-    return valid_results
+# Selectores de los datos: el crawler espera a que aparezca alguno antes de extraer
+READY_SELECTORS = ["body"]  # p. ej. [".item", "table.results"]
+
+# Perfil de bloqueo de recursos por sitio: 'off', 'trackers', 'light' o 'strict'
+BLOCKING = {{
+    "*": "light",
+    # "spa.example.com": "off",
+}}
+
+# Datos a extraer: un registro por cada elemento de "selector" (o uno por página
+# sin él), con todos los campos en una sola llamada al navegador
+EXTRACTION = ExtractionSpec({{
+    # "selector": ".item",
+    "fields": {{
+        "title": "title",
+        "heading": "h1",
+        # "link": "a@href",
+        # "price": {{"selector": ".price", "type": "float"}},
+        # "rows": {{"selector": "tr", "fields": {{"name": "td.name", "value": "td.value"}}}},
+    }},
+}})
+
+
+async def scrape_page(page, url):
+    """Extraer los datos de una página ya cargada (personalizar EXTRACTION)."""
+    records = await EXTRACTION.extract(page)
+    timestamp = datetime.now().isoformat()
+    return [dict(record, url=url, timestamp=timestamp) for record in records]
 
 
 async def main():
     """Función principal asíncrona."""
-    # URLs de ejemplo (modificar según necesidades)
-    urls = [
-        "https://example.com",
-        "https://httpbin.org/html",
-        # Agregar más URLs aquí
-    ]
-    
-    start_time = time.time()
+    config = {{
+        "start_urls": URLS,
+        "concurrency": MAX_PAGES,
+        "output": OUTPUT_FILE,
+        "selectors": READY_SELECTORS,
+        # El estado se guarda en /app/persistent cada pocos segundos: si el
+        # script se interrumpe, la siguiente ejecución continúa donde se quedó
+        "checkpoint": True,
+        # Tiempo por etapa (navegación, espera, extracción, exportación)
+        "metrics_summary": METRICS_FILE,
+    }}
     
-    # Ejecutar scraping
-    results = await scrape_multiple_urls(urls)
+    print(f"🎭 Iniciando scraping asíncrono de {{len(URLS)}} URLs...")
     
-    end_time = time.time()
+    # Las re-ejecuciones sirven los documentos desde la caché en /app/persistent
+    cache = ResponseCache()
     
-    # Guardar resultados
-    filename = f"async_scraping_{{datetime.now().strftime('%Y%m%d_%H%M%S')}}.json"
-    filepath = f"/app/persistent/{{filename}}"
+    start_time = time.time()
+    async def setup_context(context):
+        await route_with_cache(context, cache)
+        # Registrado después: decide antes que la caché qué recursos se descargan
+        await route_blocking(context, BLOCKING)
     
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    async with BrowserPool(contexts=2, max_pages=MAX_PAGES, user_agent=USER_AGENT,
+                           on_context=setup_context) as pool:
+        stats = await Crawler(config, scrape_page, pool=pool).run()
+    end_time = time.time()
     
     print(f"✅ Scraping completado en {{end_time - start_time:.2f}} segundos")
-    print(f"💾 Resultados guardados en: {{filename}}")
-    print(f"📊 Total de resultados: {{len(results)}}")
+    print(f"💾 Resultados guardados en: {{OUTPUT_FILE}}")
+    print(f"📊 Registros: {{stats.records}} ({{stats.pages_ok}} páginas, {{stats.pages_failed}} fallidas)")
+    print(f"⏱️  Tiempo por etapa: {{METRICS.format_stages()}}")
 
 
 if __name__ == "__main__":
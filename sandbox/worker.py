@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Worker persistente del sandbox.
+
+Se ejecuta dentro del contenedor y evita pagar en cada script el arranque
+del contenedor, la importación de Playwright y el lanzamiento de Chromium:
+
+- `python worker.py serve` importa Playwright una vez, deja un Chromium
+  headless escuchando por CDP y atiende trabajos en un socket Unix desde
+  un único hilo. Cada trabajo se ejecuta en un proceso hijo (fork) con los
+  módulos ya cargados y con `AUTO_SCRAPE_CDP_ENDPOINT` apuntando al
+  Chromium caliente, que `auto_scrape.browser.BrowserPool` usa en lugar de
+  lanzar uno nuevo. Si no llega ningún trabajo en `--idle-timeout`
+  segundos, el worker termina y el contenedor se detiene.
+- `python worker.py run <script> [args...]` envía un script al worker y
+  reenvía su salida; el código de salida es el del script.
+"""
+
+import argparse
+import json
+import os
+import runpy
+import selectors
+import socket
+import struct
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import List, Optional, Tuple
+
+
+SOCKET_PATH = os.environ.get("AUTO_SCRAPE_WORKER_SOCKET", "/tmp/auto_scrape_worker.sock")
+SCRIPTS_DIR = "/app/user_scripts"
+WORK_DIR = "/app/persistent"
+CDP_PORT = 9222
+CDP_TRIES = 100
+REQUEST_TIMEOUT = 10
+# Salida pendiente de enviar a un cliente a partir de la cual se deja de leer
+# la de su trabajo (el hijo se bloquea en la tubería hasta que el cliente lea)
+MAX_PENDING = 1 << 20
+
+# Tramas: 'O' + longitud + datos de salida, 'X' + código de salida
+_HEADER = struct.Struct("!cI")
+
+
+def _frame(kind: bytes, payload: bytes = b"", value: int = 0) -> bytes:
+    return _HEADER.pack(kind, len(payload) if kind == b"O" else value) + payload
+
+
+def _recv_exact(conn: socket.socket, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("El worker cerró la conexión")
+        data += chunk
+    return data
+
+
+def start_chromium() -> subprocess.Popen:
+    """
+    Lanzar un Chromium headless con depuración remota y esperar a que responda.
+
+    Raises:
+        RuntimeError: Si el endpoint CDP no responde (el proceso se termina)
+    """
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p:
+        executable = p.chromium.executable_path
+
+    process = subprocess.Popen(
+        [executable, "--headless=new", f"--remote-debugging-port={CDP_PORT}",
+         "--no-sandbox", "--disable-gpu", "--disable-dev-shm-usage", "about:blank"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    endpoint = f"http://127.0.0.1:{CDP_PORT}"
+    for _ in range(CDP_TRIES):
+        if process.poll() is not None:
+            break
+        try:
+            urllib.request.urlopen(f"{endpoint}/json/version", timeout=1).read()
+        except OSError:
+            time.sleep(0.1)
+        else:
+            os.environ["AUTO_SCRAPE_CDP_ENDPOINT"] = endpoint
+            return process
+    # Sin CDP los trabajos lanzarían su propio navegador: mejor no arrancar
+    process.terminate()
+    try:
+        process.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        process.kill()
+    raise RuntimeError(f"Chromium no respondió en {endpoint} (código de salida: {process.returncode})")
+
+
+def _start_job(request: dict) -> Tuple[int, int]:
+    """
+    Ejecutar un trabajo en un proceso hijo.
+
+    Se llama siempre desde el hilo principal (el worker no crea hilos), de
+    modo que el hijo no hereda locks tomados por otros hilos.
+
+    Returns:
+        PID del hijo y descriptor del que leer su salida
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # Proceso hijo: ejecutar el script con los módulos ya importados
+        code = 0
+        try:
+            os.close(read_fd)
+            os.dup2(write_fd, 1)
+            os.dup2(write_fd, 2)
+            sys.stdout = os.fdopen(1, "w", buffering=1)
+            sys.stderr = os.fdopen(2, "w", buffering=1)
+            os.chdir(WORK_DIR)
+            script = os.path.join(SCRIPTS_DIR, request["script"])
+            sys.argv = [script] + list(request.get("args", []))
+            runpy.run_path(script, run_name="__main__")
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+    os.close(write_fd)
+    return pid, read_fd
+
+
+class _Client:
+    """Conexión de un cliente: petición, trabajo y salida pendiente de enviar."""
+
+    __slots__ = ("conn", "buffer", "deadline", "pid", "output", "pending", "paused")
+
+    def __init__(self, conn: socket.socket):
+        self.conn: Optional[socket.socket] = conn
+        self.buffer = b""
+        self.deadline = time.monotonic() + REQUEST_TIMEOUT
+        self.pid: Optional[int] = None
+        self.output: Optional[int] = None
+        self.pending = bytearray()
+        self.paused = False
+
+    @property
+    def finished(self) -> bool:
+        return self.conn is None and self.output is None
+
+    def close(self, selector: selectors.BaseSelector) -> None:
+        """Cerrar la conexión; el trabajo, si lo hay, sigue hasta terminar."""
+        if self.conn is None:
+            return
+        _unregister(selector, self.conn)
+        self.conn.close()
+        self.conn = None
+        self.pending.clear()
+        self._resume(selector)
+
+    def send(self, selector: selectors.BaseSelector, data: bytes) -> None:
+        """Encolar datos para el cliente (se descartan si ya se ha ido)."""
+        if self.conn is None:
+            return
+        if not self.pending:
+            selector.register(self.conn, selectors.EVENT_WRITE, self)
+        self.pending += data
+        if len(self.pending) > MAX_PENDING and self.output is not None and not self.paused:
+            selector.unregister(self.output)
+            self.paused = True
+
+    def flush(self, selector: selectors.BaseSelector) -> None:
+        """Enviar lo que admita el socket sin bloquear."""
+        try:
+            sent = self.conn.send(self.pending)
+        except BlockingIOError:
+            return
+        except OSError:
+            # Si el cliente se ha ido se sigue leyendo la salida para que el hijo no se bloquee
+            self.close(selector)
+            return
+        del self.pending[:sent]
+        if len(self.pending) <= MAX_PENDING // 2:
+            self._resume(selector)
+        if not self.pending:
+            selector.unregister(self.conn)
+            if self.output is None:
+                self.close(selector)
+
+    def _resume(self, selector: selectors.BaseSelector) -> None:
+        if self.paused:
+            selector.register(self.output, selectors.EVENT_READ, self)
+            self.paused = False
+
+
+def _unregister(selector: selectors.BaseSelector, fileobj) -> None:
+    try:
+        selector.unregister(fileobj)
+    except KeyError:
+        pass
+
+
+def _accept(server: socket.socket, selector: selectors.BaseSelector) -> Optional[_Client]:
+    try:
+        conn, _ = server.accept()
+    except BlockingIOError:
+        return None
+    conn.setblocking(False)
+    client = _Client(conn)
+    selector.register(conn, selectors.EVENT_READ, client)
+    return client
+
+
+def _read_request(selector: selectors.BaseSelector, client: _Client) -> None:
+    """Acumular la línea JSON con el trabajo y lanzarlo cuando esté completa."""
+    try:
+        chunk = client.conn.recv(4096)
+    except BlockingIOError:
+        return
+    except OSError:
+        chunk = b""
+    client.buffer += chunk
+    if b"\n" not in client.buffer:
+        if not chunk:
+            client.close(selector)
+        return
+    try:
+        request = json.loads(client.buffer.split(b"\n", 1)[0])
+    except ValueError:
+        client.close(selector)
+        return
+    selector.unregister(client.conn)
+    client.pid, client.output = _start_job(request)
+    selector.register(client.output, selectors.EVENT_READ, client)
+
+
+def _read_output(selector: selectors.BaseSelector, client: _Client) -> None:
+    """Reenviar la salida del trabajo y, al terminar, su código de salida."""
+    chunk = os.read(client.output, 65536)
+    if chunk:
+        client.send(selector, _frame(b"O", chunk))
+        return
+    # Fin de la salida: recoger el código de salida del hijo
+    selector.unregister(client.output)
+    os.close(client.output)
+    client.output = None
+    _, status = os.waitpid(client.pid, 0)
+    client.send(selector, _frame(b"X", value=os.waitstatus_to_exitcode(status) & 0xFFFFFFFF))
+
+
+def serve_jobs(server: socket.socket, idle_timeout: float) -> None:
+    """
+    Atender trabajos en `server` hasta que pase `idle_timeout` sin actividad.
+
+    Un único hilo acepta conexiones, lanza los hijos y reenvía su salida
+    con `selectors`, así que cada `fork` se hace sin otros hilos activos.
+    Los sockets de los clientes no son bloqueantes: la petición y la salida
+    se acumulan por conexión, de modo que un cliente lento o que no lee no
+    detiene al resto.
+    """
+    server.setblocking(False)
+    selector = selectors.DefaultSelector()
+    selector.register(server, selectors.EVENT_READ)
+    clients: List[_Client] = []
+    last_activity = time.monotonic()
+    try:
+        while True:
+            now = time.monotonic()
+            if clients:
+                last_activity = now
+            elif now - last_activity > idle_timeout:
+                print("Worker inactivo, cerrando", flush=True)
+                return
+            for client in clients:
+                if client.pid is None and client.deadline < now:
+                    client.close(selector)  # Petición incompleta
+
+            for key, events in selector.select(timeout=1.0):
+                if key.fileobj is server:
+                    client = _accept(server, selector)
+                    if client is not None:
+                        clients.append(client)
+                    continue
+                # Un evento anterior del mismo lote puede haber cerrado el socket
+                client = key.data
+                if key.fileobj is client.conn:
+                    if events & selectors.EVENT_WRITE:
+                        client.flush(selector)
+                    else:
+                        _read_request(selector, client)
+                elif key.fileobj == client.output:
+                    _read_output(selector, client)
+            clients = [client for client in clients if not client.finished]
+    finally:
+        selector.close()
+
+
+def serve(idle_timeout: float) -> int:
+    """Atender trabajos hasta que pase `idle_timeout` sin actividad."""
+    # Importar lo pesado una sola vez; los hijos lo heredan con fork
+    import playwright.sync_api  # noqa: F401
+    import playwright.async_api  # noqa: F401
+
+    chromium = start_chromium()
+    if os.path.exists(SOCKET_PATH):
+        os.remove(SOCKET_PATH)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(SOCKET_PATH)
+    server.listen(64)
+
+    print(f"Worker listo en {SOCKET_PATH} (cierre tras {idle_timeout:.0f}s sin trabajos)", flush=True)
+    try:
+        serve_jobs(server, idle_timeout)
+        return 0
+    finally:
+        server.close()
+        if os.path.exists(SOCKET_PATH):
+            os.remove(SOCKET_PATH)
+        chromium.terminate()
+
+
+def run(script: str, args: list) -> int:
+    """Enviar un script al worker y reenviar su salida."""
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.connect(SOCKET_PATH)
+    conn.sendall(json.dumps({"script": script, "args": args}).encode("utf-8") + b"\n")
+    out = sys.stdout.buffer
+    while True:
+        kind, value = _HEADER.unpack(_recv_exact(conn, _HEADER.size))
+        if kind == b"X":
+            return value if value < 256 else 1
+        out.write(_recv_exact(conn, value))
+        out.flush()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Worker persistente del sandbox")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="Iniciar el worker")
+    serve_parser.add_argument("--idle-timeout", type=float, default=600)
+    run_parser = subparsers.add_parser("run", help="Ejecutar un script en el worker")
+    run_parser.add_argument("script")
+    run_parser.add_argument("args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        return serve(args.idle_timeout)
+    return run(args.script, args.args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Importar auto_scrape y benchmarks desde el árbol de trabajo
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
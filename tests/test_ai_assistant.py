@@ -0,0 +1,120 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from auto_scrape.ai_assistant import AIAssistant
+
+
+class _CompletionHandler(BaseHTTPRequestHandler):
+    """API compatible con OpenAI que responde con el último mensaje recibido."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(body)
+        prompt = body["messages"][-1]["content"]
+        payload = json.dumps({
+            "id": "chatcmpl-test", "object": "chat.completion", "created": 0,
+            "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": f"# {prompt}"}}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def completion_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CompletionHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_generate_batch_rejects_htmls_of_another_length():
+    assistant = AIAssistant(cache=False)
+    with pytest.raises(ValueError):
+        asyncio.run(assistant.generate_batch(["a", "b", "c"], htmls=["<p>a</p>"]))
+
+
+def test_generate_batch_sends_every_prompt_with_its_html(completion_server):
+    pytest.importorskip("openai")
+    host, port = completion_server.server_address
+    assistant = AIAssistant(model="stub", cache=False, api_key="test",
+                            base_url=f"http://{host}:{port}/v1")
+
+    codes = asyncio.run(assistant.generate_batch(
+        ["uno", "dos", "tres"], htmls=["<p>Precio 1</p>", None, "<p>Precio 3</p>"]))
+
+    assert len(completion_server.requests) == 3
+    assert codes[0].startswith("# uno") and "Precio 1" in codes[0]
+    assert codes[1] == "# dos"
+    assert codes[2].startswith("# tres") and "Precio 3" in codes[2]
+
+
+class _StubOpenAI:
+    """Sustituto del módulo `openai` que cuenta las llamadas."""
+
+    def __init__(self):
+        self.calls = []
+        self.chat = self
+        self.completions = self
+
+    def create(self, model, messages, temperature, max_tokens):
+        self.calls.append((model, messages[-1]["content"]))
+        message = type("Message", (), {"content": f"# {model}: {messages[-1]['content']}"})
+        choice = type("Choice", (), {"message": message})
+        return type("Response", (), {"choices": [choice], "usage": None})
+
+
+def test_completion_cache_hits_refreshes_and_misses(tmp_path, monkeypatch):
+    from auto_scrape import ai_assistant
+    from auto_scrape.cache import CompletionCache
+
+    stub = _StubOpenAI()
+    monkeypatch.setattr(ai_assistant, "_openai", lambda: stub)
+    cache = CompletionCache(tmp_path)
+    assistant = AIAssistant(model="a", cache=cache)
+
+    assert assistant.generate_scraping_code("productos") == "# a: productos"
+    assert assistant.generate_scraping_code("productos") == "# a: productos"
+    assert len(stub.calls) == 1 and cache.hits == 1
+
+    assistant.generate_scraping_code("productos", refresh=True)
+    assert len(stub.calls) == 2
+
+    assistant.generate_scraping_code("noticias")
+    assert AIAssistant(model="b", cache=cache).generate_scraping_code("productos") == "# b: productos"
+    assert stub.calls[2:] == [("a", "noticias"), ("b", "productos")]
+
+
+def test_completion_cache_is_on_by_default_and_opened_lazily(tmp_path, monkeypatch):
+    from auto_scrape import ai_assistant
+
+    stub = _StubOpenAI()
+    monkeypatch.setattr(ai_assistant, "_openai", lambda: stub)
+    monkeypatch.setenv("AUTO_SCRAPE_CACHE_DIR", str(tmp_path))
+
+    # Crear el asistente no toca el disco
+    assistant = AIAssistant(model="a")
+    assert not (tmp_path / "llm").exists()
+
+    assert assistant.generate_scraping_code("productos") == "# a: productos"
+    assert (tmp_path / "llm").exists()
+    # Otra ejecución con la misma configuración no vuelve a llamar a la API
+    assert AIAssistant(model="a").generate_scraping_code("productos") == "# a: productos"
+    assert len(stub.calls) == 1
+
+    assert AIAssistant(cache=False).cache is None
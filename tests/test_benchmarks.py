@@ -0,0 +1,89 @@
+import json
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from benchmarks.run import compare, latency_metrics, percentile, run_case
+from benchmarks.site import FixtureSite, SiteConfig, product
+
+
+def test_percentile_uses_the_nearest_rank():
+    values = [5, 1, 4, 2, 3]
+    assert percentile(values, 50) == 3
+    assert percentile(values, 0) == 1
+    assert percentile(values, 99) == percentile(values, 100) == 5
+    assert percentile([], 50) == 0.0
+
+
+def test_latency_metrics():
+    metrics = latency_metrics([0.01] * 99 + [0.5], elapsed=2.0, pages=100)
+    assert metrics == {"pages": 100, "seconds": 2.0, "pages_per_sec": 50.0, "p50_ms": 10.0, "p99_ms": 10.0}
+    assert latency_metrics([], elapsed=0, pages=0)["pages_per_sec"] == 0.0
+
+
+def _report(path, commit, **metrics):
+    results = [{"suite": "crawl", "case": "http", "status": "ok", "metrics": metrics},
+               {"suite": "crawl", "case": "browser", "status": "skipped", "reason": "Falta la dependencia x"}]
+    path.write_text(json.dumps({"meta": {"commit": commit, "site": {}, "options": {}}, "results": results}))
+    return str(path)
+
+
+@pytest.mark.parametrize("new, regressed", [
+    ({"p99_ms": 11.5}, 1),                      # latencia +15 %
+    ({"p99_ms": 10.5}, 0),                      # dentro del umbral
+    ({"p99_ms": 8.0}, 0),                       # mejora
+    ({"pages_per_sec": 80.0}, 1),               # ritmo -20 %
+    ({"pages_per_sec": 130.0}, 0),
+    ({"peak_rss_mb": 130.0}, 1),
+    ({"seconds": 20.0}, 0),                     # el tiempo total no se compara
+])
+def test_compare_flags_regressions_beyond_the_threshold(tmp_path, capsys, new, regressed):
+    base = {"p99_ms": 10.0, "pages_per_sec": 100.0, "peak_rss_mb": 100.0, "seconds": 10.0}
+    base_path = _report(tmp_path / "base.json", "aaa", **base)
+    new_path = _report(tmp_path / "new.json", "bbb", **{**base, **new})
+    assert compare(base_path, new_path, threshold=0.10) == regressed
+    assert f"{regressed} regresiones" in capsys.readouterr().out
+
+
+def test_compare_warns_when_the_reports_are_not_comparable(tmp_path, capsys):
+    base_path = _report(tmp_path / "base.json", "aaa", p99_ms=10.0)
+    new_report = json.loads(open(_report(tmp_path / "new.json", "bbb", p99_ms=10.0)).read())
+    new_report["meta"]["site"] = {"pages": 10}
+    (tmp_path / "new.json").write_text(json.dumps(new_report))
+    assert compare(base_path, str(tmp_path / "new.json"), threshold=0.10) == 0
+    assert "parámetros distintos (site)" in capsys.readouterr().out
+
+
+def test_run_case_records_metrics_or_the_error():
+    result = run_case("frontier", "exact", "http://bench.test", {"urls": 200})
+    assert result["status"] == "ok"
+    assert result["metrics"]["urls"] == 200 and result["metrics"]["peak_rss_mb"] > 0
+
+    result = run_case("exporters", "jsonl", "", {"records": 50})
+    assert result["status"] == "ok" and result["metrics"]["bytes"] > 0
+
+    result = run_case("exporters", "desconocido", "", {"records": 1})
+    assert result["status"] == "error"
+
+
+def test_products_are_deterministic_for_a_seed():
+    config = SiteConfig(page_kb=1)
+    assert product(7, config) == product(7, SiteConfig(page_kb=1))
+    assert product(7, config) != product(8, config)
+    assert product(7, config) != product(7, SiteConfig(page_kb=1, seed=1))
+
+
+def test_fixture_site_serves_the_catalogue():
+    config = SiteConfig(pages=30, per_page=10, page_kb=1)
+    with FixtureSite(config) as site:
+        with urlopen(site.url("/list?page=1")) as response:
+            listing = response.read().decode()
+        with urlopen(site.url("/item/7")) as response:
+            item = response.read().decode()
+        with pytest.raises(HTTPError) as missing:
+            urlopen(site.url(f"/item/{config.pages}"))
+        missing.value.close()
+
+    assert listing.count("class='product-link'") == 10 and "href='/list?page=2'" in listing
+    assert product(7, config)["title"] in item
@@ -0,0 +1,90 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from auto_scrape.blocking import PROFILES, BlockingRules, BlockProfile, block_profile, route_blocking
+
+
+def test_profile_blocks_types_and_tracker_domains():
+    light = PROFILES["light"]
+    assert light.blocks("image", "https://shop.test/a.png")
+    assert not light.blocks("stylesheet", "https://shop.test/site.css")
+    assert light.blocks("script", "https://www.google-analytics.com/analytics.js")
+    # Subdominios y dominios con ruta
+    assert light.blocks("xhr", "https://region1.google-analytics.com/g/collect")
+    assert light.blocks("script", "https://tiktok.com/analytics/pixel.js")
+    assert not light.blocks("script", "https://tiktok.com/embed.js")
+    assert not light.blocks("script", "https://notdoubleclick.net/x.js")
+    # Los documentos nunca se bloquean
+    assert not PROFILES["strict"].blocks("document", "https://doubleclick.net/")
+    assert PROFILES["strict"].blocks("stylesheet", "https://shop.test/site.css")
+    assert not PROFILES["off"].blocks("image", "https://doubleclick.net/a.png")
+
+
+def test_block_profile_merges_with_its_base():
+    profile = block_profile({"extends": "trackers", "types": ["image"], "domains": ["cdn.ads.test"]})
+    assert profile.types == frozenset({"image"})
+    assert profile.domains[-1] == "cdn.ads.test" and "doubleclick.net" in profile.domains
+    assert profile.blocks("script", "https://x.cdn.ads.test/a.js")
+
+    strict_plus = block_profile({"extends": "strict", "types": ["xhr"]})
+    assert strict_plus.types == PROFILES["strict"].types | {"xhr"}
+    assert block_profile({"types": ["font"]}) == BlockProfile(types=frozenset({"font"}))
+
+    assert block_profile(None) is PROFILES["off"]
+    assert block_profile(PROFILES["light"]) is PROFILES["light"]
+    with pytest.raises(ValueError, match="disponibles"):
+        block_profile("todo")
+
+
+def _request(url, resource_type, frame_url=""):
+    return SimpleNamespace(url=url, resource_type=resource_type, frame=SimpleNamespace(url=frame_url))
+
+
+def test_rules_pick_the_profile_of_the_page_making_the_request():
+    rules = BlockingRules({"*.shop.test": "strict", "*://news.test/live/*": "off",
+                           "video.test": {"extends": "trackers"}}, default="light")
+    assert rules.profile_for("https://www.shop.test/p/1") is PROFILES["strict"]
+    assert rules.profile_for("https://news.test/live/today") is PROFILES["off"]
+    assert rules.profile_for("https://news.test/archive") is PROFILES["light"]
+
+    # Una imagen de un CDN se decide con el perfil de la página que la pide
+    assert not rules.blocks(_request("https://cdn.test/a.png", "image", "https://news.test/live/x"))
+    assert rules.blocks(_request("https://cdn.test/a.png", "image", "https://news.test/archive"))
+    assert not rules.blocks(_request("https://cdn.test/a.png", "image", "https://video.test/"))
+    # Sin página (about:blank) se usa la URL de la propia petición
+    assert rules.blocks(_request("https://www.shop.test/site.css", "stylesheet", "about:blank"))
+    assert rules.stats() == {"blocked": 2, "allowed": 2}
+
+    # Un perfil (nombre o diccionario) se aplica a todos los sitios
+    assert BlockingRules({"extends": "off", "types": ["font"]}).default.types == frozenset({"font"})
+    assert BlockingRules("strict").profile_for("https://any.test/") is PROFILES["strict"]
+
+
+def test_route_blocking_aborts_or_falls_back():
+    class _Route:
+        def __init__(self, request):
+            self.request = request
+            self.outcome = None
+
+        async def abort(self, reason):
+            self.outcome = reason
+
+        async def fallback(self):
+            self.outcome = "fallback"
+
+    class _Context:
+        async def route(self, pattern, handler):
+            self.pattern, self.handler = pattern, handler
+
+    async def scenario():
+        context = _Context()
+        rules = await route_blocking(context, "light")
+        image = _Route(_request("https://shop.test/a.png", "image", "https://shop.test/"))
+        page = _Route(_request("https://shop.test/", "document", "https://shop.test/"))
+        await context.handler(image)
+        await context.handler(page)
+        return context.pattern, image.outcome, page.outcome, rules.stats()
+
+    assert asyncio.run(scenario()) == ("**/*", "blockedbyclient", "fallback", {"blocked": 1, "allowed": 1})
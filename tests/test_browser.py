@@ -0,0 +1,53 @@
+import asyncio
+
+from auto_scrape.browser import BrowserPool
+
+
+class _Page:
+    def is_closed(self):
+        return False
+
+    async def close(self):
+        pass
+
+
+class _Context:
+    async def new_page(self):
+        await asyncio.sleep(0)
+        return _Page()
+
+    async def close(self):
+        pass
+
+
+class _Browser:
+    def __init__(self):
+        self.contexts = 0
+
+    async def new_context(self, **options):
+        await asyncio.sleep(0.01)
+        self.contexts += 1
+        return _Context()
+
+
+def _pool(**kwargs):
+    # Pool sin Playwright: lo que `start` prepara, con un navegador falso
+    pool = BrowserPool(**kwargs)
+    pool.browser = _Browser()
+    pool._slots = asyncio.Semaphore(pool.max_pages)
+    pool._creating = asyncio.Lock()
+    return pool
+
+
+def test_concurrent_acquires_never_exceed_the_context_limit():
+    async def scenario():
+        pool = _pool(contexts=2, max_pages=8)
+        pages = await asyncio.gather(*(pool.acquire() for _ in range(8)))
+        assert pool.browser.contexts == 2
+        assert len(pool._pool) == 2 and pool.open_pages == 8
+        assert sorted(c.open for c in pool._pool) == [4, 4]
+        for page in pages:
+            await pool.release(page)
+        assert pool.open_pages == 0
+
+    asyncio.run(scenario())
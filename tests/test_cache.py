@@ -0,0 +1,81 @@
+import os
+import sqlite3
+
+import pytest
+
+from auto_scrape import cache as cache_module
+from auto_scrape.cache import CompletionCache, ResponseCache
+
+
+def test_cached_body_is_decoded_with_its_charset(tmp_path):
+    cache = ResponseCache(tmp_path)
+    body = "<p>Año: 10 €</p>".encode("cp1252")
+    cache.store("https://example.com/a", 200, {"Content-Type": "text/html; charset=windows-1252"}, body)
+    cache.store("https://example.com/b", 200, {"Content-Type": "text/html"}, body, encoding="cp1252")
+    cache.store("https://example.com/c", 200, {}, "<p>Año</p>".encode("utf-8"))
+
+    assert cache.get("https://example.com/a").text == "<p>Año: 10 €</p>"
+    assert cache.get("https://example.com/b").text == "<p>Año: 10 €</p>"
+    assert cache.get("https://example.com/c").text == "<p>Año</p>"
+
+
+def test_old_index_without_charset_is_migrated(tmp_path):
+    db = sqlite3.connect(str(tmp_path / "index.sqlite"))
+    db.execute("""CREATE TABLE entries (key TEXT PRIMARY KEY, url TEXT NOT NULL,
+                  status INTEGER NOT NULL, headers TEXT NOT NULL, body_hash TEXT NOT NULL,
+                  size INTEGER NOT NULL, stored_at REAL NOT NULL, accessed_at REAL NOT NULL)""")
+    db.commit()
+    db.close()
+
+    cache = ResponseCache(tmp_path)
+    cache.store("https://example.com/", 200, {"Content-Type": "text/html; charset=latin-1"},
+                "ñ".encode("latin-1"))
+    assert cache.get("https://example.com/").text == "ñ"
+
+
+def test_bodies_are_written_through_private_temp_files(tmp_path, monkeypatch):
+    cache = ResponseCache(tmp_path)
+    renames = []
+    replace = os.replace
+
+    def failing_replace(src, dst):
+        renames.append(os.path.basename(src))
+        if len(renames) == 2:
+            raise OSError("disco lleno")
+        replace(src, dst)
+
+    monkeypatch.setattr(cache_module.os, "replace", failing_replace)
+    cache.store("https://example.com/a", 200, {}, b"<p>a</p>")
+    with pytest.raises(OSError):
+        cache.store("https://example.com/b", 200, {}, b"<p>b</p>")
+
+    assert renames[0] != renames[1] and all(name.startswith(".body-") for name in renames)
+    # El temporal del cuerpo que no se pudo guardar no queda en disco
+    bodies = [p.name for p in tmp_path.rglob("*") if p.is_file() and p.parent != tmp_path]
+    assert len(bodies) == 1 and not bodies[0].startswith(".body-")
+    assert cache.get("https://example.com/a").body == b"<p>a</p>"
+
+
+def test_hits_update_access_time_in_batches(tmp_path):
+    cache = ResponseCache(tmp_path)
+    cache.store("https://example.com/", 200, {}, b"<p>x</p>")
+    stored = cache._db.execute("SELECT accessed_at FROM entries").fetchone()[0]
+    changes = cache._db.total_changes
+
+    for _ in range(10):
+        assert cache.get("https://example.com/").fresh
+    assert cache._db.total_changes == changes
+
+    cache.flush()
+    assert cache._db.execute("SELECT accessed_at FROM entries").fetchone()[0] >= stored
+    assert cache._db.total_changes == changes + 1
+
+
+def test_completion_cache_keeps_recently_read_entries(tmp_path):
+    cache = CompletionCache(tmp_path, max_entries=2)
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"
+    cache.set("c", "C")
+    # "a" se leyó después de guardar "b": se expulsa "b"
+    assert cache.get("a") == "A" and cache.get("b") is None
@@ -0,0 +1,110 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+from auto_scrape.checkpoint import CrawlCheckpoint, default_checkpoint_dir
+from auto_scrape.exporters import JSONExporter
+from auto_scrape.extraction import ExtractionSpec
+from auto_scrape.scraper import Crawler, PageResult
+
+
+class _Page:
+    def __init__(self, visited):
+        self.visited = visited
+
+    async def goto(self, url, **kwargs):
+        self.visited.append(url)
+
+
+class _Pool:
+    def __init__(self):
+        self.visited = []
+
+    async def start(self):
+        return self
+
+    async def close(self):
+        pass
+
+    @asynccontextmanager
+    async def page(self):
+        yield _Page(self.visited)
+
+
+async def _parse(page, url):
+    return PageResult([{"url": url}])
+
+
+def test_checkpoint_dir_depends_on_what_is_crawled_and_extracted():
+    config = {"start_urls": ["https://a/", "https://b/"], "max_depth": 2, "checkpoint": True}
+    same = {**config, "start_urls": ["https://b/", "https://a/"], "concurrency": 32}
+    assert default_checkpoint_dir(config) == default_checkpoint_dir(same)
+
+    for change in ({"max_depth": 3}, {"allowed_domains": ["a"]}, {"fetch": "auto"}, {"schema": True}):
+        assert default_checkpoint_dir({**config, **change}) != default_checkpoint_dir(config)
+
+    spec = ExtractionSpec({"fields": {"title": "h1"}})
+    other = ExtractionSpec({"fields": {"title": "h2"}})
+    assert default_checkpoint_dir(config, spec.as_parse()) == default_checkpoint_dir(config, spec.parse_html)
+    assert default_checkpoint_dir(config, spec.as_parse()) != default_checkpoint_dir(config, other.as_parse())
+    assert default_checkpoint_dir(config, _parse) != default_checkpoint_dir(config, spec.as_parse())
+
+
+def test_checkpoint_commit_and_load(tmp_path):
+    output = tmp_path / "out.jsonl"
+    checkpoint = CrawlCheckpoint(tmp_path / "ckpt")
+    assert checkpoint.load() is None
+    checkpoint.reset(str(output))
+    writer = JSONExporter(lines=True).open(str(output))
+    for url in ("https://a/1", "https://a/2", "https://a/3"):
+        checkpoint.seen(url, 0)
+    writer.write({"n": 1})
+    checkpoint.page_done("https://a/1")
+    checkpoint.page_done("https://a/2", failed=True)
+    checkpoint.attempt("https://a/3", 1)
+    checkpoint.commit(writer, records=1)
+
+    state = checkpoint.load()
+    assert (state.seen, state.pending, state.done) == (3, 1, 2)
+    assert state.attempts == {"https://a/3": 1}
+    assert (state.output_file, state.records) == (str(output), 1)
+    assert state.output_offset == output.stat().st_size > 0
+    assert list(checkpoint.iter_pending()) == [("https://a/3", 0)]
+
+    checkpoint.commit(writer, records=1, finished=True)
+    assert checkpoint.load() is None
+    writer.close()
+    checkpoint.close()
+
+
+def test_crawler_truncates_the_output_and_resumes(tmp_path):
+    output = tmp_path / "out.jsonl"
+    config = {"start_urls": ["https://a/1", "https://a/2"], "checkpoint": str(tmp_path / "ckpt"),
+              "output": str(output)}
+
+    # Crawl interrumpido: a/1 terminada y registrada; lo escrito después se pierde
+    checkpoint = CrawlCheckpoint(config["checkpoint"])
+    checkpoint.reset(str(output))
+    writer = JSONExporter(lines=True).open(str(output))
+    checkpoint.seen("https://a/1", 0)
+    checkpoint.seen("https://a/2", 0)
+    writer.write({"url": "https://a/1"})
+    checkpoint.page_done("https://a/1")
+    checkpoint.commit(writer, records=1)
+    writer.write({"url": "https://a/2"})
+    writer.flush()
+    with open(output, "a", encoding="utf-8") as f:
+        f.write('{"url": "https://a/')
+    checkpoint.close()
+
+    pool = _Pool()
+    stats = asyncio.run(Crawler(config, _parse, pool=pool).run())
+    assert pool.visited == ["https://a/2"]
+    assert stats.records == 1
+    with open(output, encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == [{"url": "https://a/1"}, {"url": "https://a/2"}]
+
+    # Terminado: la siguiente ejecución empieza de cero
+    pool = _Pool()
+    asyncio.run(Crawler(config, _parse, pool=pool).run())
+    assert sorted(pool.visited) == ["https://a/1", "https://a/2"]
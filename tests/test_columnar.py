@@ -0,0 +1,63 @@
+import pytest
+
+from auto_scrape.exporters import ArrowExporter, ParquetExporter
+
+pa = pytest.importorskip("pyarrow")
+
+
+def _drifting_records():
+    # Cada row group (de 2 registros) cambia algún tipo respecto al anterior
+    return [
+        {"id": 1, "price": 10, "note": None, "meta": {}},
+        {"id": 2, "price": 12, "note": None, "meta": {}},
+        {"id": 3, "price": 9.5, "note": None, "meta": {}},
+        {"id": 4, "price": 11, "note": "oferta", "meta": {}},
+        {"id": "5", "price": 8, "note": 3, "meta": {"seller": "x"}, "tags": ["a"]},
+    ]
+
+
+def _read(exporter, path):
+    if isinstance(exporter, ArrowExporter):
+        with pa.OSFile(path, "rb") as source:
+            return pa.ipc.open_file(source).read_all()
+    import pyarrow.parquet as pq
+
+    return pq.read_table(path)
+
+
+@pytest.mark.parametrize("exporter_class", [ParquetExporter, ArrowExporter])
+def test_schema_widens_across_row_groups(tmp_path, exporter_class):
+    exporter = exporter_class(row_group_size=2)
+    path = exporter.export(_drifting_records(), str(tmp_path / "out"))
+
+    table = _read(exporter, path)
+    assert table.schema.field("id").type == pa.string()
+    assert table.schema.field("price").type == pa.float64()
+    assert table.schema.field("note").type == pa.string()
+    assert pa.types.is_struct(table.schema.field("meta").type)
+    rows = table.to_pylist()
+    assert [r["id"] for r in rows] == ["1", "2", "3", "4", "5"]
+    assert [r["price"] for r in rows] == [10.0, 12.0, 9.5, 11.0, 8.0]
+    assert [r["note"] for r in rows] == [None, None, None, "oferta", "3"]
+    assert rows[4]["meta"] == {"seller": "x"}
+    assert rows[4]["tags"] == ["a"] and rows[0]["tags"] is None
+    assert [p.name for p in tmp_path.iterdir()] == ["out"]
+
+
+def test_empty_objects_are_stored_as_null(tmp_path):
+    path = ParquetExporter(row_group_size=2).export(
+        [{"id": i, "meta": {}} for i in range(3)], str(tmp_path / "out.parquet"))
+
+    table = _read(ParquetExporter(), path)
+    assert table.schema.field("meta").type == pa.null()
+    assert table.column("id").to_pylist() == [0, 1, 2]
+
+
+def test_failed_export_removes_partial_file(tmp_path):
+    def records():
+        yield from _drifting_records()
+        raise RuntimeError("fallo")
+
+    with pytest.raises(RuntimeError):
+        ParquetExporter(row_group_size=2).export(records(), str(tmp_path / "out.parquet"))
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,81 @@
+import asyncio
+from collections import Counter
+from contextlib import asynccontextmanager
+
+from auto_scrape import scraper
+from auto_scrape.cache import ResponseCache
+from auto_scrape.fetcher import Fetcher
+
+
+class _Page:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def goto(self, url, **kwargs):
+        host = scraper.host_of(url)
+        self.pool.active[host] += 1
+        self.pool.peak[host] = max(self.pool.peak[host], self.pool.active[host])
+        await asyncio.sleep(0.01)
+        self.pool.active[host] -= 1
+        self.pool.visited.append(url)
+
+
+class _Pool:
+    def __init__(self):
+        self.active, self.peak = Counter(), Counter()
+        self.visited = []
+
+    async def start(self):
+        return self
+
+    async def close(self):
+        pass
+
+    @asynccontextmanager
+    async def page(self):
+        yield _Page(self)
+
+
+async def _parse(page, url):
+    return scraper.PageResult([{"url": url}])
+
+
+def test_run_closes_the_response_cache(tmp_path, monkeypatch):
+    closed = []
+
+    class _Cache(ResponseCache):
+        def close(self):
+            closed.append(self)
+            super().close()
+
+    async def no_session(self):
+        return self
+
+    monkeypatch.setattr(scraper, "ResponseCache", _Cache)
+    monkeypatch.setattr(Fetcher, "start", no_session)
+    crawler = scraper.Crawler(
+        {'fetch': 'auto', 'cache': str(tmp_path / "cache")},
+        parse_html=lambda html, url: [],
+        output_file=str(tmp_path / "out.jsonl"),
+        pool=_Pool(),
+    )
+
+    asyncio.run(crawler.run())
+    assert len(closed) == 1
+    assert crawler.fetcher.cache is None
+
+    # Una segunda ejecución abre su propia caché
+    asyncio.run(crawler.run())
+    assert len(closed) == 2
+
+
+def test_crawl_keeps_per_host_concurrency_within_the_limit(tmp_path):
+    urls = [f"https://{host}/{i}" for host in ("a.test", "b.test") for i in range(6)]
+    pool = _Pool()
+    stats = asyncio.run(scraper.Crawler(
+        {'start_urls': urls, 'concurrency': 8, 'per_host': 2},
+        _parse, output_file=str(tmp_path / "out.jsonl"), pool=pool,
+    ).run())
+
+    assert stats.pages_ok == 12 and sorted(pool.visited) == sorted(urls)
+    assert pool.peak == {"a.test": 2, "b.test": 2}
@@ -0,0 +1,69 @@
+import csv
+
+from auto_scrape.exporters import CSVExporter
+
+
+def _read(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_empty_lists_do_not_create_child_tables(tmp_path):
+    records = [{"id": 1, "tags": [], "results": [{"name": "a"}]},
+               {"id": 2, "tags": [], "results": []}]
+    CSVExporter(lists="child").export(records, str(tmp_path / "out.csv"))
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["out.csv", "out.results.csv"]
+    rows = _read(tmp_path / "out.csv")
+    assert [r["tags"] for r in rows] == ["[]", "[]"]
+    assert "results" not in rows[0]
+    assert _read(tmp_path / "out.results.csv") == [{"_index": "0", "_parent": "0", "name": "a"}]
+
+
+def test_nested_records_are_flattened_into_dotted_columns(tmp_path):
+    records = [
+        {"id": 1, "meta": {"author": "ana", "stats": {"views": 10}}, "tags": ["a", "b"]},
+        {"id": 2, "meta": {"author": None}, "tags": []},
+    ]
+    path = CSVExporter().export(records, str(tmp_path / "out.csv"))
+    rows = _read(path)
+    assert list(rows[0]) == ["id", "meta.author", "meta.stats.views", "tags"]
+    assert rows == [
+        {"id": "1", "meta.author": "ana", "meta.stats.views": "10", "tags": '["a", "b"]'},
+        {"id": "2", "meta.author": "", "meta.stats.views": "", "tags": "[]"},
+    ]
+
+
+def test_columns_found_after_the_sample_rewrite_the_header(tmp_path):
+    records = [{"id": i} for i in range(3)] + [{"id": 3, "extra": {"x": 1}}]
+    path = CSVExporter(sample_size=2, sep="__").export(records, str(tmp_path / "out.csv"))
+    rows = _read(path)
+    assert list(rows[0]) == ["id", "extra__x"]
+    assert [r["extra__x"] for r in rows] == ["", "", "", "1"]
+
+
+def test_declared_fieldnames_ignore_extra_fields(tmp_path):
+    records = [{"id": 1, "name": "a", "meta": {"x": 1}}]
+    path = CSVExporter(fieldnames=["name", "meta.x"]).export(records, str(tmp_path / "out.csv"))
+    assert _read(path) == [{"name": "a", "meta.x": "1"}]
+
+
+def test_nested_lists_of_objects_go_to_child_tables(tmp_path):
+    records = [
+        {"id": 1, "race": {"results": [{"name": "a", "splits": [{"km": 5}, {"km": 10}]}]}},
+        {"id": 2, "race": {"results": [{"name": "b", "splits": []}, {"name": "c"}]}},
+    ]
+    CSVExporter(lists="child").export(records, str(tmp_path / "out.csv"))
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "out.csv", "out.race.results.csv", "out.race.results.splits.csv"]
+    assert _read(tmp_path / "out.csv") == [{"id": "1"}, {"id": "2"}]
+    assert _read(tmp_path / "out.race.results.csv") == [
+        {"_index": "0", "_parent": "0", "name": "a"},
+        {"_index": "0", "_parent": "1", "name": "b"},
+        {"_index": "1", "_parent": "1", "name": "c"},
+    ]
+    assert _read(tmp_path / "out.race.results.splits.csv") == [
+        {"_index": "0", "_parent": "0", "km": "5"},
+        {"_index": "1", "_parent": "0", "km": "10"},
+    ]
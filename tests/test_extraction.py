@@ -0,0 +1,212 @@
+import pickle
+
+import pytest
+
+from auto_scrape.extraction import ExtractionSpec, Field, coerce, parse_number
+
+
+def test_attribute_shorthand_only_splits_on_an_attribute_name():
+    assert (Field("url", "a.details@href").selector, Field("url", "a.details@href").attr) == ("a.details", "href")
+    assert Field("lang", "html@xml:lang").attr == "xml:lang"
+    assert Field("id", "div@data-id").attr == "data-id"
+
+    mail = Field("mail", 'a[href^="mailto:x@y.com"]')
+    assert (mail.selector, mail.attr) == ('a[href^="mailto:x@y.com"]', "text")
+    mail_href = Field("mail", 'a[href*="@"]@href')
+    assert (mail_href.selector, mail_href.attr) == ('a[href*="@"]', "href")
+    # Con attr explícito el selector se respeta tal cual
+    explicit = Field("x", {"selector": "a@href", "attr": "title"})
+    assert (explicit.selector, explicit.attr) == ("a@href", "title")
+
+
+def test_field_validation():
+    with pytest.raises(ValueError):
+        Field("x", {"selector": "a", "colour": "red"})
+    with pytest.raises(ValueError):
+        Field("x", {"selector": "a", "type": "date"})
+    with pytest.raises(ValueError):
+        ExtractionSpec({"selector": "li"})
+    assert Field("rows", {"selector": "tr", "fields": {"a": "td"}}).many
+
+
+@pytest.mark.parametrize("text, number", [
+    ("1,234.5 €", 1234.5),
+    ("1.234,5 €", 1234.5),
+    ("12,5", 12.5),
+    ("1,234", 1234.0),
+    ("0,125", 0.125),
+    ("1.234.567", 1234567.0),
+    ("-3 puntos", -3.0),
+    ("sin número", None),
+])
+def test_parse_number(text, number):
+    assert parse_number(text) == number
+
+
+def test_coerce():
+    assert coerce("3º", "int") == 3
+    assert coerce("no", "bool") is False and coerce("sí", "bool") is True
+    assert coerce("n/a", "float") is None
+    assert coerce(None, "int") is None
+
+
+SPEC = {
+    "selector": ".competition",
+    "fields": {
+        "name": "h2",
+        "url": "a.details@href",
+        "tags": {"selector": ".tag", "many": True},
+        "results": {
+            "selector": "tr.result",
+            "fields": {
+                "name": ".athlete",
+                "position": {"selector": ".pos", "type": "int"},
+                "time": {"selector": ".time", "pattern": r"(\d+:\d+:\d+)", "default": "DNF"},
+            },
+        },
+    },
+    "links": "a.next",
+}
+
+
+def test_process_normalizes_the_raw_result():
+    spec = ExtractionSpec(SPEC)
+    records, links = spec.process({
+        "base": "https://example.com/list/",
+        "records": [{
+            "name": "  Maratón\n  de Bilbao ",
+            "url": " ../c/1 ",
+            "tags": ["42k", None],
+            "results": [
+                {"name": "Ane", "position": "1º", "time": "Tiempo: 2:10:05"},
+                {"name": "Jon", "position": None, "time": "retirado"},
+            ],
+        }],
+        "links": ["?page=2"],
+    })
+    assert records == [{
+        "name": "Maratón de Bilbao",
+        "url": "https://example.com/c/1",
+        "tags": ["42k"],
+        "results": [
+            {"name": "Ane", "position": 1, "time": "2:10:05"},
+            {"name": "Jon", "position": None, "time": "DNF"},
+        ],
+    }]
+    assert links == ["https://example.com/list/?page=2"]
+
+
+def test_script_is_a_single_evaluate_function():
+    script = ExtractionSpec(SPEC).script
+    assert script.startswith("() => {") and script.rstrip().endswith("}")
+    assert '"a.details"' in script and '"href"' in script
+
+
+def test_spec_pickles_from_its_definition():
+    spec = pickle.loads(pickle.dumps(ExtractionSpec(SPEC)))
+    assert spec.spec == SPEC and [f.name for f in spec.fields] == ["name", "url", "tags", "results"]
+
+
+def test_extract_html_with_lxml():
+    pytest.importorskip("lxml")
+    pytest.importorskip("cssselect")
+    html = """
+    <html><head><base href="/base/"></head><body>
+      <div class="competition">
+        <h2>Carrera <b>A</b></h2><a class="details" href="a.html">+</a>
+        <a class="mail" href="mailto:info@example.com">info</a>
+        <span class="tag">10k</span><span class="tag">ruta</span>
+        <table><tr class="result"><td class="athlete">Ane</td><td class="pos">2</td>
+        <td class="time">0:35:10</td></tr></table>
+      </div>
+      <a class="next" href="?p=2">›</a>
+    </body></html>
+    """
+    spec = ExtractionSpec({**SPEC, "fields": {**SPEC["fields"],
+                                              "mail": 'a[href^="mailto:info@"]@href'}})
+    result = spec.parse_html(html, "https://example.com/x/")
+    assert result.records == [{
+        "name": "Carrera A",
+        "url": "https://example.com/base/a.html",
+        "tags": ["10k", "ruta"],
+        "results": [{"name": "Ane", "position": 2, "time": "0:35:10"}],
+        "mail": "mailto:info@example.com",
+    }]
+    assert result.links == ["https://example.com/base/?p=2"]
+
+
+# Paridad navegador / lxml sobre el HTML del sitio de benchmark
+
+ITEM_SPEC = {
+    "fields": {
+        "title": "h1.title",
+        "price": {"selector": ".price", "type": "float"},
+        "stock": {"selector": ".stock", "type": "int"},
+        "tags": {"selector": ".tags li", "many": True},
+        "specs": {"selector": ".specs tr", "fields": {"name": "th", "value": "td"}},
+        "stylesheet": "link[rel~=stylesheet]@href",
+    },
+}
+LIST_SPEC = {
+    "selector": "li.product-card",
+    "fields": {"name": "a.product-link", "url": "a.product-link@href", "thumb": "img@src"},
+    "links": "a.next",
+}
+
+
+def _fixture_pages():
+    from benchmarks.site import SiteConfig, render_item, render_list
+
+    config = SiteConfig(pages=5, per_page=3, page_kb=1)
+    return config, [
+        (LIST_SPEC, "http://fixture.test/list?page=1", render_list(1, config)),
+        (LIST_SPEC, "http://fixture.test/list?page=2", render_list(2, config)),
+        (ITEM_SPEC, "http://fixture.test/item/3", render_item(3, config)),
+    ]
+
+
+def test_lxml_extracts_the_fixture_site():
+    pytest.importorskip("lxml")
+    pytest.importorskip("cssselect")
+    from benchmarks.site import product
+
+    config, pages = _fixture_pages()
+    first, second, item = (ExtractionSpec(spec).parse_html(html, url) for spec, url, html in pages)
+    assert first.records == [
+        {"name": f"Producto {i}", "url": f"http://fixture.test/item/{i}",
+         "thumb": f"http://fixture.test/static/thumb/{i}.png"}
+        for i in range(3)
+    ]
+    assert first.links == ["http://fixture.test/list?page=2"]
+    assert [r["name"] for r in second.records] == ["Producto 3", "Producto 4"] and second.links == []
+
+    data = product(3, config)
+    assert item.records == [{
+        "title": data["title"], "price": data["price"], "stock": data["stock"], "tags": data["tags"],
+        "specs": [{"name": k, "value": v} for k, v in data["specs"].items()],
+        "stylesheet": "http://fixture.test/static/site.css",
+    }]
+
+
+def test_browser_and_lxml_return_the_same_raw_result():
+    pytest.importorskip("lxml")
+    pytest.importorskip("cssselect")
+    sync_api = pytest.importorskip("playwright.sync_api")
+
+    _, pages = _fixture_pages()
+    with sync_api.sync_playwright() as p:
+        try:
+            browser = p.chromium.launch()
+        except Exception as e:
+            pytest.skip(f"Chromium no disponible: {e}")
+        try:
+            page = browser.new_page()
+            for spec, url, html in pages:
+                page.route("http://fixture.test/**",
+                           lambda route, html=html: route.fulfill(body=html, content_type="text/html"))
+                page.goto(url)
+                spec = ExtractionSpec(spec)
+                assert page.evaluate(spec.script) == spec.evaluate_html(html, url)
+                page.unroute("http://fixture.test/**")
+        finally:
+            browser.close()
@@ -0,0 +1,84 @@
+import asyncio
+
+from auto_scrape.fetcher import BROWSER, HTTP, Fetcher, FetchResult, RenderPolicy
+
+SHELL = '<html><body><div id="root"></div></body></html>'
+
+
+class FakeFetcher(Fetcher):
+    """Fetcher sin red: respuestas HTTP fijas y un navegador simulado."""
+
+    def __init__(self, status, html=SHELL, **kwargs):
+        super().__init__(pool=object(), **kwargs)
+        self.http_response = (status, html)
+        self.rendered = []
+
+    async def fetch_http(self, url, headers=None):
+        status, html = self.http_response
+        return FetchResult(url, status, html, HTTP, {"Content-Type": "text/html"})
+
+    async def fetch_browser(self, url, selectors=(), timeout=None):
+        self.rendered.append(url)
+        return FetchResult(url, 200, "<html><body>" + "x" * 500 + "</body></html>", BROWSER)
+
+
+def test_error_responses_do_not_fall_back_or_learn():
+    for status in (404, 503):
+        fetcher = FakeFetcher(status)
+        result = asyncio.run(fetcher.fetch("https://shop.example/missing"))
+        assert result.status == status and result.via == HTTP
+        assert fetcher.rendered == []
+        assert fetcher.policy.learned == {}
+
+
+def test_javascript_shell_falls_back_and_learns_browser():
+    fetcher = FakeFetcher(200)
+    result = asyncio.run(fetcher.fetch("https://spa.example/"))
+    assert result.via == BROWSER
+    assert fetcher.policy.learned == {"spa.example": BROWSER}
+
+
+def test_recheck_only_for_learned_http_hosts():
+    policy = RenderPolicy(rules={"static.example": HTTP})
+    policy.learn("https://shop.example/", HTTP)
+    fetcher = FakeFetcher(200, policy=policy)
+
+    assert asyncio.run(fetcher.recheck("https://static.example/a")) is None
+    rendered = asyncio.run(fetcher.recheck("https://shop.example/js-only"))
+    assert rendered.via == BROWSER
+    assert fetcher.rendered == ["https://shop.example/js-only"]
+
+
+def test_selector_check_without_bs4_renders_without_learning(monkeypatch):
+    from auto_scrape import fetcher as fetcher_module
+
+    monkeypatch.setattr(fetcher_module, "can_check_selectors", lambda: False)
+    page = "<html><body><ul class='items'>" + "<li>producto</li>" * 50 + "</ul></body></html>"
+    assert fetcher_module.missing_selectors(page, [".items"]) == [".items"]
+
+    fetcher = FakeFetcher(200, html=page)
+    result = asyncio.run(fetcher.fetch("https://shop.example/", selectors=[".items"]))
+    assert result.via == BROWSER
+    assert fetcher.policy.learned == {}
+
+
+def test_missing_bs4_is_reported_once(monkeypatch, capsys):
+    import builtins
+
+    from auto_scrape.fetcher import can_check_selectors
+
+    real_import = builtins.__import__
+
+    def no_bs4(name, *args, **kwargs):
+        if name == "bs4":
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    can_check_selectors.cache_clear()
+    monkeypatch.setattr(builtins, "__import__", no_bs4)
+    try:
+        assert can_check_selectors() is False
+        assert can_check_selectors() is False
+    finally:
+        can_check_selectors.cache_clear()
+    assert len(capsys.readouterr().out.splitlines()) == 1
@@ -0,0 +1,60 @@
+import pytest
+
+from auto_scrape.fingerprint import TemplateExtractors, dom_fingerprint, load_extractor
+
+
+def _listing(*cards):
+    items = "".join(f'<li class="{c}"><a href="/p">x</a><span class="price">1</span></li>'
+                    for c in cards)
+    return f'<html><body><ul class="results">{items}</ul></body></html>'
+
+
+def test_fingerprint_ignores_sibling_count_and_order():
+    base = _listing("card", "card", "card sponsored")
+    assert dom_fingerprint(base) == dom_fingerprint(_listing("card sponsored", "card"))
+    assert dom_fingerprint(base) == dom_fingerprint(_listing("card", "card sponsored", "card", "card"))
+
+
+def test_fingerprint_changes_with_structure():
+    assert dom_fingerprint(_listing("card")) != dom_fingerprint(_listing("card", "card sponsored"))
+    assert dom_fingerprint(_listing("card")) != dom_fingerprint("<html><body><table></table></body></html>")
+
+
+class _Assistant:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_scraping_code(self, prompt, refresh=False, html=None):
+        self.calls += 1
+        return "def extract(html):\n    return [{'len': len(html)}]\n"
+
+
+def test_generated_code_requires_explicit_trust(tmp_path):
+    with pytest.raises(PermissionError):
+        load_extractor("def extract(html):\n    return []\n")
+    with pytest.raises(PermissionError):
+        TemplateExtractors(_Assistant(), "productos", path=tmp_path)
+
+
+def test_trusted_extractors_are_stored_and_reused(tmp_path):
+    assistant = _Assistant()
+    page = _listing("card", "card")
+    extractors = TemplateExtractors(assistant, "productos", path=tmp_path, trust_generated_code=True)
+    assert extractors.extract(page) == [{"len": len(page)}]
+    assert len(list(tmp_path.glob("*.py"))) == 1
+
+    # Una instancia nueva reutiliza el extractor guardado sin llamar al modelo
+    again = TemplateExtractors(assistant, "productos", path=tmp_path, trust_generated_code=True)
+    assert again.extract(page) == [{"len": len(page)}]
+    assert assistant.calls == 1 and again.stats["reused"] == 1
+
+
+def test_extractors_are_not_shared_between_descriptions(tmp_path):
+    assistant = _Assistant()
+    page = _listing("card", "card")
+    TemplateExtractors(assistant, "productos", path=tmp_path, trust_generated_code=True).extract(page)
+    TemplateExtractors(assistant, "precios", path=tmp_path, trust_generated_code=True).extract(page)
+    TemplateExtractors(assistant, "productos", path=tmp_path, trust_generated_code=True,
+                       prompt_template="{description} en {url}").extract(page)
+    assert assistant.calls == 3
+    assert len(list(tmp_path.glob("*.py"))) == 3
@@ -0,0 +1,68 @@
+import asyncio
+
+from auto_scrape.metrics import METRICS
+from auto_scrape.scraper import URLFrontier
+from auto_scrape.utils import normalize_url
+
+
+def test_normalize_url_rejects_malformed_urls():
+    assert normalize_url("http://h:abc/") is None
+    assert normalize_url("http://[::1/") is None
+    assert normalize_url("HTTP://Example.com:80/a?utm_source=x&b=1&a=2#top") == "http://example.com/a?a=2&b=1"
+
+
+def test_frontier_skips_links_that_do_not_normalize():
+    frontier = URLFrontier()
+    before = METRICS.counter("invalid_urls_total").value()
+    added = asyncio.run(frontier.put_many(["http://h:abc/", "http://h/ok", "http://h/ok#x"]))
+    assert added == ["http://h/ok"]
+    assert len(frontier) == 1
+    assert METRICS.counter("invalid_urls_total").value() == before + 1
+    frontier.close()
+
+
+def test_delayed_retry_frees_the_host_slot_while_waiting():
+    async def scenario():
+        frontier = URLFrontier(per_host=1)
+        frontier.add("http://a/1")
+        frontier.add("http://a/2")
+        url, depth = await frontier.get()
+        assert url == "http://a/1"
+
+        await frontier.retry(url, depth, delay=0.2)
+        await frontier.done(url)
+        # El host queda libre durante el backoff
+        assert await asyncio.wait_for(frontier.get(), 0.1) == ("http://a/2", 0)
+        await frontier.done("http://a/2")
+
+        join = asyncio.ensure_future(frontier.join())
+        await asyncio.sleep(0.05)
+        assert not join.done()
+        assert await asyncio.wait_for(frontier.get(), 1) == ("http://a/1", 0)
+        await frontier.done("http://a/1")
+        await asyncio.wait_for(join, 1)
+        frontier.close()
+
+    asyncio.run(scenario())
+
+
+def test_get_respects_the_per_host_limit():
+    async def scenario():
+        frontier = URLFrontier(per_host=2)
+        for url in ("http://a/1", "http://a/2", "http://a/3", "http://b/1"):
+            frontier.add(url)
+        got = [(await frontier.get())[0] for _ in range(3)]
+        assert sorted(got) == ["http://a/1", "http://a/2", "http://b/1"]
+
+        # a/3 espera a que termine una URL de su host
+        waiting = asyncio.ensure_future(frontier.get())
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        await frontier.done("http://b/1")
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        await frontier.done("http://a/1")
+        assert await asyncio.wait_for(waiting, 1) == ("http://a/3", 0)
+        frontier.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import auto_scrape
+from benchmarks.importtime import BUDGETS, forbidden_imports, import_profile
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_package_namespace_is_only_the_public_api():
+    # En un intérprete nuevo: los tests anteriores añaden sus submódulos al paquete
+    code = "import auto_scrape; print(*[n for n in vars(auto_scrape) if not n.startswith('_')])"
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                          cwd=str(ROOT), check=True)
+    assert proc.stdout.split() == []
+    assert {n for n in dir(auto_scrape) if not n.startswith("_")} >= set(auto_scrape._LAZY)
+
+
+@pytest.mark.parametrize("module", list(BUDGETS))
+def test_modules_do_not_import_heavy_dependencies(module):
+    _, imported = import_profile(module)
+    assert forbidden_imports(imported, BUDGETS[module][1]) == []
+
+
+# Los tiempos absolutos dependen de la máquina y de su carga: solo bajo demanda
+@pytest.mark.skipif(os.environ.get("AUTO_SCRAPE_IMPORTTIME") != "1",
+                    reason="AUTO_SCRAPE_IMPORTTIME=1 activa los presupuestos de tiempo")
+def test_import_time_budgets():
+    scale = os.environ.get("AUTO_SCRAPE_IMPORTTIME_SCALE", "1")
+    proc = subprocess.run([sys.executable, "-m", "benchmarks.importtime", "--runs", "3", "--scale", scale],
+                          capture_output=True, text=True, cwd=str(ROOT))
+    assert proc.returncode == 0, proc.stdout + proc.stderr
@@ -0,0 +1,143 @@
+import asyncio
+import json
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from auto_scrape.metrics import MetricsRegistry
+
+
+def test_prometheus_text_for_counters_and_histograms():
+    registry = MetricsRegistry()
+    registry.counter("pages_total", "Páginas procesadas").inc(2, status="ok")
+    registry.inc("pages_total", status="ok")
+    registry.inc("pages_total", status='a"b\nc')
+    histogram = registry.histogram("fetch_seconds", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 2.0):
+        histogram.observe(value, site="a.test")
+
+    assert registry.to_prometheus().splitlines() == [
+        "# TYPE auto_scrape_fetch_seconds histogram",
+        'auto_scrape_fetch_seconds_bucket{site="a.test",le="0.1"} 1',
+        'auto_scrape_fetch_seconds_bucket{site="a.test",le="1"} 2',
+        'auto_scrape_fetch_seconds_bucket{site="a.test",le="+Inf"} 3',
+        'auto_scrape_fetch_seconds_sum{site="a.test"} 2.55',
+        'auto_scrape_fetch_seconds_count{site="a.test"} 3',
+        "# HELP auto_scrape_pages_total Páginas procesadas",
+        "# TYPE auto_scrape_pages_total counter",
+        'auto_scrape_pages_total{status="a\\"b\\nc"} 1',
+        'auto_scrape_pages_total{status="ok"} 3',
+    ]
+    assert registry.counter("auto_scrape_pages_total").value(status="ok") == 3
+    with pytest.raises(ValueError, match="counter"):
+        registry.histogram("pages_total")
+
+
+def test_histogram_quantiles_interpolate_within_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("wait_seconds", buckets=(1.0, 2.0))
+    for value in (0.5, 1.5, 1.5, 1.5):
+        histogram.observe(value)
+    assert histogram.quantile(0.25) == 1.0
+    assert histogram.quantile(0.5) == pytest.approx(4 / 3)
+    assert histogram.quantile(1.0) == 1.5
+    assert histogram.quantile(0.5, site="otro") == 0.0
+
+
+def test_spans_record_duration_errors_and_parents():
+    registry = MetricsRegistry()
+    with registry.span("crawl") as outer:
+        with registry.span("extract", site="a.test") as inner:
+            pass
+    with pytest.raises(KeyError):
+        with registry.span("extract", site="a.test"):
+            raise KeyError("x")
+
+    async def cancelled():
+        with registry.span("navigate"):
+            raise asyncio.CancelledError
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(cancelled())
+
+    assert inner.parent == outer.id and outer.parent is None
+    assert registry.histogram("extract_seconds").series[(("site", "a.test"),)].count == 2
+    errors = registry.counter("extract_errors_total")
+    assert errors.value(site="a.test", error="KeyError") == 1
+    assert "auto_scrape_navigate_errors_total" not in registry.metrics
+    assert [s.name for s in registry.spans] == ["extract", "crawl", "extract", "navigate"]
+
+
+def test_timed_measures_sync_and_async_functions():
+    registry = MetricsRegistry()
+
+    @registry.timed("parse")
+    def parse(x):
+        return x + 1
+
+    @registry.timed("fetch", site="a.test")
+    async def fetch():
+        return "ok"
+
+    assert parse(1) == 2 and asyncio.run(fetch()) == "ok"
+    assert set(registry.stages()) == {"parse", "fetch"}
+    assert registry.stages()["fetch"]["count"] == 1
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    with registry.span("extract"):
+        registry.inc("pages_total")
+        registry.observe("size_bytes", 10)
+    assert not registry.metrics and not registry.spans
+
+
+def test_summary_and_trace_files(tmp_path):
+    registry = MetricsRegistry()
+    registry.inc("pages_total", status="ok")
+    with registry.span("crawl"):
+        with registry.span("extract"):
+            pass
+
+    summary_path = registry.write_summary(str(tmp_path / "out" / "metrics.json"), run="r1")
+    with open(summary_path, encoding="utf-8") as f:
+        summary = json.load(f)
+    assert summary["run"] == "r1"
+    assert summary["counters"] == {"auto_scrape_pages_total": {'{status="ok"}': 1}}
+    assert summary["histograms"]["auto_scrape_extract_seconds"]["total"]["count"] == 1
+    assert list(summary["stages"]) == ["crawl", "extract"]
+    assert registry.format_stages().startswith("crawl ")
+
+    prom_path = registry.write_prometheus(str(tmp_path / "out" / "metrics.prom"))
+    with open(prom_path, encoding="utf-8") as f:
+        assert f.read() == registry.to_prometheus()
+    # El reemplazo atómico no deja temporales
+    assert sorted(p.name for p in (tmp_path / "out").iterdir()) == ["metrics.json", "metrics.prom"]
+
+    with open(registry.write_trace(str(tmp_path / "trace.json")), encoding="utf-8") as f:
+        events = json.load(f)["traceEvents"]
+    crawl, = [e for e in events if e["name"] == "crawl"]
+    extract, = [e for e in events if e["name"] == "extract"]
+    assert extract["args"]["parent"] == crawl["args"]["id"]
+    assert extract["tid"] == crawl["tid"] == crawl["args"]["id"]
+
+    registry.reset()
+    assert not registry.metrics and not registry.spans
+
+
+def test_serve_exposes_the_metrics_endpoint():
+    registry = MetricsRegistry()
+    registry.inc("pages_total")
+    server = registry.serve(port=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        with urlopen(f"{url}/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert "auto_scrape_pages_total 1" in response.read().decode()
+        with pytest.raises(HTTPError) as missing:
+            urlopen(f"{url}/otra")
+        missing.value.close()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,21 @@
+from auto_scrape.minimizer import minimize_html
+
+
+def test_content_with_tracking_like_class_names_is_kept():
+    html = ('<div class="order-tracking"><span class="tracking-number">123</span></div>'
+            '<div class="product-modal">Price 10</div><p>x</p>'
+            '<div class="ad-free sponsored-listing">Oferta patrocinada</div>')
+    reduced = minimize_html(html).html
+    for text in ("123", "Price 10", "x", "Oferta patrocinada"):
+        assert text in reduced
+
+
+def test_ads_consent_and_pixels_are_dropped():
+    html = ('<div class="ad">Anuncio</div><aside class="banner adsbygoogle">Google</aside>'
+            '<div id="onetrust-consent-sdk">Cookies</div>'
+            '<img src="https://www.google-analytics.com/collect?v=1" alt="pixel">'
+            '<img src="https://shop.example/producto.jpg" alt="Producto"><p>Precio 10</p>')
+    reduced = minimize_html(html).html
+    for text in ("Anuncio", "Google", "Cookies", "pixel"):
+        assert text not in reduced
+    assert "producto.jpg" in reduced and "Precio 10" in reduced
@@ -0,0 +1,77 @@
+import asyncio
+import csv
+import gzip
+import json
+
+import pytest
+
+from auto_scrape.exporters import CSVExporter, JSONExporter
+
+
+def _records(count):
+    return [{"id": i, "name": f"producto {i}", "price": i * 1.5} for i in range(count)]
+
+
+def test_csv_export_rotates_by_bytes_before_the_sample_is_full(tmp_path):
+    manifest_file = CSVExporter(max_bytes=200).export(_records(50), str(tmp_path / "out.csv"))
+
+    manifest = json.loads(open(manifest_file, encoding="utf-8").read())
+    assert manifest["complete"] is True
+    assert manifest["records"] == 50
+    assert len(manifest["shards"]) > 1
+    rows = []
+    for shard in manifest["shards"]:
+        with open(tmp_path / shard["path"], newline="", encoding="utf-8") as f:
+            shard_rows = list(csv.DictReader(f))
+        assert len(shard_rows) == shard["records"]
+        rows.extend(shard_rows)
+    assert [int(r["id"]) for r in rows] == list(range(50))
+
+
+def test_json_lines_gzip_shards_by_record_count(tmp_path):
+    manifest_file = JSONExporter(lines=True, compression="gzip", max_records=20).export(
+        _records(50), str(tmp_path / "out.jsonl"))
+
+    manifest = json.loads(open(manifest_file, encoding="utf-8").read())
+    assert [s["path"] for s in manifest["shards"]] == [
+        "out-00000.jsonl.gz", "out-00001.jsonl.gz", "out-00002.jsonl.gz"]
+    ids = [json.loads(line)["id"]
+           for shard in manifest["shards"]
+           for line in gzip.open(tmp_path / shard["path"], "rt", encoding="utf-8")]
+    assert ids == list(range(50))
+
+
+def _failing(count):
+    yield from _records(count)
+    raise RuntimeError("fallo a mitad de la exportación")
+
+
+@pytest.mark.parametrize("exporter", [JSONExporter(), JSONExporter(lines=True),
+                                      JSONExporter(compression="gzip"), CSVExporter()])
+def test_failed_export_leaves_no_complete_looking_output(tmp_path, exporter):
+    output = tmp_path / "out.data"
+    with pytest.raises(RuntimeError):
+        exporter.export(_failing(5), str(output))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_failed_sharded_export_keeps_finished_shards_and_marks_incomplete(tmp_path):
+    exporter = JSONExporter(lines=True, max_records=2)
+    with pytest.raises(RuntimeError):
+        exporter.export(_failing(5), str(tmp_path / "out.jsonl"))
+
+    manifest = json.loads((tmp_path / "out.manifest.json").read_text(encoding="utf-8"))
+    assert manifest["complete"] is False
+    assert [s["path"] for s in manifest["shards"]] == ["out-00000.jsonl", "out-00001.jsonl"]
+    assert not (tmp_path / "out-00002.jsonl").exists()
+
+
+def test_failed_async_export_is_discarded(tmp_path):
+    async def records():
+        for record in _records(3):
+            yield record
+        raise RuntimeError("fallo")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(JSONExporter().export_async(records(), str(tmp_path / "out.json")))
+    assert not (tmp_path / "out.json").exists()
@@ -0,0 +1,119 @@
+import asyncio
+import contextlib
+
+import pytest
+
+from auto_scrape.pagination import paginate
+
+
+class _Page:
+    def __init__(self, site):
+        self.site = site
+        self.url = None
+
+    async def goto(self, url, **kwargs):
+        if url not in self.site.links:
+            raise RuntimeError(f"404 {url}")
+        self.site.loaded.append(url)
+        await asyncio.sleep(0.01)
+        self.url = url
+
+    async def evaluate(self, script, selector):
+        return self.site.links[self.url]
+
+
+class _Site:
+    """Listado falso: `links` asocia cada URL a la de su página siguiente."""
+
+    def __init__(self, links):
+        self.links = links
+        self.loaded = []
+        self.acquired = 0
+        self.peak = 0
+
+    async def acquire(self):
+        self.acquired += 1
+        self.peak = max(self.peak, self.acquired)
+        return _Page(self)
+
+    async def release(self, page):
+        self.acquired -= 1
+
+
+def _chain(n):
+    return {f"/p{i}": (f"/p{i + 1}" if i < n else None) for i in range(1, n + 1)}
+
+
+async def _collect(site, extract=None, **kwargs):
+    async def title(page, url):
+        return url.upper()
+
+    return [item async for item in paginate(site, "/p1", extract or title, **kwargs)]
+
+
+def test_pages_are_yielded_in_order_until_there_is_no_next_link():
+    site = _Site(_chain(4))
+    assert asyncio.run(_collect(site)) == [(f"/p{i}", f"/P{i}") for i in range(1, 5)]
+    assert site.acquired == 0
+
+
+def test_a_link_back_to_a_visited_page_stops_the_listing():
+    site = _Site({"/p1": "/p2", "/p2": "/p3", "/p3": "/p1"})
+    assert [url for url, _ in asyncio.run(_collect(site))] == ["/p1", "/p2", "/p3"]
+    assert site.loaded == ["/p1", "/p2", "/p3"]
+
+
+def test_max_pages():
+    site = _Site(_chain(10))
+    assert [url for url, _ in asyncio.run(_collect(site, max_pages=3))] == ["/p1", "/p2", "/p3"]
+    assert site.loaded == ["/p1", "/p2", "/p3"]
+
+
+@pytest.mark.parametrize("prefetch", [0, 1, 2])
+def test_prefetch_bounds_the_pages_loaded_ahead(prefetch):
+    site = _Site(_chain(6))
+    ahead = []
+
+    async def slow(page, url):
+        await asyncio.sleep(0.05)
+        # Páginas cargadas por delante de la que se extrae
+        ahead.append(len(site.loaded) - int(url[2:]))
+        return url
+
+    asyncio.run(_collect(site, slow, prefetch=prefetch))
+    assert site.peak == prefetch + 1
+    assert max(ahead) == prefetch
+
+
+def test_leaving_early_returns_the_prefetched_pages():
+    site = _Site(_chain(10))
+
+    async def scenario():
+        async def title(page, url):
+            return url
+
+        async with contextlib.aclosing(paginate(site, "/p1", title, prefetch=2)) as pages:
+            async for url, _ in pages:
+                if url == "/p2":
+                    break
+
+    asyncio.run(scenario())
+    assert site.acquired == 0
+    assert len(site.loaded) < 10
+
+
+def test_a_failed_load_is_raised_after_the_previous_pages():
+    site = _Site({"/p1": "/p2", "/p2": "/missing"})
+    got = []
+
+    async def scenario():
+        async def title(page, url):
+            return url
+
+        async for url, _ in paginate(site, "/p1", title):
+            got.append(url)
+
+    with pytest.raises(RuntimeError, match="404"):
+        asyncio.run(scenario())
+    assert got == ["/p1", "/p2"]
+    assert site.acquired == 0
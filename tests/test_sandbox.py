@@ -0,0 +1,145 @@
+import importlib.util
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+SANDBOX_DIR = Path(__file__).resolve().parent.parent / "sandbox"
+
+# `docker run` simula un script (los que contienen "slow" no terminan y los
+# que contienen "fail" salen con 3); `docker inspect` devuelve la imagen con
+# la etiqueta de $FAKE_DOCKER_IMAGE_HASH si está definida
+FAKE_DOCKER = """#!{python}
+import json, os, sys, time
+
+args = sys.argv[1:]
+def record(*parts):
+    with open(os.environ["FAKE_DOCKER_LOG"], "a") as f:
+        f.write(" ".join(parts) + "\\n")
+
+if args[0] == "run":
+    name, script = args[args.index("--name") + 1], args[-1]
+    record("start", name, script, repr(time.time()))
+    time.sleep(30 if "slow" in script else 0.3)
+    print("salida de " + script)
+    record("end", name, script, repr(time.time()))
+    sys.exit(3 if "fail" in script else 0)
+elif args[0] == "inspect":
+    image_hash = os.environ.get("FAKE_DOCKER_IMAGE_HASH")
+    labels = {{"auto_scrape.context_hash": image_hash}} if image_hash else {{}}
+    print(json.dumps([{{"RepoTags": [args[1]], "Config": {{"Labels": labels}}}}] if image_hash is not None else []))
+else:
+    record(*args)
+"""
+
+
+def _load_sandbox(name="sandbox_cli"):
+    spec = importlib.util.spec_from_file_location(name, SANDBOX_DIR / "sandbox.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_cli_works_without_auto_scrape(monkeypatch, capsys):
+    for name in [m for m in sys.modules if m == "auto_scrape" or m.startswith("auto_scrape.")]:
+        monkeypatch.delitem(sys.modules, name)
+    monkeypatch.setitem(sys.modules, "auto_scrape", None)
+    path = list(sys.path)
+
+    sandbox = _load_sandbox("sandbox_standalone")
+    assert sys.path == path
+    with sandbox.span("sandbox_run", mode="script"):
+        sandbox.METRICS.inc("sandbox_scripts_total", mode="script", ok=True)
+
+    monkeypatch.setattr(sys, "argv", ["sandbox.py", "--metrics", "m.prom", "stop"])
+    monkeypatch.setattr(sandbox, "run_command", lambda sandbox, args: None)
+    sandbox.main()
+    assert "no se guardan métricas" in capsys.readouterr().out
+
+
+@pytest.fixture
+def docker(tmp_path, monkeypatch):
+    """Sandbox con directorios en tmp_path y un `docker` falso en el PATH."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    fake = bin_dir / "docker"
+    fake.write_text(FAKE_DOCKER.format(python=sys.executable))
+    fake.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_DOCKER_LOG", str(tmp_path / "docker.log"))
+    monkeypatch.delenv("FAKE_DOCKER_IMAGE_HASH", raising=False)
+
+    sandbox = _load_sandbox().PlaywrightSandbox()
+    sandbox.scripts_dir = tmp_path / "scripts"
+    sandbox.persistent_dir = tmp_path / "persistent"
+    sandbox.scripts_dir.mkdir()
+    sandbox.persistent_dir.mkdir()
+    return sandbox
+
+
+def _docker_calls():
+    path = Path(os.environ["FAKE_DOCKER_LOG"])
+    return path.read_text().splitlines() if path.exists() else []
+
+
+def test_run_batch_runs_scripts_in_parallel_containers(docker, monkeypatch):
+    for name in ("a.py", "b.py", "c.py", "fail.py", "slow.py", "notes.txt"):
+        (docker.scripts_dir / name).write_text("")
+    monkeypatch.setattr(docker, "ensure_image", lambda: True)
+
+    summary = docker.run_batch(workers=5, timeout=2)
+
+    jobs = {job["script"]: job for job in summary["jobs"]}
+    assert sorted(jobs) == ["a.py", "b.py", "c.py", "fail.py", "slow.py"]
+    assert {name: job["exit_code"] for name, job in jobs.items()} == {
+        "a.py": 0, "b.py": 0, "c.py": 0, "fail.py": 3, "slow.py": 124}
+    assert (summary["succeeded"], summary["failed"]) == (3, 2)
+    assert len({job["container"] for job in jobs.values()}) == 5
+
+    calls = [line.split() for line in _docker_calls()]
+    starts = {c[2]: float(c[3]) for c in calls if c[0] == "start"}
+    ends = {c[2]: float(c[3]) for c in calls if c[0] == "end"}
+    # Los cuatro scripts rápidos se solapan en lugar de ir en serie
+    assert max(starts[s] for s in ends) < min(ends.values())
+    assert ["kill", jobs["slow.py"]["container"]] in calls
+
+    logs = Path(summary["logs_dir"])
+    assert (logs / "a.log").read_text() == "salida de a.py\n"
+    assert "Tiempo máximo superado" in (logs / "slow.log").read_text()
+    with open(logs / "summary.json", encoding="utf-8") as f:
+        assert json.load(f)["scripts"] == 5
+
+
+def test_image_is_rebuilt_only_when_the_build_context_changes(docker, tmp_path, monkeypatch):
+    context = tmp_path / "context"
+    context.mkdir()
+    for name in ("Dockerfile", "requirements.txt", "worker.py"):
+        (context / name).write_text(f"# {name}\n")
+    docker.sandbox_dir = context
+    original = docker.context_hash()
+
+    # Archivos fuera del contexto de build no cuentan
+    (context / "notes.md").write_text("cambio")
+    assert docker.context_hash() == original
+
+    def builds():
+        return [line for line in _docker_calls() if line.startswith("build")]
+
+    # Sin imagen: se construye con la etiqueta del hash
+    assert docker.build_image()
+    assert builds() == [f"build -t {docker.image_name} -t auto_scrape_sandbox:{original[:12]} "
+                        f"--label auto_scrape.context_hash={original} {context}"]
+
+    # Imagen al día: no se reconstruye salvo que se pida
+    monkeypatch.setenv("FAKE_DOCKER_IMAGE_HASH", original)
+    assert docker.build_image() and len(builds()) == 1
+    assert docker.build_image(force=True) and len(builds()) == 2
+
+    # Cambiar una dependencia cambia el hash y provoca la reconstrucción
+    (context / "requirements.txt").write_text("lxml==5.0\n")
+    changed = docker.context_hash()
+    assert changed != original
+    assert docker.ensure_image() and len(builds()) == 3
+    assert builds()[-1].endswith(f"--label auto_scrape.context_hash={changed} {context}")
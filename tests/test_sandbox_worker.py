@@ -0,0 +1,178 @@
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import textwrap
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+SANDBOX_DIR = Path(__file__).resolve().parent.parent / "sandbox"
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="el worker usa fork")
+
+WORKER_BOOT = """
+import socket, sys
+sys.path.insert(0, sys.argv[1])
+import worker
+worker.SCRIPTS_DIR, worker.WORK_DIR = sys.argv[2], sys.argv[3]
+server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+server.bind(worker.SOCKET_PATH)
+server.listen(8)
+worker.serve_jobs(server, 30)
+"""
+
+# `docker ps` dice que el worker está en marcha y `docker exec <worker> python
+# /app/worker.py run ...` ejecuta el cliente real contra el worker de la prueba
+FAKE_DOCKER = """#!/bin/sh
+echo "$@" >> "$FAKE_DOCKER_LOG"
+case "$1" in
+  ps) echo 0123456789ab ;;
+  exec) shift 4; exec "$FAKE_DOCKER_PYTHON" "$FAKE_DOCKER_WORKER" "$@" ;;
+  *) exit 1 ;;
+esac
+"""
+
+JOB = """
+import os, sys, time
+time.sleep(float(sys.argv[2]))
+print(f"job {sys.argv[1]} en {os.path.basename(os.getcwd())}")
+sys.exit(int(sys.argv[3]))
+"""
+
+
+FLOOD = """
+import sys
+sys.stdout.write("x" * int(sys.argv[1]))
+"""
+
+
+def _load_worker():
+    spec = importlib.util.spec_from_file_location("sandbox_worker", SANDBOX_DIR / "worker.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _load_sandbox():
+    spec = importlib.util.spec_from_file_location("sandbox_cli", SANDBOX_DIR / "sandbox.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def worker(tmp_path, monkeypatch):
+    scripts, work, bin_dir = tmp_path / "scripts", tmp_path / "work", tmp_path / "bin"
+    for directory in (scripts, work, bin_dir):
+        directory.mkdir()
+    (scripts / "job.py").write_text(JOB)
+    docker = bin_dir / "docker"
+    docker.write_text(FAKE_DOCKER)
+    docker.chmod(0o755)
+
+    socket_path = str(tmp_path / "worker.sock")
+    monkeypatch.setenv("AUTO_SCRAPE_WORKER_SOCKET", socket_path)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_DOCKER_LOG", str(tmp_path / "docker.log"))
+    monkeypatch.setenv("FAKE_DOCKER_PYTHON", sys.executable)
+    monkeypatch.setenv("FAKE_DOCKER_WORKER", str(SANDBOX_DIR / "worker.py"))
+
+    process = subprocess.Popen([sys.executable, "-c", textwrap.dedent(WORKER_BOOT),
+                                str(SANDBOX_DIR), str(scripts), str(work)])
+    deadline = time.monotonic() + 10
+    while not os.path.exists(socket_path) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    yield tmp_path
+    process.terminate()
+    process.wait(timeout=10)
+
+
+def test_run_in_worker_runs_concurrent_jobs_through_docker(worker, capfd):
+    sandbox = _load_sandbox().PlaywrightSandbox()
+    jobs = [("a", "0.3", "0"), ("b", "0", "0"), ("c", "0.1", "3"), ("d", "0.2", "0")]
+
+    with ThreadPoolExecutor(len(jobs)) as pool:
+        results = list(pool.map(lambda args: sandbox.run_in_worker("job.py", list(args)), jobs))
+
+    assert results == [True, True, False, True]
+    out = capfd.readouterr().out
+    for name, _, _ in jobs:
+        assert f"job {name} en work" in out
+    calls = (worker / "docker.log").read_text().splitlines()
+    assert f"exec {sandbox.worker_name} python /app/worker.py run job.py b 0 0" in calls
+
+
+def test_stalled_clients_do_not_block_other_jobs(worker):
+    (worker / "scripts" / "flood.py").write_text(FLOOD)
+    size = 8 << 20
+    # Un cliente que no termina su petición y otro que no lee su salida
+    silent = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    silent.connect(os.environ["AUTO_SCRAPE_WORKER_SOCKET"])
+    silent.sendall(b'{"script": "job.py"')
+    reader = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    reader.connect(os.environ["AUTO_SCRAPE_WORKER_SOCKET"])
+    reader.sendall(json.dumps({"script": "flood.py", "args": [str(size)]}).encode() + b"\n")
+    time.sleep(0.5)
+
+    result = subprocess.run([sys.executable, str(SANDBOX_DIR / "worker.py"), "run", "job.py", "e", "0", "0"],
+                            capture_output=True, text=True, timeout=30)
+    assert result.returncode == 0 and "job e en work" in result.stdout
+
+    # La salida retenida llega entera cuando el cliente lee
+    worker_module = _load_worker()
+    received = 0
+    while True:
+        kind, value = worker_module._HEADER.unpack(worker_module._recv_exact(reader, worker_module._HEADER.size))
+        if kind == b"X":
+            break
+        received += len(worker_module._recv_exact(reader, value))
+    assert (received, value) == (size, 0)
+    silent.close()
+    reader.close()
+
+
+def test_start_chromium_fails_when_cdp_does_not_answer(tmp_path, monkeypatch):
+    worker_module = _load_worker()
+    executable = tmp_path / "chromium"
+    executable.write_text("#!/bin/sh\nexec sleep 30\n")
+    executable.chmod(0o755)
+
+    class _Playwright:
+        chromium = types.SimpleNamespace(executable_path=str(executable))
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            pass
+
+    sync_api = types.ModuleType("playwright.sync_api")
+    sync_api.sync_playwright = _Playwright
+    monkeypatch.setitem(sys.modules, "playwright", types.ModuleType("playwright"))
+    monkeypatch.setitem(sys.modules, "playwright.sync_api", sync_api)
+
+    def refuse(*args, **kwargs):
+        raise ConnectionRefusedError
+
+    started = []
+    popen = subprocess.Popen
+
+    def record(*args, **kwargs):
+        started.append(popen(*args, **kwargs))
+        return started[-1]
+
+    monkeypatch.setattr(worker_module.urllib.request, "urlopen", refuse)
+    monkeypatch.setattr(worker_module.subprocess, "Popen", record)
+    monkeypatch.setattr(worker_module, "CDP_TRIES", 3)
+    monkeypatch.delenv("AUTO_SCRAPE_CDP_ENDPOINT", raising=False)
+
+    with pytest.raises(RuntimeError):
+        worker_module.start_chromium()
+    assert started[0].poll() is not None
+    assert "AUTO_SCRAPE_CDP_ENDPOINT" not in os.environ
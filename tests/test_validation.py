@@ -0,0 +1,106 @@
+from collections import OrderedDict
+
+import pytest
+
+from auto_scrape.exporters import JSONExporter
+from auto_scrape.validation import (
+    RecordValidator,
+    ValidatingExporter,
+    load_schema,
+    schema_from_description,
+    to_date,
+    to_duration,
+)
+
+DESCRIPTION = """
+Extrae las competiciones con este formato:
+[{'name': 'Maratón', 'date': '2024-04-21', 'results': [{'position': Number, 'time': '02:10:05'}],}]
+"""
+SCHEMA = {"name": "str", "date": "date", "results": [{"position": "int", "time": "duration"}]}
+
+
+def test_schema_from_description():
+    assert schema_from_description(DESCRIPTION) == SCHEMA
+    assert load_schema(True, DESCRIPTION) == SCHEMA
+    assert load_schema('[{"name": "texto", "n": "number"}]') == {"name": "str", "n": "int"}
+    with pytest.raises(ValueError):
+        schema_from_description("sin esquema")
+    with pytest.raises(ValueError):
+        load_schema(True)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1:02:03", "01:02:03"),
+    ("2:03", "00:02:03"),
+    ("1h 2m 3s", "01:02:03"),
+    (75.5, "00:01:15.5"),
+    ("mucho", None),
+    (True, None),
+])
+def test_to_duration(value, expected):
+    result = to_duration(value)
+    assert (result if isinstance(result, str) else None) == expected
+
+
+def test_to_date():
+    assert to_date("21/04/2024") == "2024-04-21"
+    assert to_date("2024-04-21T10:00:00") == "2024-04-21"
+    assert not isinstance(to_date("ayer"), str)
+
+
+def test_validate_converts_and_counts_per_field():
+    validator = RecordValidator(SCHEMA)
+    records = validator.validate([
+        {"name": "Maratón", "date": "21/04/2024", "extra": 1,
+         "results": [{"position": "1º", "time": "2:10:05"}, {"position": "x", "time": ""}]},
+        {"name": "", "date": "2024-05-01", "results": "ninguno"},
+    ])
+    assert records == [
+        {"name": "Maratón", "date": "2024-04-21", "extra": 1,
+         "results": [{"position": 1, "time": "02:10:05"}, {"position": None, "time": None}]},
+        {"name": None, "date": "2024-05-01", "results": None},
+    ]
+    report = validator.report()
+    assert report["records"] == 2 and report["invalid_records"] == 2
+    assert report["fields"]["name"]["missing"] == 1
+    assert report["fields"]["results"]["invalid"] == 1
+    assert report["fields"]["results[].position"] == {"seen": 2, "missing": 0, "invalid": 1, "failure_rate": 0.5}
+    assert report["fields"]["results[].time"]["missing"] == 1
+
+
+def test_non_dict_records_and_items_are_dropped():
+    validator = RecordValidator(SCHEMA)
+    records = validator.validate([
+        "no es un registro",
+        OrderedDict(name="A", date="2024-01-01", results=["x", OrderedDict(position=2, time="1:00:00"), None]),
+    ])
+    assert records == [{"name": "A", "date": "2024-01-01", "results": [{"position": 2, "time": "01:00:00"}]}]
+    report = validator.report()
+    assert report["fields"]["results[]"] == {"seen": 3, "missing": 0, "invalid": 2, "failure_rate": 0.6667}
+    assert report["invalid_records"] == 2
+
+
+def test_drop_invalid_keeps_only_complete_records():
+    validator = RecordValidator({"name": "str", "n": "int"}, drop_invalid=True)
+    assert validator.validate([{"name": "a", "n": "3"}, {"name": "b", "n": "tres"}]) == [{"name": "a", "n": 3}]
+
+
+def test_accepts_and_degraded_fields():
+    degraded = []
+    validator = RecordValidator({"name": "str", "n": "int"}, max_failure_rate=0.2, min_records=4,
+                                on_degraded=lambda path, report: degraded.append(path))
+    assert validator.accepts([{"name": "a", "n": 1}, {"name": "b", "n": 2}])
+    assert not validator.accepts([{"name": "a", "n": "x"}, {"name": "b", "n": 2}])
+    assert not validator.accepts([]) and not validator.accepts(["a"])
+
+    validator.validate([{"name": "a", "n": "x"}] * 2 + [{"name": "b", "n": 1}] * 2)
+    validator.validate([{"name": "c", "n": "y"}])
+    assert degraded == ["n"]
+    assert "n 60.0%" in validator.format_report()
+
+
+def test_validating_exporter(tmp_path):
+    exporter = ValidatingExporter(JSONExporter(lines=True), RecordValidator({"n": "int"}), batch_size=2)
+    path = exporter.export(({"n": str(i)} for i in range(5)), str(tmp_path / "out.jsonl"))
+    with open(path, encoding="utf-8") as f:
+        assert f.read().splitlines() == [f'{{"n": {i}}}' for i in range(5)]